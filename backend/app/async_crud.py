@@ -0,0 +1,116 @@
+"""
+Async versions of the CRUD operations for the API routers
+This is a run_sync shim, not a separate async data-access layer: each function takes an
+AsyncSession and runs the matching sync function from crud.py on it through
+AsyncSession.run_sync, so the business logic stays in one place. Inside run_sync every
+statement is still awaited on the aiosqlite driver, so the event loop does not wait on
+database I/O, but building queries and ORM objects runs on the loop. Only the transaction
+export streams natively (iter_transactions_by_date_range).
+"""
+from functools import wraps
+from datetime import date
+from typing import AsyncIterator, Callable, Optional, Type
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import crud, schemas
+from .utils.analytics import (
+    calculate_credit_card_utilization,
+    calculate_credit_cards_utilization,
+    calculate_savings_comparison
+)
+from .utils.auto_increment import process_auto_recurring_investments, process_auto_salary_entries
+
+
+def run_sync(function: Callable, response_model: Optional[Type[BaseModel]] = None) -> Callable:
+    """
+    Wrap a sync function taking a Session as first argument into an async one taking an AsyncSession.
+    With response_model, ORM results are serialized inside the session so relationships
+    are loaded before returning (lazy loads are not possible outside run_sync).
+    """
+    def call(session, *args, **kwargs):
+        result = function(session, *args, **kwargs)
+        if response_model is None or result is None:
+            return result
+        if isinstance(result, list):
+            return [response_model.model_validate(item) for item in result]
+        return response_model.model_validate(result)
+
+    @wraps(function)
+    async def wrapper(db: AsyncSession, *args, **kwargs):
+        return await db.run_sync(call, *args, **kwargs)
+
+    return wrapper
+
+
+# Transaction operations
+
+create_transaction = run_sync(crud.create_transaction)
+apply_transaction_batch = run_sync(crud.apply_transaction_batch)
+get_transaction = run_sync(crud.get_transaction)
+get_all_transactions = run_sync(crud.get_all_transactions)
+get_transactions_by_month = run_sync(crud.get_transactions_by_month)
+get_transactions_by_date_range = run_sync(crud.get_transactions_by_date_range)
+update_transaction = run_sync(crud.update_transaction)
+delete_transaction = run_sync(crud.delete_transaction)
+
+
+async def iter_transactions_by_date_range(db: AsyncSession, start_date: date, end_date: date,
+                                          batch_size: int = 1000) -> AsyncIterator[list]:
+    """Yield transaction rows within a date range in (date, id) order, streaming batch_size rows at a time"""
+    result = await db.stream(crud.transactions_by_date_range_query(start_date, end_date, batch_size))
+    async for partition in result.mappings().partitions():
+        yield partition
+
+
+# Credit Card operations
+
+create_credit_card = run_sync(crud.create_credit_card, schemas.CreditCard)
+get_credit_card_summary = run_sync(crud.get_credit_card_summary)
+get_credit_card_summaries = run_sync(crud.get_credit_card_summaries)
+get_credit_card_transactions = run_sync(crud.get_credit_card_transactions)
+update_credit_card = run_sync(crud.update_credit_card)
+delete_credit_card = run_sync(crud.delete_credit_card)
+credit_card_exists = run_sync(lambda db, card_id: crud.get_credit_card(db, card_id) is not None)
+get_existing_credit_card_ids = run_sync(crud.get_existing_credit_card_ids)
+get_credit_card_utilization = run_sync(calculate_credit_card_utilization)
+get_credit_cards_utilization = run_sync(calculate_credit_cards_utilization)
+get_card_statements = run_sync(crud.get_card_statements)
+get_current_card_statement = run_sync(crud.get_current_card_statement)
+get_current_card_statements = run_sync(crud.get_current_card_statements)
+
+
+# Savings Investment operations
+
+create_savings_investment = run_sync(crud.create_savings_investment)
+get_savings_investment = run_sync(crud.get_savings_investment)
+get_all_savings_investments = run_sync(crud.get_all_savings_investments)
+update_savings_investment = run_sync(crud.update_savings_investment)
+delete_savings_investment = run_sync(crud.delete_savings_investment)
+process_recurring_investments = run_sync(lambda db: process_auto_recurring_investments(db)["processed_count"])
+startup_check_investments = run_sync(process_auto_recurring_investments)
+get_savings_comparison = run_sync(calculate_savings_comparison)
+
+
+# Salary operations
+
+create_salary = run_sync(crud.create_salary)
+get_salary = run_sync(crud.get_salary)
+get_all_salaries = run_sync(crud.get_all_salaries)
+get_active_salaries = run_sync(crud.get_active_salaries)
+update_salary = run_sync(crud.update_salary)
+delete_salary = run_sync(crud.delete_salary)
+# Each due salary can add several months of entries; report the transactions created
+process_monthly_salaries = run_sync(lambda db: process_auto_salary_entries(db)["entries_added"])
+startup_check_salaries = run_sync(process_auto_salary_entries)
+
+
+# Credit Card Payment operations
+
+create_credit_card_payment = run_sync(crud.create_credit_card_payment)
+apply_credit_card_payment_batch = run_sync(crud.apply_credit_card_payment_batch)
+get_credit_card_payment = run_sync(crud.get_credit_card_payment)
+get_all_credit_card_payments = run_sync(crud.get_all_credit_card_payments)
+get_payments_by_card = run_sync(crud.get_payments_by_card)
+get_payments_by_date_range = run_sync(crud.get_payments_by_date_range)
+update_credit_card_payment = run_sync(crud.update_credit_card_payment)
+delete_credit_card_payment = run_sync(crud.delete_credit_card_payment)
@@ -1,58 +1,267 @@
-from sqlalchemy.orm import Session
+import base64
+import json
+from sqlalchemy import delete, func, insert, select, tuple_, update
+from sqlalchemy.orm import Session, selectinload
 from . import models, schemas
+from .utils import rollups, statements
+from .utils.cache import mark_months_changed
+from .utils.codes import ensure_categories
+from .utils.columnar import record_transaction_changes
+from .utils.due_dates import investment_next_due_date, salary_next_due_date
+from .utils.investment_schedule import delete_investment_schedule, regenerate_investment_schedule
+from .utils.money import from_minor, minor_sum
 from datetime import datetime, date, timezone
 from dateutil.relativedelta import relativedelta
-from typing import List, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+
+# Batch operations
+BATCH_STATUS = {"create": "created", "update": "updated", "delete": "deleted"}
+
+
+def _apply_batch(db: Session, model, operations: list,
+                 record_changes: Callable[[List[Dict], List[Dict]], None]) -> Dict:
+    """
+    Apply mixed create/update/delete operations in one DB transaction using a single
+    INSERT ... RETURNING, one executemany UPDATE and one DELETE ... WHERE id IN (...).
+    record_changes(removed_rows, added_rows) is called before commit with the column values
+    of rows leaving and entering the table, so derived data can follow.
+    """
+    target_ids = [op.id for op in operations if op.op != "create" and op.id is not None]
+    existing = {}
+    if target_ids:
+        rows = db.execute(select(model.__table__).where(model.id.in_(target_ids)))
+        # Keyed by column key, which differs from the column name for transactions.category
+        existing = {row.id: dict(zip(model.__table__.columns.keys(), row)) for row in rows}
+    
+    results: List[Dict] = []
+    creates, updates, deletes = [], [], []
+    claimed_ids = set()
+    for index, operation in enumerate(operations):
+        result = {"index": index, "op": operation.op, "id": operation.id, "status": BATCH_STATUS[operation.op], "error": None}
+        results.append(result)
+        if operation.op != "delete" and operation.data is None:
+            result.update(status="error", error="data is required")
+        elif operation.op == "create":
+            creates.append((result, operation.data.dict()))
+        elif operation.id is None:
+            result.update(status="error", error="id is required")
+        elif operation.id not in existing:
+            result.update(status="error", error="Not found")
+        elif operation.id in claimed_ids:
+            result.update(status="error", error="id appears more than once in the batch")
+        else:
+            claimed_ids.add(operation.id)
+            if operation.op == "update":
+                updates.append((operation.id, operation.data.dict()))
+            else:
+                deletes.append(operation.id)
+    
+    if creates:
+        new_ids = db.execute(
+            insert(model).returning(model.id, sort_by_parameter_order=True),
+            [values for _, values in creates]
+        ).scalars().all()
+        for (result, values), new_id in zip(creates, new_ids):
+            result["id"] = new_id
+            values["id"] = new_id
+    if updates:
+        db.execute(update(model), [{"id": row_id, **values} for row_id, values in updates])
+    if deletes:
+        db.execute(delete(model).where(model.id.in_(deletes)))
+    
+    removed = [existing[row_id] for row_id, _ in updates] + [existing[row_id] for row_id in deletes]
+    added = [values for _, values in creates] + [{**existing[row_id], **values} for row_id, values in updates]
+    record_changes(removed, added)
+    db.commit()
+    
+    failed = sum(1 for result in results if result["status"] == "error")
+    return {"succeeded": len(results) - failed, "failed": failed, "results": results}
 
 
 # Transaction CRUD operations
+def apply_transaction_changes(db: Session, changes: List[Tuple[dict, int]]) -> None:
+    """Keep derived tables and cached analytics in step with signed transaction changes (caller commits)"""
+    ensure_categories(db, {values["category"] for values, sign in changes if sign > 0})
+    rollups.apply_transaction_deltas(db, changes)
+    statements.apply_statement_deltas(db, transaction_changes=changes)
+    record_transaction_changes(db, changes)
+    mark_months_changed(db, {values["date"].strftime('%Y-%m') for values, _ in changes})
+
+
 def create_transaction(db: Session, transaction: schemas.TransactionCreate) -> models.Transaction:
     """Create a new transaction"""
     db_transaction = models.Transaction(**transaction.dict())
     db.add(db_transaction)
+    apply_transaction_changes(db, [(rollups.transaction_values(db_transaction), 1)])
     db.commit()
     db.refresh(db_transaction)
     return db_transaction
 
 
+def apply_transaction_batch(db: Session, operations: List[schemas.TransactionBatchOperation]) -> Dict:
+    """Apply mixed create/update/delete transaction operations in one DB transaction"""
+    def record_changes(removed: List[Dict], added: List[Dict]) -> None:
+        added_ids = {row["id"] for row in added}
+        deleted_ids = [row["id"] for row in removed if row["id"] not in added_ids]
+        if deleted_ids:
+            # Match single deletes, which unlink any payment record created from the transaction
+            db.execute(
+                update(models.CreditCardPayment)
+                .where(models.CreditCardPayment.transaction_id.in_(deleted_ids))
+                .values(transaction_id=None)
+            )
+        apply_transaction_changes(db, [(row, -1) for row in removed] + [(row, 1) for row in added])
+    
+    ensure_categories(db, {operation.data.category for operation in operations if operation.data is not None})
+    return _apply_batch(db, models.Transaction, operations, record_changes)
+
+
 def get_transaction(db: Session, transaction_id: int) -> Optional[models.Transaction]:
     """Get a transaction by ID"""
     return db.query(models.Transaction).filter(models.Transaction.id == transaction_id).first()
 
 
-def get_all_transactions(db: Session, skip: int = 0, limit: int = 100) -> List[models.Transaction]:
-    """Get all transactions with pagination"""
-    return db.query(models.Transaction).offset(skip).limit(limit).all()
+def encode_cursor(position_date: date, row_id: int) -> str:
+    """Encode a (date, id) keyset position as an opaque cursor"""
+    raw = json.dumps([position_date.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
 
 
-def get_transactions_by_month(db: Session, year: int, month: int) -> List[models.Transaction]:
-    """Get transactions for a specific month"""
+def decode_cursor(cursor: str) -> Tuple[date, int]:
+    """Decode a cursor from encode_cursor. Raises ValueError if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position_date, row_id = json.loads(raw)
+        return date.fromisoformat(position_date), int(row_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def _keyset_page(query, date_column, id_column, cursor: Optional[str], limit: int) -> Tuple[list, Optional[str]]:
+    """Return one page in (date, id) descending order and the cursor for the next page"""
+    if cursor:
+        query = query.filter(tuple_(date_column, id_column) < decode_cursor(cursor))
+    rows = query.order_by(date_column.desc(), id_column.desc()).limit(limit + 1).all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, date_column.key), getattr(last, id_column.key))
+    return rows, next_cursor
+
+
+def get_all_transactions(db: Session, cursor: Optional[str] = None, limit: int = 100) -> Tuple[List[models.Transaction], Optional[str]]:
+    """Get one page of transactions, newest first, using keyset pagination"""
+    return _keyset_page(
+        db.query(models.Transaction),
+        models.Transaction.date,
+        models.Transaction.id,
+        cursor,
+        limit
+    )
+
+
+def _month_bounds(year: int, month: int) -> Tuple[date, date]:
+    """Get the first day of a month and the first day of the following month"""
     start_date = date(year, month, 1)
     if month == 12:
         end_date = date(year + 1, 1, 1)
     else:
         end_date = date(year, month + 1, 1)
+    return start_date, end_date
+
+
+def get_transactions_by_month(db: Session, year: int, month: int) -> List[models.Transaction]:
+    """Get transactions for a specific month in (date, id) order"""
+    start_date, end_date = _month_bounds(year, month)
     
     return db.query(models.Transaction).filter(
         models.Transaction.date >= start_date,
         models.Transaction.date < end_date
+    ).order_by(models.Transaction.date, models.Transaction.id).all()
+
+
+def get_monthly_totals(db: Session, year: int, month: int) -> List[Tuple[str, str, int]]:
+    """Get (type, category, total in minor units) rows for a month from the monthly rollups"""
+    return db.query(
+        models.MonthlyRollup.type,
+        models.MonthlyRollup.category,
+        minor_sum(models.MonthlyRollup.total_amount)
+    ).filter(
+        models.MonthlyRollup.year_month == f"{year}-{month:02d}"
+    ).group_by(
+        models.MonthlyRollup.type,
+        models.MonthlyRollup.category
+    ).all()
+
+
+def get_totals_by_month(db: Session, start_date: date, end_date: date) -> List[Tuple[str, str, str, int]]:
+    """Get (YYYY-MM, type, category, total in minor units) rows for the months in [start_date, end_date) from the monthly rollups"""
+    return db.query(
+        models.MonthlyRollup.year_month,
+        models.MonthlyRollup.type,
+        models.MonthlyRollup.category,
+        minor_sum(models.MonthlyRollup.total_amount)
+    ).filter(
+        models.MonthlyRollup.year_month >= start_date.strftime('%Y-%m'),
+        models.MonthlyRollup.year_month < end_date.strftime('%Y-%m')
+    ).group_by(
+        models.MonthlyRollup.year_month,
+        models.MonthlyRollup.type,
+        models.MonthlyRollup.category
     ).all()
 
 
 def get_transactions_by_date_range(db: Session, start_date: date, end_date: date) -> List[models.Transaction]:
-    """Get transactions within a date range"""
+    """Get transactions within a date range in (date, id) order"""
     return db.query(models.Transaction).filter(
         models.Transaction.date >= start_date,
         models.Transaction.date <= end_date
-    ).all()
+    ).order_by(models.Transaction.date, models.Transaction.id).all()
+
+
+def transactions_by_date_range_query(start_date: date, end_date: date, batch_size: int = 1000):
+    """Column select of the transactions within a date range in (date, id) order, fetched batch_size rows at a time"""
+    return select(
+        models.Transaction.id,
+        models.Transaction.date,
+        models.Transaction.amount,
+        models.Transaction.type,
+        models.Transaction.category,
+        models.Transaction.description,
+        models.Transaction.payment_method,
+        models.Transaction.credit_card_id,
+        models.Transaction.is_payment,
+        models.Transaction.created_at
+    ).where(
+        models.Transaction.date >= start_date,
+        models.Transaction.date <= end_date
+    ).order_by(
+        models.Transaction.date,
+        models.Transaction.id
+    ).execution_options(yield_per=batch_size)
+
+
+def iter_transactions_by_date_range(db: Session, start_date: date, end_date: date, batch_size: int = 1000) -> Iterator[list]:
+    """Yield transaction rows within a date range in (date, id) order, batch_size rows at a time"""
+    query = transactions_by_date_range_query(start_date, end_date, batch_size)
+    for partition in db.execute(query).mappings().partitions():
+        yield partition
 
 
 def update_transaction(db: Session, transaction_id: int, transaction_update: schemas.TransactionCreate) -> Optional[models.Transaction]:
     """Update a transaction"""
     db_transaction = get_transaction(db, transaction_id)
     if db_transaction:
+        old_values = rollups.transaction_values(db_transaction)
         for key, value in transaction_update.dict().items():
             setattr(db_transaction, key, value)
+        apply_transaction_changes(db, [
+            (old_values, -1),
+            (rollups.transaction_values(db_transaction), 1)
+        ])
         db.commit()
         db.refresh(db_transaction)
     return db_transaction
@@ -62,6 +271,7 @@ def delete_transaction(db: Session, transaction_id: int) -> bool:
     """Delete a transaction"""
     db_transaction = get_transaction(db, transaction_id)
     if db_transaction:
+        apply_transaction_changes(db, [(rollups.transaction_values(db_transaction), -1)])
         db.delete(db_transaction)
         db.commit()
         return True
@@ -83,17 +293,162 @@ def get_credit_card(db: Session, card_id: int) -> Optional[models.CreditCard]:
     return db.query(models.CreditCard).filter(models.CreditCard.id == card_id).first()
 
 
+def get_existing_credit_card_ids(db: Session, card_ids: Iterable[int]) -> Set[int]:
+    """Get which of the given credit card IDs exist, in one query"""
+    card_ids = set(card_ids)
+    if not card_ids:
+        return set()
+    return set(db.scalars(select(models.CreditCard.id).where(models.CreditCard.id.in_(card_ids))))
+
+
 def get_all_credit_cards(db: Session) -> List[models.CreditCard]:
     """Get all credit cards"""
     return db.query(models.CreditCard).all()
 
 
+def get_credit_card_counters(db: Session, card_ids: Optional[List[int]] = None) -> Dict[int, Dict]:
+    """
+    Get transaction and payment counters per card with two grouped queries.
+    Transaction counters come from the monthly rollups, so the cost grows with cards and months,
+    not with the number of transactions.
+    """
+    rollup = models.MonthlyRollup
+    transaction_query = db.query(
+        rollup.credit_card_id,
+        func.sum(rollup.transaction_count),
+        minor_sum(rollup.total_amount, rollup.type == "expense")
+    ).filter(rollup.credit_card_id.isnot(None))
+    payment = models.CreditCardPayment
+    payment_query = db.query(payment.credit_card_id, func.count(payment.id), minor_sum(payment.amount))
+    if card_ids is not None:
+        transaction_query = transaction_query.filter(rollup.credit_card_id.in_(card_ids))
+        payment_query = payment_query.filter(payment.credit_card_id.in_(card_ids))
+    
+    counters: Dict[int, Dict] = {}
+    for card_id, count, spent in transaction_query.group_by(rollup.credit_card_id):
+        counters.setdefault(card_id, {}).update(transaction_count=count, total_spent=from_minor(spent or 0))
+    for card_id, count, paid in payment_query.group_by(payment.credit_card_id):
+        counters.setdefault(card_id, {}).update(payment_count=count, total_paid=from_minor(paid or 0))
+    return counters
+
+
+def get_credit_card_summaries(db: Session, card_id: Optional[int] = None, expand: bool = False) -> List[Dict]:
+    """
+    Get credit cards with their counters, all cards or only card_id.
+    With expand, each card also carries its transactions and payments, loaded with one
+    selectinload query per relationship for all cards together.
+    """
+    query = db.query(models.CreditCard)
+    if card_id is not None:
+        query = query.filter(models.CreditCard.id == card_id)
+    if expand:
+        query = query.options(
+            selectinload(models.CreditCard.transactions),
+            selectinload(models.CreditCard.payments)
+        )
+    cards = query.all()
+    if not cards:
+        return []
+    
+    counters = get_credit_card_counters(db, [card.id for card in cards])
+    summaries = []
+    for card in cards:
+        summary = {column.key: getattr(card, column.key) for column in models.CreditCard.__table__.columns}
+        summary.update(transaction_count=0, total_spent=0.0, payment_count=0, total_paid=0.0)
+        summary.update(counters.get(card.id, {}))
+        if expand:
+            summary["transactions"] = card.transactions
+            summary["payments"] = card.payments
+        summaries.append(summary)
+    return summaries
+
+
+def get_credit_card_summary(db: Session, card_id: int, expand: bool = False) -> Optional[Dict]:
+    """Get one credit card with its counters, or None if it does not exist"""
+    summaries = get_credit_card_summaries(db, card_id=card_id, expand=expand)
+    return summaries[0] if summaries else None
+
+
+def get_credit_card_transactions(db: Session, card_id: int, cursor: Optional[str] = None, limit: int = 100) -> Tuple[List[models.Transaction], Optional[str]]:
+    """Get one page of a card's transactions, newest first, using keyset pagination"""
+    return _keyset_page(
+        db.query(models.Transaction).filter(models.Transaction.credit_card_id == card_id),
+        models.Transaction.date,
+        models.Transaction.id,
+        cursor,
+        limit
+    )
+
+
+def _statement_summary(statement: models.CardStatement, credit_limit: float) -> Dict:
+    """Statement row as a dict with utilization against the card's current limit"""
+    summary = {column.key: getattr(statement, column.key) for column in models.CardStatement.__table__.columns}
+    summary["category_totals"] = {category: from_minor(amount) for category, amount in statement.category_totals.items()}
+    summary["utilization_percent"] = round(statement.total_charges / credit_limit * 100, 2) if credit_limit > 0 else 0.0
+    return summary
+
+
+def get_card_statements(db: Session, card_id: int, limit: int = 12) -> Optional[List[Dict]]:
+    """Get a card's most recent statements, newest first, or None if the card does not exist"""
+    card = get_credit_card(db, card_id)
+    if not card:
+        return None
+    rows = db.query(models.CardStatement).filter(
+        models.CardStatement.credit_card_id == card_id
+    ).order_by(models.CardStatement.cycle_start.desc()).limit(limit).all()
+    return [_statement_summary(statement, card.credit_limit) for statement in rows]
+
+
+def get_current_card_statement(db: Session, card_id: int) -> Optional[Dict]:
+    """Get a card's statement for the current billing cycle (its dues), or None if the card does not exist"""
+    card = get_credit_card(db, card_id)
+    return _current_card_statement(db, card, date.today()) if card else None
+
+
+def get_current_card_statements(db: Session) -> List[Dict]:
+    """Get the current statement (dues) of every credit card"""
+    today = date.today()
+    return [_current_card_statement(db, card, today) for card in get_all_credit_cards(db)]
+
+
+def _current_card_statement(db: Session, card: models.CreditCard, on: date) -> Dict:
+    """
+    Get the statement of the billing cycle containing on.
+    A cycle without activity yet has no row; it is returned empty with the balance carried forward.
+    """
+    cycle_start, cycle_end = statements.statement_cycle(card.billing_cycle_start, on)
+    latest = db.query(models.CardStatement).filter(
+        models.CardStatement.credit_card_id == card.id,
+        models.CardStatement.cycle_start <= cycle_start
+    ).order_by(models.CardStatement.cycle_start.desc()).first()
+    if latest is not None and latest.cycle_start == cycle_start:
+        return _statement_summary(latest, card.credit_limit)
+    return {
+        "id": None,
+        "credit_card_id": card.id,
+        "cycle_start": cycle_start,
+        "cycle_end": cycle_end,
+        "total_charges": 0.0,
+        "charge_count": 0,
+        "total_payments": 0.0,
+        "payment_count": 0,
+        "balance": latest.balance if latest is not None else 0.0,
+        "category_totals": {},
+        "utilization_percent": 0.0,
+    }
+
+
 def update_credit_card(db: Session, card_id: int, card_update: schemas.CreditCardCreate) -> Optional[models.CreditCard]:
     """Update a credit card"""
     db_card = get_credit_card(db, card_id)
     if db_card:
+        old_cycle_start = db_card.billing_cycle_start
         for key, value in card_update.dict().items():
             setattr(db_card, key, value)
+        if db_card.billing_cycle_start != old_cycle_start:
+            # Statement boundaries moved; recompute this card's statements
+            db.flush()
+            statements.rebuild_card_statements(db, [card_id], commit=False)
         db.commit()
         db.refresh(db_card)
     return db_card
@@ -103,6 +458,7 @@ def delete_credit_card(db: Session, card_id: int) -> bool:
     """Delete a credit card"""
     db_card = get_credit_card(db, card_id)
     if db_card:
+        db.query(models.CardStatement).filter(models.CardStatement.credit_card_id == card_id).delete(synchronize_session=False)
         db.delete(db_card)
         db.commit()
         return True
@@ -120,7 +476,9 @@ def create_savings_investment(db: Session, investment: schemas.SavingsInvestment
         investment_data['last_recurring_date'] = date.today()
     
     db_investment = models.SavingsInvestment(**investment_data)
+    db_investment.next_due_date = investment_next_due_date(db_investment)
     db.add(db_investment)
+    regenerate_investment_schedule(db, [db_investment])
     db.commit()
     db.refresh(db_investment)
     return db_investment
@@ -143,6 +501,8 @@ def update_savings_investment(db: Session, investment_id: int, investment_update
         update_data = investment_update.dict()
         for key, value in update_data.items():
             setattr(db_investment, key, value)
+        db_investment.next_due_date = investment_next_due_date(db_investment)
+        regenerate_investment_schedule(db, [db_investment])
         db.commit()
         db.refresh(db_investment)
     return db_investment
@@ -152,54 +512,18 @@ def delete_savings_investment(db: Session, investment_id: int) -> bool:
     """Delete a savings investment"""
     db_investment = get_savings_investment(db, investment_id)
     if db_investment:
+        delete_investment_schedule(db, investment_id)
         db.delete(db_investment)
         db.commit()
         return True
     return False
 
 
-def process_recurring_investments(db: Session) -> int:
-    """Process recurring investments and update their current_value. Called daily."""
-    from datetime import date, timedelta
-    from dateutil.relativedelta import relativedelta
-    
-    today = date.today()
-    processed_count = 0
-    
-    recurring_investments = db.query(models.SavingsInvestment).filter(
-        models.SavingsInvestment.is_recurring == 1
-    ).all()
-    
-    for investment in recurring_investments:
-        if not investment.last_recurring_date:
-            investment.last_recurring_date = today
-            continue
-        
-        should_process = False
-        
-        if investment.recurring_type == 'monthly':
-            next_date = investment.last_recurring_date + relativedelta(months=1)
-            should_process = today >= next_date
-        elif investment.recurring_type == 'yearly':
-            next_date = investment.last_recurring_date + relativedelta(years=1)
-            should_process = today >= next_date
-        
-        if should_process and investment.recurring_amount:
-            # Add recurring amount to current value
-            investment.current_value += investment.recurring_amount
-            investment.last_recurring_date = today
-            processed_count += 1
-    
-    if processed_count > 0:
-        db.commit()
-    
-    return processed_count
-
-
 # Salary CRUD operations
 def create_salary(db: Session, salary: schemas.SalaryCreate) -> models.Salary:
     """Create a new salary entry"""
     db_salary = models.Salary(**salary.dict())
+    db_salary.next_due_date = salary_next_due_date(db_salary)
     db.add(db_salary)
     db.commit()
     db.refresh(db_salary)
@@ -225,9 +549,14 @@ def update_salary(db: Session, salary_id: int, salary_update: schemas.SalaryUpda
     """Update a salary"""
     db_salary = db.query(models.Salary).filter(models.Salary.id == salary_id).first()
     if db_salary:
+        was_active = db_salary.is_active
         update_data = salary_update.dict(exclude_unset=True)
         for field, value in update_data.items():
             setattr(db_salary, field, value)
+        if db_salary.is_active and not was_active:
+            # A reactivated salary is due from this month on, not for the months it was inactive
+            today = date.today()
+            db_salary.next_due_date = max(salary_next_due_date(db_salary), date(today.year, today.month, 1))
         db_salary.updated_at = datetime.now(timezone.utc)
         db.commit()
         db.refresh(db_salary)
@@ -244,58 +573,45 @@ def delete_salary(db: Session, salary_id: int) -> bool:
     return False
 
 
-def process_monthly_salaries(db: Session) -> int:
-    """Process monthly salary auto-entries on the 1st of each month"""
-    today = date.today()
-    
-    # Only process on the 1st of the month
-    if today.day != 1:
-        return 0
-    
-    processed_count = 0
-    active_salaries = get_active_salaries(db)
-    
-    for salary in active_salaries:
-        # Check if salary was already added today
-        if salary.last_added_date != today:
-            # Create an income transaction for the salary
-            transaction = models.Transaction(
-                date=today,
-                amount=salary.amount,
-                type="income",
-                category="Salary",
-                description=f"Monthly salary: {salary.name}",
-                payment_method="bank",
-                created_at=datetime.now(timezone.utc)
-            )
-            db.add(transaction)
-            salary.last_added_date = today
-            processed_count += 1
-    
-    if processed_count > 0:
-        db.commit()
-    
-    return processed_count
+# Credit Card Payment CRUD operations
+def apply_payment_changes(db: Session, changes: List[Tuple[dict, int]]) -> None:
+    """Keep card statements and cached analytics in step with signed payment changes (caller commits)"""
+    statements.apply_statement_deltas(db, payment_changes=changes)
+    mark_months_changed(db, {values["payment_date"].strftime('%Y-%m') for values, _ in changes})
 
 
-# Credit Card Payment CRUD operations
 def create_credit_card_payment(db: Session, payment: schemas.CreditCardPaymentCreate) -> models.CreditCardPayment:
     """Create a new credit card payment"""
     db_payment = models.CreditCardPayment(**payment.dict())
     db.add(db_payment)
+    apply_payment_changes(db, [(statements.payment_values(db_payment), 1)])
     db.commit()
     db.refresh(db_payment)
     return db_payment
 
 
+def apply_credit_card_payment_batch(db: Session, operations: List[schemas.CreditCardPaymentBatchOperation]) -> Dict:
+    """Apply mixed create/update/delete payment operations in one DB transaction"""
+    def record_changes(removed: List[Dict], added: List[Dict]) -> None:
+        apply_payment_changes(db, [(row, -1) for row in removed] + [(row, 1) for row in added])
+    
+    return _apply_batch(db, models.CreditCardPayment, operations, record_changes)
+
+
 def get_credit_card_payment(db: Session, payment_id: int) -> Optional[models.CreditCardPayment]:
     """Get a credit card payment by ID"""
     return db.query(models.CreditCardPayment).filter(models.CreditCardPayment.id == payment_id).first()
 
 
-def get_all_credit_card_payments(db: Session, skip: int = 0, limit: int = 100) -> List[models.CreditCardPayment]:
-    """Get all credit card payments with pagination"""
-    return db.query(models.CreditCardPayment).offset(skip).limit(limit).all()
+def get_all_credit_card_payments(db: Session, cursor: Optional[str] = None, limit: int = 100) -> Tuple[List[models.CreditCardPayment], Optional[str]]:
+    """Get one page of credit card payments, newest first, using keyset pagination"""
+    return _keyset_page(
+        db.query(models.CreditCardPayment),
+        models.CreditCardPayment.payment_date,
+        models.CreditCardPayment.id,
+        cursor,
+        limit
+    )
 
 
 def get_payments_by_card(db: Session, card_id: int, skip: int = 0, limit: int = 100) -> List[models.CreditCardPayment]:
@@ -317,8 +633,10 @@ def update_credit_card_payment(db: Session, payment_id: int, payment_update: sch
     """Update a credit card payment"""
     db_payment = get_credit_card_payment(db, payment_id)
     if db_payment:
+        old_values = statements.payment_values(db_payment)
         for key, value in payment_update.dict().items():
             setattr(db_payment, key, value)
+        apply_payment_changes(db, [(old_values, -1), (statements.payment_values(db_payment), 1)])
         db.commit()
         db.refresh(db_payment)
     return db_payment
@@ -328,6 +646,7 @@ def delete_credit_card_payment(db: Session, payment_id: int) -> bool:
     """Delete a credit card payment"""
     db_payment = get_credit_card_payment(db, payment_id)
     if db_payment:
+        apply_payment_changes(db, [(statements.payment_values(db_payment), -1)])
         db.delete(db_payment)
         db.commit()
         return True
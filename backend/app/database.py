@@ -1,9 +1,92 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlalchemy.orm import sessionmaker, declarative_base
+import json
 import os
 
-# Database URL - SQLite
-DATABASE_URL = "sqlite:///./finance.db"
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), '..', 'config.json')
+
+# Defaults for the "database" section of config.json
+DEFAULT_DATABASE_CONFIG = {
+    "url": "sqlite:///./finance.db",
+    "journal_mode": "WAL",  # readers no longer block behind commits
+    "synchronous": "NORMAL",  # safe with WAL, fsyncs only at checkpoints
+    "mmap_size": 268435456,  # bytes of the database file to memory-map (256 MiB)
+    "cache_size": -65536,  # negative = KiB of page cache per connection (64 MiB)
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,  # ms to wait for a lock before failing
+    "read_pool_size": 8,  # connections in the read-only pool used by analytics and listings
+    "read_max_overflow": 8,
+}
+
+# Environment variables override config.json, e.g. FINANCE_DB_JOURNAL_MODE=DELETE
+ENV_PREFIX = "FINANCE_DB_"
+
+
+def load_database_config() -> dict:
+    """Load database settings from defaults, config.json and FINANCE_DB_* environment variables"""
+    settings = dict(DEFAULT_DATABASE_CONFIG)
+    try:
+        with open(CONFIG_PATH) as f:
+            settings.update(json.load(f).get("database", {}))
+    except FileNotFoundError:
+        pass
+    for key in settings:
+        value = os.environ.get(ENV_PREFIX + key.upper())
+        if value is not None:
+            settings[key] = value
+    return settings
+
+
+def apply_sqlite_pragmas(dbapi_connection, settings: dict, read_only: bool = False) -> None:
+    """Apply the configured pragmas to a new SQLite connection"""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA busy_timeout = {int(settings['busy_timeout'])}")
+        if read_only:
+            # journal_mode is persistent in the file and is set by the writer connections
+            cursor.execute("PRAGMA query_only = ON")
+        else:
+            cursor.execute(f"PRAGMA journal_mode = {settings['journal_mode']}")
+            cursor.execute(f"PRAGMA synchronous = {settings['synchronous']}")
+        cursor.execute(f"PRAGMA mmap_size = {int(settings['mmap_size'])}")
+        cursor.execute(f"PRAGMA cache_size = {int(settings['cache_size'])}")
+        cursor.execute(f"PRAGMA temp_store = {settings['temp_store']}")
+    finally:
+        cursor.close()
+
+
+DATABASE_CONFIG = load_database_config()
+
+# Database URL - SQLite by default
+DATABASE_URL = DATABASE_CONFIG["url"]
+
+
+def _is_sqlite_file(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def _read_only_url(url, drivername: str) -> str:
+    """SQLite URI that opens the same database file with mode=ro"""
+    return f"{drivername}:///file:{url.database}?mode=ro&uri=true"
+
+
+def _configure_sqlite_engine(sync_engine, read_only: bool = False) -> None:
+    """Apply the configured pragmas to every new connection of a SQLite engine"""
+    @event.listens_for(sync_engine, "connect")
+    def _configure_sqlite_connection(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection, DATABASE_CONFIG, read_only=read_only)
+        if read_only:
+            # Let SQLAlchemy's "begin" below control transactions instead of the driver
+            dbapi_connection.isolation_level = None
+
+    if read_only:
+        @event.listens_for(sync_engine, "begin")
+        def _begin_read_snapshot(connection):
+            # An explicit BEGIN keeps one WAL snapshot for every query in the session
+            connection.exec_driver_sql("BEGIN")
+
 
 # Create engine
 engine = create_engine(
@@ -11,9 +94,59 @@ engine = create_engine(
     connect_args={"check_same_thread": False}
 )
 
+if engine.dialect.name == "sqlite":
+    _configure_sqlite_engine(engine)
+
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Read-only engine for analytics and listing endpoints, pooled separately from writes.
+# Only file-backed SQLite databases get one; otherwise reads share the main engine.
+if _is_sqlite_file(engine.url):
+    read_engine = create_engine(
+        _read_only_url(engine.url, "sqlite"),
+        connect_args={"check_same_thread": False},
+        pool_size=int(DATABASE_CONFIG["read_pool_size"]),
+        max_overflow=int(DATABASE_CONFIG["read_max_overflow"]),
+    )
+    _configure_sqlite_engine(read_engine, read_only=True)
+else:
+    read_engine = engine
+
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+# Async engines used by the API routers (aiosqlite driver for SQLite)
+if engine.dialect.name == "sqlite":
+    ASYNC_DATABASE_URL = engine.url.set(drivername="sqlite+aiosqlite")
+else:
+    ASYNC_DATABASE_URL = engine.url
+
+# The sync engine above stays for the code that runs outside the event loop: startup steps and
+# the scheduler (in worker threads), the CLI scripts and the sync crud functions. Two write pools
+# add no write concurrency: SQLite allows one writer per file at a time, so a writer from either
+# pool waits for the other on busy_timeout, as writers from two processes would.
+# Both async engines pool their connections; aiosqlite would otherwise default to NullPool
+# and open a new connection thread per request
+if _is_sqlite_file(engine.url):
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=AsyncAdaptedQueuePool)
+    async_read_engine = create_async_engine(
+        _read_only_url(engine.url, "sqlite+aiosqlite"),
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=int(DATABASE_CONFIG["read_pool_size"]),
+        max_overflow=int(DATABASE_CONFIG["read_max_overflow"]),
+    )
+    _configure_sqlite_engine(async_engine.sync_engine)
+    _configure_sqlite_engine(async_read_engine.sync_engine, read_only=True)
+else:
+    async_engine = create_async_engine(ASYNC_DATABASE_URL)
+    if async_engine.dialect.name == "sqlite":
+        _configure_sqlite_engine(async_engine.sync_engine)
+    async_read_engine = async_engine
+
+# expire_on_commit=False so returned objects can still be serialized after the session commits
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
+
 # Create base class for models
 Base = declarative_base()
 
@@ -24,3 +157,24 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Dependency to get a read-only DB session that sees one consistent snapshot
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# Dependency to get an async DB session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Dependency to get an async read-only DB session that sees one consistent snapshot
+async def get_async_read_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
@@ -1,51 +1,188 @@
+import asyncio
 import json
+import time
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import warnings
 warnings.filterwarnings("ignore")
 
-from backup_db import GDriveBackup
 from .database import engine, Base, SessionLocal
 from .routers import transactions, cards, analytics, savings, salary, payments, auth
-from .utils.auto_increment import run_startup_checks
+from .utils.auto_increment import ensure_due_dates, run_startup_checks
+from .utils.codes import category_lookup
+from .utils.columnar import columnar_store
+from .utils.rollups import ensure_monthly_rollups
+from .utils.investment_schedule import ensure_investment_schedule
+from .utils.migrations import migrate_column_storage
+from .utils.snapshots import ensure_daily_snapshot
+from .utils.statements import ensure_card_statements
 
-# Create all database tables
-Base.metadata.create_all(bind=engine)
+STARTED_AT = time.perf_counter()
 
-# Run startup checks for auto-increment entries
-db = SessionLocal()
-try:
-    startup_check_results = run_startup_checks(db)
+# How often the auto-increment scheduler looks for due salaries and recurring investments
+SCHEDULER_INTERVAL_SECONDS = 3600
+
+# Seconds spent in each startup step, filled in as the steps finish
+startup_timings = {}
+
+
+def _timed(step, function, *args):
+    """Run a startup step and record how long it took"""
+    began = time.perf_counter()
+    try:
+        return function(*args)
+    finally:
+        startup_timings[step] = round(time.perf_counter() - began, 3)
+
+
+def create_tables():
+    """Create all database tables and convert columns left in an older storage format"""
+    Base.metadata.create_all(bind=engine)
+    rebuilt = migrate_column_storage(engine)
+    if rebuilt:
+        print(f"✓ Converted tables to the current column storage: {', '.join(rebuilt)}")
+
+
+def build_derived_tables():
+    """
+    Build the derived tables missing from an existing database.
+    Each is only built while empty, so this runs before the first write could add a row to it.
+    """
+    db = SessionLocal()
+    try:
+        if _timed("monthly_rollups", ensure_monthly_rollups, db):
+            print("✓ Built monthly rollups from existing transactions")
+        if _timed("investment_schedule", ensure_investment_schedule, db):
+            print("✓ Built investment contribution schedule from existing investments")
+        if _timed("card_statements", ensure_card_statements, db):
+            print("✓ Built card statements from existing card transactions and payments")
+    finally:
+        db.close()
+
+
+def prepare_database():
+    """Run the startup checks for auto-increment entries and load the columnar analytics store"""
+    db = SessionLocal()
+    try:
+        if _timed("due_dates", ensure_due_dates, db):
+            print("✓ Scheduled next due dates for existing salaries and recurring investments")
+        startup_check_results = _timed("startup_checks", run_startup_checks, db)
+        print("\n" + "="*60)
+        print("AUTO-INCREMENT STARTUP CHECKS")
+        print("="*60)
+        print(f"✓ Salary entries: {startup_check_results['salaries']['message']}")
+        print(f"✓ Recurring investments: {startup_check_results['investments']['message']}")
+        print(f"✓ Total auto-entries processed: {startup_check_results['all_processed']}")
+        print("="*60 + "\n")
+        if columnar_store.enabled:
+            loaded = _timed("columnar_store", columnar_store.load, db)
+            if loaded >= 0:
+                print(f"✓ Loaded {loaded} transactions into the columnar analytics store")
+            else:
+                print("⚠ Warning: Columnar analytics store not loaded (writes kept interfering); using SQL analytics")
+    except Exception as e:
+        print(f"⚠ Warning: Startup checks encountered an error: {e}")
+    finally:
+        db.close()
+
+
+def run_scheduled_checks():
+    """Add the salary entries and recurring investment amounts that have come due"""
+    db = SessionLocal()
+    try:
+        results = run_startup_checks(db)
+        if results["all_processed"]:
+            print(f"✓ Scheduler: {results['salaries']['message']}; {results['investments']['message']}")
+    except Exception as e:
+        print(f"⚠ Warning: Scheduled auto-increment checks encountered an error: {e}")
+    finally:
+        db.close()
+
+
+async def run_scheduler():
+    """Run the auto-increment checks periodically while the app is up"""
+    while True:
+        await asyncio.sleep(SCHEDULER_INTERVAL_SECONDS)
+        await asyncio.to_thread(run_scheduled_checks)
+
+
+def take_snapshot():
+    """Take today's local snapshot if it is missing and prune old ones. Returns the latest snapshot path."""
+    try:
+        result = ensure_daily_snapshot()
+        if result["created"]:
+            print(f"✓ Local snapshot created: {result['created']}")
+        if result["deleted"]:
+            print(f"✓ Pruned {len(result['deleted'])} old local snapshots")
+        return result["latest"]
+    except Exception as e:
+        print(f"⚠ Warning: Local snapshot encountered an error: {e}")
+        return None
+
+
+def backup_to_drive(snapshot_path=None):
+    """Google Drive Backup on startup"""
+    try:
+        # Imported here so the Google client libraries never load unless a backup runs
+        from backup_db import GDriveBackup
+
+        with open('config.json') as f:
+            config = json.load(f)
+        print("\n" + "="*60)
+        google_drive_config = config.get("google_drive", {})
+        backup = GDriveBackup(google_drive_config)
+        # Backup only if 7+ days since last backup
+        backup.backup_local_db(google_drive_config.get("backup_file", './finance.db'), snapshot_path=snapshot_path)
+        print("="*60 + "\n")
+    except Exception as e:
+        print(f"⚠ Warning: Google Drive backup encountered an error: {e}")
+
+
+def print_startup_report():
+    """Print how long each startup step took"""
     print("\n" + "="*60)
-    print("AUTO-INCREMENT STARTUP CHECKS")
+    print("STARTUP TIMINGS")
     print("="*60)
-    print(f"✓ Salary entries: {startup_check_results['salaries']['message']}")
-    print(f"✓ Recurring investments: {startup_check_results['investments']['message']}")
-    print(f"✓ Total auto-entries processed: {startup_check_results['all_processed']}")
-    print("="*60 + "\n")
-except Exception as e:
-    print(f"⚠ Warning: Startup checks encountered an error: {e}")
-finally:
-    db.close()
-
-# Google Drive Backup on startup
-try:
-    with open('config.json') as f:
-        config = json.load(f)
-    print("\n" + "="*60)
-    google_drive_config = config.get("google_drive", {})
-    backup = GDriveBackup(google_drive_config)
-    # Backup only if 7+ days since last backup
-    backup.backup_local_db(google_drive_config.get("backup_file", './finance.db'))
+    for step, seconds in startup_timings.items():
+        print(f"  {step:<22} {seconds * 1000:>10.1f} ms")
     print("="*60 + "\n")
-except Exception as e:
-    print(f"⚠ Warning: Startup checks encountered an error: {e}")
+
+
+async def run_background_startup():
+    """Prepare the database, then snapshot and back it up, off the event loop while the API serves requests"""
+    await asyncio.to_thread(_timed, "prepare_database", prepare_database)
+    snapshot_path = await asyncio.to_thread(_timed, "snapshot", take_snapshot)
+    await asyncio.to_thread(_timed, "drive_backup", backup_to_drive, snapshot_path)
+    print_startup_report()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the tables and derived tables, start the slow startup work in the background and accept requests"""
+    # Tables must exist before the first request; this is a no-op on an existing database
+    await asyncio.to_thread(_timed, "create_tables", create_tables)
+    # Loaded here so category lookups in requests never query the database from the event loop
+    await asyncio.to_thread(_timed, "category_lookup", category_lookup.load)
+    # A write during startup would make a still-empty derived table look built and skip its backfill
+    await asyncio.to_thread(_timed, "derived_tables", build_derived_tables)
+    app.state.startup_task = asyncio.create_task(run_background_startup())
+    app.state.scheduler_task = asyncio.create_task(run_scheduler())
+    startup_timings["ready"] = round(time.perf_counter() - STARTED_AT, 3)
+    print(f"✓ API ready in {startup_timings['ready'] * 1000:.0f} ms (startup checks and backup continue in background)")
+    yield
+    app.state.scheduler_task.cancel()
+    if not app.state.startup_task.done():
+        # Skips the steps not started yet; a step already running finishes in its worker thread before exit
+        app.state.startup_task.cancel()
+
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Personal Finance Manager",
     description="A local-only web application to track income, expenses, and manage credit cards",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware to allow frontend requests
@@ -114,4 +251,9 @@ def read_root():
 @app.get("/health", tags=["Health"])
 def health_check():
     """Health check endpoint"""
-    return {"status": "healthy"}
+    startup_task = getattr(app.state, "startup_task", None)
+    return {
+        "status": "healthy",
+        "startup": "complete" if startup_task is None or startup_task.done() else "running",
+        "startup_timings": startup_timings
+    }
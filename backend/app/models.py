@@ -1,8 +1,10 @@
-from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Enum, Index, JSON
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
 from .database import Base
+from .utils.codes import CategoryName, CodedEnum
+from .utils.money import Money
 
 
 class TransactionType(str, enum.Enum):
@@ -17,16 +19,28 @@ class PaymentMethod(str, enum.Enum):
     BANK = "bank"
 
 
+# Stored as the member's position in the enum: only ever append new members
+TRANSACTION_TYPE = CodedEnum(TransactionType)
+PAYMENT_METHOD = CodedEnum(PaymentMethod)
+
+
+class Category(Base):
+    __tablename__ = "categories"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False, unique=True)
+
+
 class Transaction(Base):
     __tablename__ = "transactions"
 
     id = Column(Integer, primary_key=True, index=True)
     date = Column(Date, nullable=False)
-    amount = Column(Float, nullable=False)
-    type = Column(String, nullable=False)  # "income" or "expense"
-    category = Column(String, nullable=False)
+    amount = Column(Money, nullable=False)
+    type = Column(TRANSACTION_TYPE, nullable=False)  # "income" or "expense"
+    category = Column("category_id", CategoryName, ForeignKey("categories.id"), key="category", nullable=False)  # category name
     description = Column(String, nullable=True)
-    payment_method = Column(String, nullable=False)  # "cash", "card", "upi", "bank"
+    payment_method = Column(PAYMENT_METHOD, nullable=False)  # "cash", "card", "upi", "bank"
     credit_card_id = Column(Integer, ForeignKey("credit_cards.id"), nullable=True)
     is_payment = Column(Integer, default=0, nullable=False)  # 0=regular transaction, 1=credit card payment
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -35,6 +49,19 @@ class Transaction(Base):
     credit_card = relationship("CreditCard", back_populates="transactions")
     payment_record = relationship("CreditCardPayment", back_populates="transaction", uselist=False)
 
+    __table_args__ = (
+        # Month/range listings and income/expense totals
+        Index("ix_transactions_date_type", "date", "type"),
+        # Credit card billing-cycle queries
+        Index("ix_transactions_card_date", "credit_card_id", "date"),
+        # Covering index for per-category rollups (no table lookups needed)
+        Index("ix_transactions_type_date_category_amount", "type", "date", "category", "amount"),
+        # Keyset pagination in (date, id) order
+        Index("ix_transactions_date_id", "date", "id"),
+        TRANSACTION_TYPE.check("type", "transactions"),
+        PAYMENT_METHOD.check("payment_method", "transactions"),
+    )
+
 
 class CreditCard(Base):
     __tablename__ = "credit_cards"
@@ -45,7 +72,7 @@ class CreditCard(Base):
     billing_cycle_start = Column(Integer, nullable=False)  # day of month
     billing_cycle_end = Column(Integer, nullable=False)  # day of month
     due_date = Column(Integer, nullable=False)  # day of month
-    credit_limit = Column(Float, nullable=False)
+    credit_limit = Column(Money, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     # Relationships
@@ -59,7 +86,7 @@ class CreditCardPayment(Base):
     id = Column(Integer, primary_key=True, index=True)
     credit_card_id = Column(Integer, ForeignKey("credit_cards.id"), nullable=False)
     payment_date = Column(Date, nullable=False)
-    amount = Column(Float, nullable=False)
+    amount = Column(Money, nullable=False)
     payment_method = Column(String, nullable=False)  # "cash", "upi", "bank", "cheque"
     transaction_id = Column(Integer, ForeignKey("transactions.id"), nullable=True)  # Related transaction if created from transaction
     description = Column(String, nullable=True)
@@ -69,6 +96,13 @@ class CreditCardPayment(Base):
     credit_card = relationship("CreditCard", back_populates="payments")
     transaction = relationship("Transaction", back_populates="payment_record")
 
+    __table_args__ = (
+        # Keyset pagination in (payment_date, id) order
+        Index("ix_credit_card_payments_date_id", "payment_date", "id"),
+        # Per-card payment listings and counters
+        Index("ix_credit_card_payments_card_date", "credit_card_id", "payment_date"),
+    )
+
 
 class SavingsInvestment(Base):
     __tablename__ = "savings_investments"
@@ -77,27 +111,86 @@ class SavingsInvestment(Base):
     name = Column(String, nullable=False)  # e.g., "HDFC Mutual Fund", "ICICI Life Insurance"
     investment_type = Column(String, nullable=False)  # "mutual_fund", "life_insurance", "fixed_deposit", "stock", "crypto", "other"
     purchase_date = Column(Date, nullable=False)
-    initial_amount = Column(Float, nullable=False)  # Amount invested initially
-    current_value = Column(Float, nullable=False)  # Current value of investment
+    initial_amount = Column(Money, nullable=False)  # Amount invested initially
+    current_value = Column(Money, nullable=False)  # Current value of investment
     description = Column(String, nullable=True)
     # Recurring investment fields
     is_recurring = Column(Integer, default=0, nullable=False)  # 0=no, 1=yes
     recurring_type = Column(String, nullable=True)  # "monthly", "yearly", or None
-    recurring_amount = Column(Float, nullable=True)  # Amount to add each period
+    recurring_amount = Column(Money, nullable=True)  # Amount to add each period
     last_recurring_date = Column(Date, nullable=True)  # Last time recurring amount was added
+    next_due_date = Column(Date, nullable=True, index=True)  # Next date the recurring amount is due (None = not scheduled)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
 
+class InvestmentContribution(Base):
+    __tablename__ = "investment_contributions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    investment_id = Column(Integer, ForeignKey("savings_investments.id"), nullable=False, index=True)
+    start_month = Column(String, nullable=False)  # "YYYY-MM", first month the contribution applies to
+    end_month = Column(String, nullable=True)  # "YYYY-MM", last month it applies to (None = ongoing)
+    amount = Column(Money, nullable=False)  # Contribution amount for the period
+    months_spread = Column(Integer, default=1, nullable=False)  # 12 for yearly amounts spread over months
+
+    __table_args__ = (
+        Index("ix_investment_contributions_months", "start_month", "end_month"),
+    )
+
+
 class Salary(Base):
     __tablename__ = "salaries"
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)  # e.g., "Primary Salary", "Bonus Salary"
-    amount = Column(Float, nullable=False)  # Monthly salary amount
+    amount = Column(Money, nullable=False)  # Monthly salary amount
     start_date = Column(Date, nullable=False)  # Date when salary was initialized
     is_active = Column(Integer, default=1, nullable=False)  # 0=inactive, 1=active
     last_added_date = Column(Date, nullable=True)  # Last date salary was auto-added
+    next_due_date = Column(Date, nullable=True, index=True)  # Next date a salary entry is due
     description = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+class MonthlyRollup(Base):
+    __tablename__ = "monthly_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    year_month = Column(String, nullable=False)  # "YYYY-MM"
+    type = Column(TRANSACTION_TYPE, nullable=False)  # "income" or "expense"
+    category = Column("category_id", CategoryName, ForeignKey("categories.id"), key="category", nullable=False)  # category name
+    payment_method = Column(PAYMENT_METHOD, nullable=False)
+    credit_card_id = Column(Integer, nullable=True)
+    total_amount = Column(Money, default=0, nullable=False)  # Running sum of transaction amounts
+    transaction_count = Column(Integer, default=0, nullable=False)  # Running count of transactions
+
+    __table_args__ = (
+        Index(
+            "ix_monthly_rollups_key",
+            "year_month", "type", "category", "payment_method", "credit_card_id",
+            unique=True
+        ),
+        TRANSACTION_TYPE.check("type", "monthly_rollups"),
+        PAYMENT_METHOD.check("payment_method", "monthly_rollups"),
+    )
+
+
+class CardStatement(Base):
+    __tablename__ = "card_statements"
+
+    id = Column(Integer, primary_key=True, index=True)
+    credit_card_id = Column(Integer, ForeignKey("credit_cards.id"), nullable=False)
+    cycle_start = Column(Date, nullable=False)
+    cycle_end = Column(Date, nullable=False)  # Day before the next cycle starts
+    total_charges = Column(Money, default=0, nullable=False)  # Card expenses dated in the cycle
+    charge_count = Column(Integer, default=0, nullable=False)
+    total_payments = Column(Money, default=0, nullable=False)  # Card payments dated in the cycle
+    payment_count = Column(Integer, default=0, nullable=False)
+    balance = Column(Money, default=0, nullable=False)  # Outstanding at cycle end: all charges minus all payments so far
+    category_totals = Column(JSON, default=dict, nullable=False)  # {category: charges in the cycle, in minor units}
+
+    __table_args__ = (
+        Index("ix_card_statements_card_cycle", "credit_card_id", "cycle_start", unique=True),
+    )
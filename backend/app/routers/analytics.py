@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from datetime import datetime
-from .. import crud, schemas
-from ..database import get_db
+from datetime import datetime, timedelta
+from .. import schemas
+from ..database import get_async_read_db
+from ..utils.cache import analytics_cache, month_key
+from ..utils.columnar import columnar_store
 from ..utils.analytics import (
     calculate_monthly_summary,
     generate_insights,
@@ -18,12 +20,29 @@ YEAR_VALIDATION_ERROR = "Year must be between 1900 and 2100"
 router = APIRouter()
 
 
+async def _cached(db: AsyncSession, key: tuple, months: List[str], compute, *args):
+    """Return the cached result for key, running compute(session, *args) on the async session on a miss"""
+    return await db.run_sync(
+        lambda session: analytics_cache.get_or_compute(key, months, lambda: compute(session, *args))
+    )
+
+
+async def _cached_monthly_summary(db: AsyncSession, year: int, month: int) -> dict:
+    """Monthly summary shared by the monthly, insights and current-summary endpoints"""
+    return await _cached(db, ("monthly_summary", year, month), [month_key(year, month)],
+                         calculate_monthly_summary, year, month)
+
+
+def _year_months(year: int) -> List[str]:
+    return [month_key(year, month) for month in range(1, 13)]
+
+
 @router.get("/monthly/{year}/{month}", response_model=schemas.MonthlySummary)
-def get_monthly_analytics(
+async def get_monthly_analytics(
     year: int,
     month: int,
     include_investments: bool = Query(False),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get monthly analytics for a specific month"""
     if month < 1 or month > 12:
@@ -31,8 +50,7 @@ def get_monthly_analytics(
     if year < 1900 or year > 2100:
         raise HTTPException(status_code=400, detail="Year must be between 1910 and 2100")
     
-    transactions = crud.get_transactions_by_month(db, year, month)
-    summary = calculate_monthly_summary(transactions, db, year, month)
+    summary = await _cached_monthly_summary(db, year, month)
     
     # Convert top_categories list of dicts to list of CategoryExpense objects
     if include_investments:
@@ -51,15 +69,20 @@ def get_monthly_analytics(
 
 
 @router.get("/yearly/{year}", response_model=schemas.YearlySummary)
-def get_yearly_analytics(
+async def get_yearly_analytics(
     year: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get yearly analytics for a specific year"""
     if year < 1900 or year > 2100:
         raise HTTPException(status_code=400, detail=YEAR_VALIDATION_ERROR)
     
-    summary = get_yearly_summary(db, year)
+    summary = await _cached(
+        db,
+        ("yearly_summary", year),
+        _year_months(year),
+        get_yearly_summary, year
+    )
     
     return schemas.YearlySummary(
         year=summary["year"],
@@ -71,10 +94,10 @@ def get_yearly_analytics(
 
 
 @router.get("/insights/{year}/{month}", response_model=List[schemas.Insight])
-def get_insights(
+async def get_insights(
     year: int,
     month: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get insights and recommendations for a specific month"""
     if month < 1 or month > 12:
@@ -82,52 +105,67 @@ def get_insights(
     if year < 1900 or year > 2100:
         raise HTTPException(status_code=400, detail="Year must be between 1900 and 2100")
     
-    transactions = crud.get_transactions_by_month(db, year, month)
-    summary = calculate_monthly_summary(transactions, db, year, month)
+    summary = await _cached_monthly_summary(db, year, month)
     insights_list = generate_insights(summary)
     
     return [schemas.Insight(**insight) for insight in insights_list]
 
 
 @router.get("/trends/spending", response_model=List[dict])
-def get_spending_trends_endpoint(
+async def get_spending_trends_endpoint(
     year: int = Query(None),
     months: int = Query(6, ge=1, le=24),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get spending trends for a specific year or the last N months"""
     if year:
         # Get full year data if year is specified
-        trends = get_spending_trends_by_year(db, year)
+        trends = await _cached(
+            db,
+            ("spending_trends_by_year", year, datetime.now().month),
+            _year_months(year),
+            get_spending_trends_by_year, year
+        )
     else:
         # Get last N months if year is not specified
-        trends = get_spending_trends(db, months)
+        today = datetime.now().date()
+        trend_months = [today - timedelta(days=30 * i) for i in range(months)]
+        trends = await _cached(
+            db,
+            ("spending_trends", months, today),
+            [month_key(d.year, d.month) for d in trend_months],
+            get_spending_trends, months
+        )
     return trends
 
 
 @router.get("/categories/yearly/{year}", response_model=dict)
-def get_yearly_category_distribution_endpoint(
+async def get_yearly_category_distribution_endpoint(
     year: int,
     include_investments: bool = Query(True),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get yearly category distribution with option to include/exclude investments"""
     if year < 1900 or year > 2100:
         raise HTTPException(status_code=400, detail=YEAR_VALIDATION_ERROR)
     
-    distribution = get_yearly_category_distribution(db, year, include_investments)
+    distribution = await _cached(
+        db,
+        ("yearly_category_distribution", year, include_investments),
+        _year_months(year),
+        get_yearly_category_distribution, year, include_investments
+    )
     return distribution
 
 
 @router.get("/summary/current", response_model=schemas.Analytics)
-def get_current_summary(
+async def get_current_summary(
     include_investments: bool = Query(True),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get current month's analytics with insights"""
     now = datetime.now()
-    transactions = crud.get_transactions_by_month(db, now.year, now.month)
-    summary_data = calculate_monthly_summary(transactions, db, now.year, now.month)
+    summary_data = await _cached_monthly_summary(db, now.year, now.month)
     insights_data = generate_insights(summary_data)
     
     if include_investments:
@@ -150,3 +188,15 @@ def get_current_summary(
         monthly_summary=monthly_summary,
         insights=insights
     )
+
+
+@router.get("/cache/stats", response_model=dict)
+async def get_cache_stats():
+    """Get analytics cache hit, miss and eviction counters"""
+    return analytics_cache.stats()
+
+
+@router.get("/columnar/stats", response_model=dict)
+async def get_columnar_stats():
+    """Get the columnar analytics store status and size"""
+    return columnar_store.stats()
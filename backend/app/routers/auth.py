@@ -1,6 +1,7 @@
 import json
 import os
 from fastapi import APIRouter, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -29,7 +30,8 @@ def load_config():
 @router.post("/login", response_model=LoginResponse)
 async def login(request: LoginRequest):
     """Simple login endpoint that validates against config credentials"""
-    credentials = load_config()
+    # Read config.json in a worker thread so the event loop is not blocked on file I/O
+    credentials = await run_in_threadpool(load_config)
     
     if (request.username == credentials.get('username') and 
         request.password == credentials.get('password')):
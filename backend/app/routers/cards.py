@@ -1,72 +1,129 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from .. import crud, schemas
-from ..database import get_db
-from ..utils.analytics import calculate_credit_card_utilization
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from .. import async_crud, schemas
+from ..database import get_async_db, get_async_read_db
 
 router = APIRouter()
 
 
 @router.post("/", response_model=schemas.CreditCard)
-def create_credit_card(
+async def create_credit_card(
     card: schemas.CreditCardCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new credit card"""
-    return crud.create_credit_card(db, card)
+    return await async_crud.create_credit_card(db, card)
 
 
-@router.get("/", response_model=List[schemas.CreditCard])
-def get_credit_cards(db: Session = Depends(get_db)):
-    """Get all credit cards"""
-    return crud.get_all_credit_cards(db)
+@router.get("/utilization", response_model=List[dict])
+async def get_cards_utilization(db: AsyncSession = Depends(get_async_read_db)):
+    """Get current billing cycle utilization for every credit card in one request"""
+    return await async_crud.get_credit_cards_utilization(db)
 
 
-@router.get("/{card_id}", response_model=schemas.CreditCard)
-def get_credit_card(
+@router.get("/statements/current", response_model=List[schemas.CardStatement])
+async def get_current_statements(db: AsyncSession = Depends(get_async_read_db)):
+    """Get the current billing-cycle statement (dues) of every credit card"""
+    return await async_crud.get_current_card_statements(db)
+
+
+# Cards carry counters; transactions and payments are only included with ?expand=true
+@router.get("/", response_model=List[schemas.CreditCardExpanded], response_model_exclude_unset=True)
+async def get_credit_cards(
+    expand: bool = Query(False),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Get all credit cards with transaction and payment counters"""
+    return await async_crud.get_credit_card_summaries(db, expand=expand)
+
+
+@router.get("/{card_id}", response_model=schemas.CreditCardExpanded, response_model_exclude_unset=True)
+async def get_credit_card(
     card_id: int,
-    db: Session = Depends(get_db)
+    expand: bool = Query(False),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    """Get a specific credit card by ID"""
-    db_card = crud.get_credit_card(db, card_id)
+    """Get a specific credit card by ID with transaction and payment counters"""
+    db_card = await async_crud.get_credit_card_summary(db, card_id, expand=expand)
     if not db_card:
         raise HTTPException(status_code=404, detail="Credit card not found")
     return db_card
 
 
+@router.get("/{card_id}/transactions", response_model=schemas.TransactionPage)
+async def get_credit_card_transactions(
+    card_id: int,
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Get a card's transactions newest first, one page at a time (pass next_cursor back as cursor)"""
+    if not await async_crud.credit_card_exists(db, card_id):
+        raise HTTPException(status_code=404, detail="Credit card not found")
+    try:
+        items, next_cursor = await async_crud.get_credit_card_transactions(db, card_id, cursor=cursor, limit=limit)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return schemas.TransactionPage(items=items, next_cursor=next_cursor)
+
+
 @router.put("/{card_id}", response_model=schemas.CreditCard)
-def update_credit_card(
+async def update_credit_card(
     card_id: int,
     card_update: schemas.CreditCardCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a credit card"""
-    db_card = crud.update_credit_card(db, card_id, card_update)
-    if not db_card:
+    if not await async_crud.update_credit_card(db, card_id, card_update):
         raise HTTPException(status_code=404, detail="Credit card not found")
-    return db_card
+    return await async_crud.get_credit_card_summary(db, card_id)
 
 
 @router.delete("/{card_id}")
-def delete_credit_card(
+async def delete_credit_card(
     card_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a credit card"""
-    success = crud.delete_credit_card(db, card_id)
+    success = await async_crud.delete_credit_card(db, card_id)
     if not success:
         raise HTTPException(status_code=404, detail="Credit card not found")
     return {"message": "Credit card deleted successfully"}
 
 
 @router.get("/{card_id}/utilization", response_model=dict)
-def get_card_utilization(
+async def get_card_utilization(
     card_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get credit card utilization status"""
-    utilization = calculate_credit_card_utilization(db, card_id)
+    utilization = await async_crud.get_credit_card_utilization(db, card_id)
     if not utilization:
         raise HTTPException(status_code=404, detail="Credit card not found")
     return utilization
+
+
+@router.get("/{card_id}/statements", response_model=List[schemas.CardStatement])
+async def get_card_statements(
+    card_id: int,
+    limit: int = Query(12, ge=1, le=120),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Get a card's billing-cycle statements, newest first"""
+    card_statements = await async_crud.get_card_statements(db, card_id, limit=limit)
+    if card_statements is None:
+        raise HTTPException(status_code=404, detail="Credit card not found")
+    return card_statements
+
+
+@router.get("/{card_id}/statements/current", response_model=schemas.CardStatement)
+async def get_current_card_statement(
+    card_id: int,
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Get a card's statement for the current billing cycle, including the outstanding balance"""
+    statement = await async_crud.get_current_card_statement(db, card_id)
+    if statement is None:
+        raise HTTPException(status_code=404, detail="Credit card not found")
+    return statement
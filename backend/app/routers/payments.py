@@ -1,9 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date
 from typing import List, Optional
-from .. import crud, schemas
-from ..database import get_db
+from .. import async_crud, schemas
+from ..database import get_async_db, get_async_read_db
 
 router = APIRouter()
 
@@ -11,90 +11,107 @@ PAYMENT_NOT_FOUND = "Payment not found"
 
 
 @router.post("/", response_model=schemas.CreditCardPayment)
-def create_payment(
+async def create_payment(
     payment: schemas.CreditCardPaymentCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new credit card payment"""
     # Verify credit card exists
-    card = crud.get_credit_card(db, payment.credit_card_id)
-    if not card:
+    if not await async_crud.credit_card_exists(db, payment.credit_card_id):
         raise HTTPException(status_code=404, detail="Credit card not found")
     
-    return crud.create_credit_card_payment(db, payment)
+    return await async_crud.create_credit_card_payment(db, payment)
 
 
-@router.get("/", response_model=List[schemas.CreditCardPayment])
-def get_payments(
-    skip: int = Query(0, ge=0),
+@router.post("/batch", response_model=schemas.BatchResult)
+async def batch_payments(
+    batch: schemas.CreditCardPaymentBatchRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Apply many create/update/delete payment operations in one request and one DB transaction"""
+    # Verify referenced credit cards exist
+    card_ids = {op.data.credit_card_id for op in batch.operations if op.data is not None}
+    missing = sorted(card_ids - await async_crud.get_existing_credit_card_ids(db, card_ids))
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Credit card not found: {missing}")
+    
+    return await async_crud.apply_credit_card_payment_batch(db, batch.operations)
+
+
+@router.get("/", response_model=schemas.CreditCardPaymentPage)
+async def get_payments(
+    cursor: Optional[str] = Query(None),
     limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    """Get all credit card payments with pagination"""
-    return crud.get_all_credit_card_payments(db, skip=skip, limit=limit)
+    """Get credit card payments newest first, one page at a time (pass next_cursor back as cursor)"""
+    try:
+        items, next_cursor = await async_crud.get_all_credit_card_payments(db, cursor=cursor, limit=limit)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return schemas.CreditCardPaymentPage(items=items, next_cursor=next_cursor)
 
 
 @router.get("/card/{card_id}", response_model=List[schemas.CreditCardPayment])
-def get_card_payments(
+async def get_card_payments(
     card_id: int,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get all payments for a specific credit card"""
     # Verify credit card exists
-    card = crud.get_credit_card(db, card_id)
-    if not card:
+    if not await async_crud.credit_card_exists(db, card_id):
         raise HTTPException(status_code=404, detail="Credit card not found")
     
-    return crud.get_payments_by_card(db, card_id, skip=skip, limit=limit)
+    return await async_crud.get_payments_by_card(db, card_id, skip=skip, limit=limit)
 
 
 @router.get("/range/", response_model=List[schemas.CreditCardPayment])
-def get_payments_by_range(
+async def get_payments_by_range(
     start_date: date,
     end_date: date,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get credit card payments within a date range"""
     if start_date > end_date:
         raise HTTPException(status_code=400, detail="Start date must be before end date")
     
-    return crud.get_payments_by_date_range(db, start_date, end_date)
+    return await async_crud.get_payments_by_date_range(db, start_date, end_date)
 
 
 @router.get("/{payment_id}", response_model=schemas.CreditCardPayment)
-def get_payment(
+async def get_payment(
     payment_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific payment by ID"""
-    db_payment = crud.get_credit_card_payment(db, payment_id)
+    db_payment = await async_crud.get_credit_card_payment(db, payment_id)
     if not db_payment:
         raise HTTPException(status_code=404, detail=PAYMENT_NOT_FOUND)
     return db_payment
 
 
 @router.put("/{payment_id}", response_model=schemas.CreditCardPayment)
-def update_payment(
+async def update_payment(
     payment_id: int,
     payment_update: schemas.CreditCardPaymentCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a payment"""
-    db_payment = crud.update_credit_card_payment(db, payment_id, payment_update)
+    db_payment = await async_crud.update_credit_card_payment(db, payment_id, payment_update)
     if not db_payment:
         raise HTTPException(status_code=404, detail=PAYMENT_NOT_FOUND)
     return db_payment
 
 
 @router.delete("/{payment_id}")
-def delete_payment(
+async def delete_payment(
     payment_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a payment"""
-    success = crud.delete_credit_card_payment(db, payment_id)
+    success = await async_crud.delete_credit_card_payment(db, payment_id)
     if not success:
         raise HTTPException(status_code=404, detail=PAYMENT_NOT_FOUND)
     return {"message": "Payment deleted successfully"}
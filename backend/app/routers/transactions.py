@@ -1,37 +1,83 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+import io
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date
 from typing import List, Optional
-from .. import crud, schemas
-from ..database import get_db
+from .. import async_crud, schemas
+from ..database import get_async_db, get_async_read_db
+from ..utils.export import EXPORT_FORMATS, stream_transactions
+from ..utils.importer import import_transactions_in_new_session, parse_csv, parse_ofx
 
 router = APIRouter()
 
 
 @router.post("/", response_model=schemas.Transaction)
-def create_transaction(
+async def create_transaction(
     transaction: schemas.TransactionCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new transaction"""
-    return crud.create_transaction(db, transaction)
+    return await async_crud.create_transaction(db, transaction)
 
 
-@router.get("/", response_model=List[schemas.Transaction])
-def get_transactions(
-    skip: int = Query(0, ge=0),
+@router.post("/batch", response_model=schemas.BatchResult)
+async def batch_transactions(
+    batch: schemas.TransactionBatchRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Apply many create/update/delete operations in one request and one DB transaction"""
+    return await async_crud.apply_transaction_batch(db, batch.operations)
+
+
+@router.post("/import", response_model=schemas.ImportResult)
+async def import_statement(
+    file: UploadFile = File(...),
+    payment_method: str = Form("bank"),
+    credit_card_id: Optional[int] = Form(None),
+    category: Optional[str] = Form(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Import a CSV or OFX bank/card statement in bulk.
+    Rows without a payment method, card or category use the form defaults.
+    """
+    filename = (file.filename or "").lower()
+    if filename.endswith((".ofx", ".qfx")):
+        parser = parse_ofx
+    elif filename.endswith(".csv"):
+        parser = parse_csv
+    else:
+        raise HTTPException(status_code=400, detail="Statement must be a .csv or .ofx file")
+    
+    if credit_card_id is not None and not await async_crud.credit_card_exists(db, credit_card_id):
+        raise HTTPException(status_code=404, detail="Credit card not found")
+    
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", errors="replace", newline="")
+    defaults = {"payment_method": payment_method, "credit_card_id": credit_card_id, "category": category}
+    return await run_in_threadpool(import_transactions_in_new_session, parser(stream), defaults)
+
+
+@router.get("/", response_model=schemas.TransactionPage)
+async def get_transactions(
+    cursor: Optional[str] = Query(None),
     limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    """Get all transactions with pagination"""
-    return crud.get_all_transactions(db, skip=skip, limit=limit)
+    """Get transactions newest first, one page at a time (pass next_cursor back as cursor)"""
+    try:
+        items, next_cursor = await async_crud.get_all_transactions(db, cursor=cursor, limit=limit)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return schemas.TransactionPage(items=items, next_cursor=next_cursor)
 
 
 @router.get("/monthly/{year}/{month}", response_model=List[schemas.Transaction])
-def get_transactions_by_month(
+async def get_transactions_by_month(
     year: int,
     month: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get transactions for a specific month (YYYY/MM)"""
     if month < 1 or month > 12:
@@ -39,54 +85,72 @@ def get_transactions_by_month(
     if year < 1900 or year > 2100:
         raise HTTPException(status_code=400, detail="Year must be between 1900 and 2100")
     
-    return crud.get_transactions_by_month(db, year, month)
+    return await async_crud.get_transactions_by_month(db, year, month)
 
 
 @router.get("/range/", response_model=List[schemas.Transaction])
-def get_transactions_by_range(
+async def get_transactions_by_range(
     start_date: date,
     end_date: date,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Get transactions within a date range"""
     if start_date > end_date:
         raise HTTPException(status_code=400, detail="Start date must be before end date")
     
-    return crud.get_transactions_by_date_range(db, start_date, end_date)
+    return await async_crud.get_transactions_by_date_range(db, start_date, end_date)
+
+
+@router.get("/export")
+async def export_transactions(
+    start_date: date,
+    end_date: date,
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|csv)$")
+):
+    """Stream transactions within a date range as NDJSON or CSV"""
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="Start date must be before end date")
+    
+    filename = f"transactions_{start_date.isoformat()}_{end_date.isoformat()}.{export_format}"
+    return StreamingResponse(
+        stream_transactions(start_date, end_date, export_format),
+        media_type=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 
 @router.get("/{transaction_id}", response_model=schemas.Transaction)
-def get_transaction(
+async def get_transaction(
     transaction_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get a specific transaction by ID"""
-    db_transaction = crud.get_transaction(db, transaction_id)
+    db_transaction = await async_crud.get_transaction(db, transaction_id)
     if not db_transaction:
         raise HTTPException(status_code=404, detail="Transaction not found")
     return db_transaction
 
 
 @router.put("/{transaction_id}", response_model=schemas.Transaction)
-def update_transaction(
+async def update_transaction(
     transaction_id: int,
     transaction_update: schemas.TransactionCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update a transaction"""
-    db_transaction = crud.update_transaction(db, transaction_id, transaction_update)
+    db_transaction = await async_crud.update_transaction(db, transaction_id, transaction_update)
     if not db_transaction:
         raise HTTPException(status_code=404, detail="Transaction not found")
     return db_transaction
 
 
 @router.delete("/{transaction_id}")
-def delete_transaction(
+async def delete_transaction(
     transaction_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a transaction"""
-    success = crud.delete_transaction(db, transaction_id)
+    success = await async_crud.delete_transaction(db, transaction_id)
     if not success:
         raise HTTPException(status_code=404, detail="Transaction not found")
     return {"message": "Transaction deleted successfully"}
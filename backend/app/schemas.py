@@ -1,15 +1,19 @@
-from pydantic import BaseModel
+from pydantic import AfterValidator, BaseModel
 from datetime import date, datetime
-from typing import Optional, List
+from typing import Annotated, Dict, Literal, Optional, List
+from .utils.money import round_money
+
+# Amounts are stored as integer minor units; round inputs to that precision up front
+MoneyAmount = Annotated[float, AfterValidator(round_money)]
 
 
 class TransactionBase(BaseModel):
     date: date
-    amount: float
-    type: str  # "income" or "expense"
+    amount: MoneyAmount
+    type: Literal["income", "expense"]
     category: str
     description: Optional[str] = None
-    payment_method: str  # "cash", "card", "upi", "bank"
+    payment_method: Literal["cash", "card", "upi", "bank"]
     credit_card_id: Optional[int] = None
     is_payment: bool = False  # whether this is a credit card payment
 
@@ -26,13 +30,53 @@ class Transaction(TransactionBase):
         from_attributes = True
 
 
+class TransactionPage(BaseModel):
+    items: List[Transaction]
+    next_cursor: Optional[str] = None  # pass back as ?cursor= to get the next page
+
+
+class ImportRowError(BaseModel):
+    row: int  # CSV line number or OFX entry number
+    error: str
+
+
+class ImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: List[ImportRowError]
+
+
+class TransactionBatchOperation(BaseModel):
+    op: Literal["create", "update", "delete"]
+    id: Optional[int] = None  # required for update and delete
+    data: Optional[TransactionCreate] = None  # required for create and update
+
+
+class TransactionBatchRequest(BaseModel):
+    operations: List[TransactionBatchOperation]
+
+
+class BatchItemResult(BaseModel):
+    index: int  # position of the operation in the request
+    op: str
+    id: Optional[int] = None
+    status: str  # "created", "updated", "deleted" or "error"
+    error: Optional[str] = None
+
+
+class BatchResult(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BatchItemResult]
+
+
 class CreditCardBase(BaseModel):
     name: str
     bank_name: str
     billing_cycle_start: int
     billing_cycle_end: int
     due_date: int
-    credit_limit: float
+    credit_limit: MoneyAmount
 
 
 class CreditCardCreate(CreditCardBase):
@@ -42,7 +86,7 @@ class CreditCardCreate(CreditCardBase):
 class CreditCardPaymentBase(BaseModel):
     credit_card_id: int
     payment_date: date
-    amount: float
+    amount: MoneyAmount
     payment_method: str  # "cash", "upi", "bank", "cheque"
     transaction_id: Optional[int] = None
     description: Optional[str] = None
@@ -60,16 +104,53 @@ class CreditCardPayment(CreditCardPaymentBase):
         from_attributes = True
 
 
+class CreditCardPaymentBatchOperation(BaseModel):
+    op: Literal["create", "update", "delete"]
+    id: Optional[int] = None  # required for update and delete
+    data: Optional[CreditCardPaymentCreate] = None  # required for create and update
+
+
+class CreditCardPaymentBatchRequest(BaseModel):
+    operations: List[CreditCardPaymentBatchOperation]
+
+
+class CreditCardPaymentPage(BaseModel):
+    items: List[CreditCardPayment]
+    next_cursor: Optional[str] = None  # pass back as ?cursor= to get the next page
+
+
 class CreditCard(CreditCardBase):
     id: int
     created_at: datetime
-    transactions: List[Transaction] = []
-    payments: List[CreditCardPayment] = []
+    # Aggregated counters instead of the full history (see /api/cards/{id}/transactions)
+    transaction_count: int = 0
+    total_spent: float = 0.0
+    payment_count: int = 0
+    total_paid: float = 0.0
 
     class Config:
         from_attributes = True
 
 
+class CreditCardExpanded(CreditCard):
+    transactions: List[Transaction] = []
+    payments: List[CreditCardPayment] = []
+
+
+class CardStatement(BaseModel):
+    id: Optional[int] = None  # None for a current cycle with no activity yet
+    credit_card_id: int
+    cycle_start: date
+    cycle_end: date
+    total_charges: float
+    charge_count: int
+    total_payments: float
+    payment_count: int
+    balance: float  # outstanding at the end of the cycle
+    category_totals: Dict[str, float]
+    utilization_percent: float
+
+
 class CategoryExpense(BaseModel):
     name: str
     amount: float
@@ -101,12 +182,12 @@ class SavingsInvestmentBase(BaseModel):
     name: str
     investment_type: str  # "mutual_fund", "life_insurance", "fixed_deposit", "stock", "crypto", "other"
     purchase_date: date
-    initial_amount: float
-    current_value: float
+    initial_amount: MoneyAmount
+    current_value: MoneyAmount
     description: Optional[str] = None
     is_recurring: bool = False
     recurring_type: Optional[str] = None  # "monthly" or "yearly"
-    recurring_amount: Optional[float] = None
+    recurring_amount: Optional[MoneyAmount] = None
 
 
 class SavingsInvestmentCreate(SavingsInvestmentBase):
@@ -116,6 +197,7 @@ class SavingsInvestmentCreate(SavingsInvestmentBase):
 class SavingsInvestment(SavingsInvestmentBase):
     id: int
     last_recurring_date: Optional[date] = None
+    next_due_date: Optional[date] = None
     created_at: datetime
     updated_at: datetime
 
@@ -134,7 +216,7 @@ class SavingsComparison(BaseModel):
 
 class SalaryBase(BaseModel):
     name: str
-    amount: float
+    amount: MoneyAmount
     start_date: Optional[date] = None
     is_active: bool = True
     description: Optional[str] = None
@@ -146,7 +228,7 @@ class SalaryCreate(SalaryBase):
 
 class SalaryUpdate(BaseModel):
     name: Optional[str] = None
-    amount: Optional[float] = None
+    amount: Optional[MoneyAmount] = None
     is_active: Optional[bool] = None
     description: Optional[str] = None
 
@@ -154,6 +236,7 @@ class SalaryUpdate(BaseModel):
 class Salary(SalaryBase):
     id: int
     last_added_date: Optional[date] = None
+    next_due_date: Optional[date] = None
     created_at: datetime
     updated_at: datetime
 
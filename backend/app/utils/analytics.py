@@ -1,65 +1,104 @@
-from typing import List, Dict, Tuple, Union
+from calendar import monthrange
+from fractions import Fraction
+from typing import List, Dict, Optional, Tuple, Union
 from datetime import date
+from sqlalchemy import and_, func, or_, select
 from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select, operators
+from sqlalchemy.sql.expression import UnaryExpression
 from .. import models, crud
+from .columnar import columnar_store
+from .investment_schedule import get_investment_totals
+from .money import from_minor, minor_sum
 
 
-def calculate_monthly_summary(transactions: List[models.Transaction], db: Session = None, year: int = None, month: int = None) -> Dict:
-    """Calculate monthly analytics from transactions, subtracting investments from savings"""
-    income = sum(t.amount for t in transactions if t.type == "income")
-    expense = sum(t.amount for t in transactions if t.type == "expense")
-    
-    # Calculate investments for this month
-    investments_total = 0
-    if db and year and month:
-        # Get all savings/investments
-        all_investments = db.query(models.SavingsInvestment).all()
-        
-        for inv in all_investments:
-            # Only count investments that are relevant to this month/year
-            if inv.is_recurring:
-                # For monthly recurring investments, check if investment started before or during this month
-                if inv.recurring_type == "monthly":
-                    # Only count if investment was started before or during this month
-                    if inv.purchase_date.year < year or (inv.purchase_date.year == year and inv.purchase_date.month <= month):
-                        investments_total += inv.recurring_amount if inv.recurring_amount else 0
-                # For yearly recurring investments, check if it recurs in this year
-                elif inv.recurring_type == "yearly":
-                    # Check if the last_recurring_date or purchase_date falls in the target year
-                    last_date = inv.last_recurring_date or inv.purchase_date
-                    if last_date.year == year or (inv.purchase_date.year == year and last_date.year < year):
-                        # Calculate how many times this yearly investment occurs in the target month
-                        months_since_purchase = (year - inv.purchase_date.year) * 12 + (month - inv.purchase_date.month)
-                        if months_since_purchase >= 0:
-                            # For yearly recurring, only count once per year (as monthly equivalent)
-                            if last_date.year < year or (last_date.year == year and last_date.month <= month):
-                                investments_total += (inv.recurring_amount / 12) if inv.recurring_amount else 0
-            # For non-recurring investments, only count in the month they were purchased
-            elif inv.purchase_date.year == year and inv.purchase_date.month == month:
-                investments_total += inv.initial_amount
-    
-    # Calculate category distribution (expenses + investments)
-    category_map = {}
-    for t in transactions:
-        if t.type == "expense":
-            category_map[t.category] = category_map.get(t.category, 0) + t.amount
+def _monthly_totals(totals: List[Tuple[str, str, int]], investments_total: Fraction) -> Dict:
+    """Add up a month's (type, category, minor units) aggregate rows; every total stays in minor units"""
+    month_totals = {"income": 0, "expense": 0, "investments": investments_total, "categories": {}}
+    for txn_type, category, amount in totals:
+        if txn_type == "income":
+            month_totals["income"] += amount
+        elif txn_type == "expense":
+            month_totals["expense"] += amount
+            month_totals["categories"][category] = month_totals["categories"].get(category, 0) + amount
+    return month_totals
+
+
+def _top_categories(category_map: Dict[str, Fraction]) -> List[Dict]:
+    """Categories by amount (descending) as dictionaries for Pydantic, converted from minor units"""
+    return [
+        {"name": name, "amount": from_minor(amount)}
+        for name, amount in sorted(category_map.items(), key=lambda x: x[1], reverse=True)
+    ]
+
+
+def _build_monthly_summary(month_totals: Dict) -> Dict:
+    """Build the monthly summary from _monthly_totals, converting each figure from minor units once"""
+    income, expense, investments = month_totals["income"], month_totals["expense"], month_totals["investments"]
     
-    # Add investments as a category if there are any
-    if investments_total > 0:
-        category_map["Investments"] = round(investments_total, 2)
+    # Category distribution (expenses + investments as a category if there are any)
+    category_map = dict(month_totals["categories"])
+    if investments > 0:
+        category_map["Investments"] = investments
     
-    # Sort categories by amount (descending)
-    top_categories_tuples = sorted(category_map.items(), key=lambda x: x[1], reverse=True)
+    return {
+        "total_income": from_minor(income),
+        "total_expense": from_minor(expense),
+        "investments": from_minor(investments),
+        "savings": from_minor(income - expense - investments),
+        "top_categories": _top_categories(category_map)
+    }
+
+
+def calculate_monthly_summary(db: Session, year: int, month: int) -> Dict:
+    """Calculate monthly analytics from SQL aggregates, subtracting investments from savings"""
+    if columnar_store.loaded:
+        start_date = date(year, month, 1)
+        end_date = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+        totals = [row[1:] for row in columnar_store.totals_by_month(start_date, end_date)]
+    else:
+        totals = crud.get_monthly_totals(db, year, month)
+    investments_total = get_investment_totals(db, [(year, month)])[(year, month)]
+    return _build_monthly_summary(_monthly_totals(totals, investments_total))
+
+
+def _monthly_totals_by_month(db: Session, months: List[Tuple[int, int]]) -> Dict[Tuple[int, int], Dict]:
+    """
+    Get _monthly_totals for several (year, month) pairs at once.
+    Uses a single grouped query bucketed by month (or the columnar store when it is loaded)
+    and one investment schedule lookup, so the query count does not grow with the number of months.
+    """
+    if not months:
+        return {}
+    
+    first_year, first_month = min(months)
+    last_year, last_month = max(months)
+    start_date = date(first_year, first_month, 1)
+    end_date = date(last_year + 1, 1, 1) if last_month == 12 else date(last_year, last_month + 1, 1)
+    
+    totals_by_month = {key: [] for key in months}
+    if columnar_store.loaded:
+        rows = columnar_store.totals_by_month(start_date, end_date)
+    else:
+        rows = crud.get_totals_by_month(db, start_date, end_date)
+    for year_month, txn_type, category, amount in rows:
+        key = (int(year_month[:4]), int(year_month[5:7]))
+        if key in totals_by_month:
+            totals_by_month[key].append((txn_type, category, amount))
     
-    # Convert tuples to dictionaries for Pydantic compatibility
-    top_categories = [{"name": cat[0], "amount": round(cat[1], 2)} for cat in top_categories_tuples]
+    investment_totals = get_investment_totals(db, months)
     
     return {
-        "total_income": round(income, 2),
-        "total_expense": round(expense, 2),
-        "investments": round(investments_total, 2),
-        "savings": round(income - expense - investments_total, 2),
-        "top_categories": top_categories
+        (year, month): _monthly_totals(totals_by_month[(year, month)], investment_totals[(year, month)])
+        for year, month in months
+    }
+
+
+def calculate_monthly_summaries(db: Session, months: List[Tuple[int, int]]) -> Dict[Tuple[int, int], Dict]:
+    """Calculate monthly summaries for several (year, month) pairs at once"""
+    return {
+        key: _build_monthly_summary(month_totals)
+        for key, month_totals in _monthly_totals_by_month(db, months).items()
     }
 
 
@@ -122,20 +161,20 @@ def generate_insights(summary: Dict) -> List[Dict]:
 
 def get_yearly_summary(db: Session, year: int) -> Dict:
     """Calculate yearly summary with monthly breakdown"""
-    from datetime import datetime
-    
     yearly_income = 0
     yearly_expense = 0
     yearly_investments = 0
     monthly_breakdown = []
     
+    monthly_totals = _monthly_totals_by_month(db, [(year, month) for month in range(1, 13)])
+    
     for month in range(1, 13):
-        transactions = crud.get_transactions_by_month(db, year, month)
-        monthly_data = calculate_monthly_summary(transactions, db, year, month)
+        month_totals = monthly_totals[(year, month)]
+        monthly_data = _build_monthly_summary(month_totals)
         
-        yearly_income += monthly_data["total_income"]
-        yearly_expense += monthly_data["total_expense"]
-        yearly_investments += monthly_data["investments"]
+        yearly_income += month_totals["income"]
+        yearly_expense += month_totals["expense"]
+        yearly_investments += month_totals["investments"]
         
         monthly_breakdown.append({
             "month": f"{year}-{month:02d}",
@@ -147,10 +186,10 @@ def get_yearly_summary(db: Session, year: int) -> Dict:
     
     return {
         "year": year,
-        "total_income": round(yearly_income, 2),
-        "total_expense": round(yearly_expense, 2),
-        "investments": round(yearly_investments, 2),
-        "savings": round(yearly_income - yearly_expense - yearly_investments, 2),
+        "total_income": from_minor(yearly_income),
+        "total_expense": from_minor(yearly_expense),
+        "investments": from_minor(yearly_investments),
+        "savings": from_minor(yearly_income - yearly_expense - yearly_investments),
         "monthly_breakdown": monthly_breakdown
     }
 
@@ -160,35 +199,30 @@ def get_yearly_category_distribution(db: Session, year: int, include_investments
     category_map = {}
     yearly_investments = 0
     
+    monthly_totals = _monthly_totals_by_month(db, [(year, month) for month in range(1, 13)])
+    
     for month in range(1, 13):
-        transactions = crud.get_transactions_by_month(db, year, month)
-        monthly_data = calculate_monthly_summary(transactions, db, year, month)
+        month_totals = monthly_totals[(year, month)]
         
         # Aggregate category expenses
-        for category in monthly_data["top_categories"]:
-            if category["name"] != "Investments":
-                category_map[category["name"]] = category_map.get(category["name"], 0) + category["amount"]
+        for name, amount in month_totals["categories"].items():
+            if name != "Investments":
+                category_map[name] = category_map.get(name, 0) + amount
         
-        yearly_investments += monthly_data["investments"]
+        yearly_investments += month_totals["investments"]
+    
+    total_expense = sum(category_map.values())
     
     # Add investments as a category if included
     if include_investments and yearly_investments > 0:
         category_map["Investments"] = yearly_investments
     
-    # Sort categories by amount (descending)
-    top_categories_tuples = sorted(category_map.items(), key=lambda x: x[1], reverse=True)
-    
-    # Convert tuples to dictionaries
-    top_categories = [{"name": cat[0], "amount": round(cat[1], 2)} for cat in top_categories_tuples]
-    
-    total_expense = sum(cat["amount"] for cat in top_categories if cat["name"] != "Investments")
-    
     return {
         "year": year,
         "include_investments": include_investments,
-        "top_categories": top_categories,
-        "total_expense": round(total_expense, 2),
-        "total_investments": round(yearly_investments, 2)
+        "top_categories": _top_categories(category_map),
+        "total_expense": from_minor(total_expense),
+        "total_investments": from_minor(yearly_investments)
     }
 
 
@@ -199,10 +233,11 @@ def get_spending_trends(db: Session, months: int = 6) -> List[Dict]:
     trends = []
     current_date = datetime.now().date()
     
-    for i in range(months, 0, -1):
-        target_date = current_date - timedelta(days=30 * (i - 1))
-        transactions = crud.get_transactions_by_month(db, target_date.year, target_date.month)
-        summary = calculate_monthly_summary(transactions, db, target_date.year, target_date.month)
+    target_dates = [current_date - timedelta(days=30 * (i - 1)) for i in range(months, 0, -1)]
+    monthly_summaries = calculate_monthly_summaries(db, [(d.year, d.month) for d in target_dates])
+    
+    for target_date in target_dates:
+        summary = monthly_summaries[(target_date.year, target_date.month)]
         
         trends.append({
             "month": f"{target_date.year}-{target_date.month:02d}",
@@ -220,9 +255,10 @@ def get_spending_trends_by_year(db: Session, year: int) -> List[Dict]:
     trends = []
     current_month = date.today().month + 1 if date.today().year == year else 13
 
+    monthly_summaries = calculate_monthly_summaries(db, [(year, month) for month in range(1, current_month)])
+    
     for month in range(1, current_month):
-        transactions = crud.get_transactions_by_month(db, year, month)
-        summary = calculate_monthly_summary(transactions, db, year, month)
+        summary = monthly_summaries[(year, month)]
         
         trends.append({
             "month": f"{year}-{month:02d}",
@@ -235,84 +271,105 @@ def get_spending_trends_by_year(db: Session, year: int) -> List[Dict]:
     return trends
 
 
-def calculate_credit_card_utilization(db: Session, card_id: int) -> Union[Dict, None]:
-    """Calculate credit card utilization percentage"""
-    card = crud.get_credit_card(db, card_id)
-    if not card:
-        return None
-    
-    # Get transactions for current billing cycle
-    current_date = date.today()
-    year = current_date.year
-    month = current_date.month
+def _clamped_date(year: int, month: int, day: int) -> date:
+    """date(year, month, day) with day clamped to the length of the month"""
+    return date(year, month, min(day, monthrange(year, month)[1]))
+
+
+def _shift_month(year: int, month: int, offset: int) -> Tuple[int, int]:
+    index = year * 12 + month - 1 + offset
+    return index // 12, index % 12 + 1
+
+
+def _billing_cycle_window(card: models.CreditCard, current_date: date) -> Tuple[date, date]:
+    """Get the (start, end) dates of the card's billing cycle containing current_date"""
+    year, month = current_date.year, current_date.month
     
-    # Calculate billing cycle start and end dates
-    cycle_start = date(year, month, card.billing_cycle_start)
+    # Calculate billing cycle start
     if current_date.day < card.billing_cycle_start:
-        cycle_start = date(year, month - 1 if month > 1 else year - 1, 
-                          card.billing_cycle_start)
+        cycle_start = _clamped_date(*_shift_month(year, month, -1), card.billing_cycle_start)
+    else:
+        cycle_start = _clamped_date(year, month, card.billing_cycle_start)
     
     # Get end of cycle
-    if card.billing_cycle_end < card.billing_cycle_start:
+    if card.billing_cycle_end < card.billing_cycle_start and current_date.day >= card.billing_cycle_start:
         # Cycle spans two months
-        if current_date.day >= card.billing_cycle_start:
-            cycle_end = date(year, month + 1 if month < 12 else year + 1, 
-                            card.billing_cycle_end)
-        else:
-            cycle_end = date(year, month, card.billing_cycle_end)
+        cycle_end = _clamped_date(*_shift_month(year, month, 1), card.billing_cycle_end)
     else:
-        cycle_end = date(year, month, card.billing_cycle_end)
-    
-    # Get card transactions in this cycle
-    card_transactions = db.query(models.Transaction).filter(
-        models.Transaction.credit_card_id == card_id,
-        models.Transaction.date >= cycle_start,
-        models.Transaction.date <= cycle_end,
-        models.Transaction.type == "expense"
-    ).all()
+        cycle_end = _clamped_date(year, month, card.billing_cycle_end)
     
-    card_spent = sum(t.amount for t in card_transactions)
+    return cycle_start, cycle_end
+
+
+def _card_utilization(card: models.CreditCard, card_spent: float, current_date: date) -> Dict:
     utilization_percent = (card_spent / card.credit_limit) * 100 if card.credit_limit > 0 else 0
-    
     return {
-        "card_id": card_id,
+        "card_id": card.id,
         "card_name": card.name,
         "credit_limit": card.credit_limit,
-        "amount_spent": round(card_spent, 2),
+        "amount_spent": card_spent,
         "utilization_percent": round(utilization_percent, 2),
         "days_to_due": (card.due_date - current_date.day) % 30
     }
 
 
+def card_cycle_spend_query(windows: Dict[int, Tuple[date, date]]) -> Select:
+    """Expense totals per card over each card's (start, end) billing cycle, as one grouped query"""
+    t = models.Transaction
+    # Unary + keeps SQLite from using the type index, so each cycle is a range of ix_transactions_card_date
+    expense = UnaryExpression(t.type, operator=operators.custom_op("+"), type_=t.type.type) == "expense"
+    cycle_filters = [
+        and_(t.credit_card_id == card_id, t.date >= cycle_start, t.date <= cycle_end)
+        for card_id, (cycle_start, cycle_end) in windows.items()
+    ]
+    return select(t.credit_card_id, func.sum(t.amount)).where(
+        expense,
+        or_(*cycle_filters)
+    ).group_by(t.credit_card_id)
+
+
+def calculate_credit_cards_utilization(db: Session, card_id: Optional[int] = None) -> List[Dict]:
+    """
+    Calculate utilization for all credit cards, or only card_id.
+    Each card's current billing cycle is summed by a single query grouped by card.
+    """
+    query = db.query(models.CreditCard)
+    if card_id is not None:
+        query = query.filter(models.CreditCard.id == card_id)
+    cards = query.all()
+    if not cards:
+        return []
+    
+    current_date = date.today()
+    windows = {card.id: _billing_cycle_window(card, current_date) for card in cards}
+    spent = dict(db.execute(card_cycle_spend_query(windows)).all())
+    
+    return [_card_utilization(card, spent.get(card.id) or 0.0, current_date) for card in cards]
+
+
+def calculate_credit_card_utilization(db: Session, card_id: int) -> Union[Dict, None]:
+    """Calculate credit card utilization percentage"""
+    utilization = calculate_credit_cards_utilization(db, card_id)
+    return utilization[0] if utilization else None
+
+
 def calculate_savings_comparison(db: Session) -> Dict:
     """Calculate account savings vs investments comparison"""
     from datetime import datetime, timedelta
     
     now = datetime.now()
-    current_month_start = date(now.year, now.month, 1)
-    
-    # Calculate next month's first day correctly
-    if now.month == 12:
-        current_month_end = date(now.year + 1, 1, 1)
-    else:
-        current_month_end = date(now.year, now.month + 1, 1)
-    
-    current_month_transactions = db.query(models.Transaction).filter(
-        models.Transaction.date >= current_month_start,
-        models.Transaction.date < current_month_end
-    ).all()
+    month_totals = _monthly_totals(crud.get_monthly_totals(db, now.year, now.month), 0)
     
     # Calculate current month's account balance (savings)
-    income = sum(t.amount for t in current_month_transactions if t.type == "income")
-    expense = sum(t.amount for t in current_month_transactions if t.type == "expense")
-    account_balance = income - expense
-    
-    # Get all investments
-    all_investments = db.query(models.SavingsInvestment).all()
-    
-    # Calculate investment totals
-    total_invested = sum(inv.initial_amount for inv in all_investments)
-    total_current_investment_value = sum(inv.current_value for inv in all_investments)
+    account_balance = month_totals["income"] - month_totals["expense"]
+    
+    # Calculate investment totals over all investments
+    total_invested, total_current_investment_value = db.query(
+        minor_sum(models.SavingsInvestment.initial_amount),
+        minor_sum(models.SavingsInvestment.current_value)
+    ).one()
+    total_invested = total_invested or 0
+    total_current_investment_value = total_current_investment_value or 0
     investment_profit_loss = total_current_investment_value - total_invested
     
     # Calculate cash savings (account balance excluding invested amount)
@@ -322,11 +379,11 @@ def calculate_savings_comparison(db: Session) -> Dict:
     difference = account_balance - total_invested
     
     return {
-        "account_balance": round(account_balance, 2),
-        "total_invested": round(total_invested, 2),
-        "total_current_investment_value": round(total_current_investment_value, 2),
-        "investment_profit_loss": round(investment_profit_loss, 2),
-        "cash_savings": round(cash_savings, 2),
-        "difference": round(difference, 2)
+        "account_balance": from_minor(account_balance),
+        "total_invested": from_minor(total_invested),
+        "total_current_investment_value": from_minor(total_current_investment_value),
+        "investment_profit_loss": from_minor(investment_profit_loss),
+        "cash_savings": from_minor(cash_savings),
+        "difference": from_minor(difference)
     }
 
@@ -1,117 +1,156 @@
 """
 Auto-increment operations for salary and recurring investments
-Checks and processes auto-increment entries on app startup
+Salaries and recurring investments carry an indexed next_due_date, so each run loads only
+the rows that are due and catches up every period missed while the server was down:
+- Salaries: one income transaction per missed month, dated on its due date, inserted in one batch
+- Recurring investments: the recurring amount once per missed period
+Runs on app startup and periodically while the app is up.
 """
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 from datetime import date, timezone
-from dateutil.relativedelta import relativedelta
-from .. import models
+from typing import Optional
+from .. import models, crud
+from .codes import ensure_categories
+from .due_dates import (
+    RECURRING_PERIODS,
+    SALARY_PERIOD,
+    due_dates_through,
+    investment_next_due_date,
+    next_due_after,
+    salary_anchor,
+    salary_next_due_date
+)
+from .investment_schedule import regenerate_investment_schedule
 from datetime import datetime
 
 
-def process_auto_salary_entries(db: Session) -> dict:
+def ensure_due_dates(db: Session) -> int:
     """
-    Check if active salaries have been added for the current month.
-    If not, add them as income transactions.
-    
-    Returns:
-        dict: Status with 'processed_count' and 'message'
+    Fill in next_due_date for active salaries and recurring investments that have none
+    (rows from before the column existed). Returns the number of rows updated.
     """
     today = date.today()
+    salaries = db.query(models.Salary).filter(
+        models.Salary.is_active == 1,
+        models.Salary.next_due_date.is_(None)
+    ).all()
+    investments = db.query(models.SavingsInvestment).filter(
+        models.SavingsInvestment.is_recurring == 1,
+        models.SavingsInvestment.next_due_date.is_(None)
+    ).all()
+    salary_updates = [{"id": s.id, "next_due_date": salary_next_due_date(s, today)} for s in salaries]
+    investment_updates = []
+    for investment in investments:
+        next_due = investment_next_due_date(investment, today)
+        if next_due is not None:
+            investment_updates.append({"id": investment.id, "next_due_date": next_due})
+    db.bulk_update_mappings(models.Salary, salary_updates)
+    db.bulk_update_mappings(models.SavingsInvestment, investment_updates)
+    if salary_updates or investment_updates:
+        db.commit()
+    return len(salary_updates) + len(investment_updates)
+
+
+def process_auto_salary_entries(db: Session, today: Optional[date] = None) -> dict:
+    """
+    Add an income transaction for every month each active salary is due and has not been added.
+
+    Returns:
+        dict: Status with 'processed_count' (salaries), 'entries_added' (transactions) and 'message'
+    """
+    today = today or date.today()
     processed_count = 0
-    skipped_count = 0
-    
+
     try:
-        active_salaries = db.query(models.Salary).filter(
-            models.Salary.is_active == 1
+        due_salaries = db.query(models.Salary).filter(
+            models.Salary.is_active == 1,
+            models.Salary.next_due_date <= today
         ).all()
-        
-        for salary in active_salaries:
-            # Check if salary was already added this month
-            if salary.last_added_date is None or salary.last_added_date.month != today.month or salary.last_added_date.year != today.year:
-                # Create an income transaction for the salary
-                transaction = models.Transaction(
-                    date=today,
-                    amount=salary.amount,
-                    type="income",
-                    category="Salary",
-                    description=f"Monthly salary: {salary.name}",
-                    payment_method="bank",
-                    created_at=datetime.now(timezone.utc)
-                )
-                db.add(transaction)
-                salary.last_added_date = today
-                processed_count += 1
-            else:
-                skipped_count += 1
-        
-        if processed_count > 0:
+
+        entries = []
+        for salary in due_salaries:
+            due_dates = due_dates_through(salary_anchor(salary), salary.next_due_date, today, SALARY_PERIOD)
+            for due_date in due_dates:
+                entries.append({
+                    "date": due_date,
+                    "amount": salary.amount,
+                    "type": "income",
+                    "category": "Salary",
+                    "description": f"Monthly salary: {salary.name}",
+                    "payment_method": "bank",
+                    "credit_card_id": None,
+                    "created_at": datetime.now(timezone.utc)
+                })
+            salary.last_added_date = due_dates[-1]
+            salary.next_due_date = salary_next_due_date(salary)
+            processed_count += 1
+
+        if entries:
+            ensure_categories(db, {"Salary"})
+            db.execute(insert(models.Transaction), entries)
+            crud.apply_transaction_changes(db, [(entry, 1) for entry in entries])
             db.commit()
-        
+
         return {
             "processed_count": processed_count,
-            "skipped_count": skipped_count,
-            "message": f"Salary auto-entries: {processed_count} added, {skipped_count} already exist"
+            "entries_added": len(entries),
+            "message": f"Salary auto-entries: {len(entries)} added for {processed_count} due salaries"
         }
     except Exception as e:
+        db.rollback()
         return {
             "processed_count": 0,
+            "entries_added": 0,
             "error": str(e),
             "message": f"Error processing salary auto-entries: {str(e)}"
         }
 
 
-def process_auto_recurring_investments(db: Session) -> dict:
+def process_auto_recurring_investments(db: Session, today: Optional[date] = None) -> dict:
     """
-    Check if recurring investments are due and process them.
-    If last_recurring_date is not set or due date has passed, add the recurring amount.
-    
+    Add the recurring amount to every recurring investment once for each period that is due.
+
     Returns:
         dict: Status with 'processed_count' and 'message'
     """
-    today = date.today()
+    today = today or date.today()
     processed_count = 0
-    skipped_count = 0
-    
+    periods_added = 0
+    changed_investments = []
+
     try:
-        recurring_investments = db.query(models.SavingsInvestment).filter(
-            models.SavingsInvestment.is_recurring == 1
+        due_investments = db.query(models.SavingsInvestment).filter(
+            models.SavingsInvestment.is_recurring == 1,
+            models.SavingsInvestment.next_due_date <= today
         ).all()
-        
-        for investment in recurring_investments:
-            should_process = False
-            
-            # If last_recurring_date is not set, initialize it
-            if investment.last_recurring_date is None:
-                investment.last_recurring_date = today
-                investment.current_value += investment.recurring_amount if investment.recurring_amount else 0
-                processed_count += 1
+
+        for investment in due_investments:
+            period = RECURRING_PERIODS.get(investment.recurring_type)
+            if period is None or not investment.recurring_amount:
+                # No longer schedulable; drop it from the due index until it is updated
+                investment.next_due_date = None
                 continue
-            
-            # Check if due based on recurring type
-            if investment.recurring_type == 'monthly':
-                next_date = investment.last_recurring_date + relativedelta(months=1)
-                should_process = today >= next_date
-            elif investment.recurring_type == 'yearly':
-                next_date = investment.last_recurring_date + relativedelta(years=1)
-                should_process = today >= next_date
-            
-            if should_process and investment.recurring_amount:
-                investment.current_value += investment.recurring_amount
-                investment.last_recurring_date = today
-                processed_count += 1
-            else:
-                skipped_count += 1
-        
-        if processed_count > 0:
+
+            due_dates = due_dates_through(investment.purchase_date, investment.next_due_date, today, period)
+            investment.current_value += investment.recurring_amount * len(due_dates)
+            investment.last_recurring_date = due_dates[-1]
+            investment.next_due_date = next_due_after(investment.purchase_date, due_dates[-1], period)
+            changed_investments.append(investment)
+            processed_count += 1
+            periods_added += len(due_dates)
+
+        if due_investments:
+            regenerate_investment_schedule(db, changed_investments)
             db.commit()
-        
+
         return {
             "processed_count": processed_count,
-            "skipped_count": skipped_count,
-            "message": f"Recurring investments: {processed_count} processed, {skipped_count} not due"
+            "periods_added": periods_added,
+            "message": f"Recurring investments: {processed_count} processed, {periods_added} periods added"
         }
     except Exception as e:
+        db.rollback()
         return {
             "processed_count": 0,
             "error": str(e),
@@ -121,14 +160,14 @@ def process_auto_recurring_investments(db: Session) -> dict:
 
 def run_startup_checks(db: Session) -> dict:
     """
-    Run all auto-increment checks on app startup.
-    
+    Run all auto-increment checks on app startup and on each scheduler tick.
+
     Returns:
         dict: Combined status from all checks
     """
     salary_status = process_auto_salary_entries(db)
     investment_status = process_auto_recurring_investments(db)
-    
+
     return {
         "salaries": salary_status,
         "investments": investment_status,
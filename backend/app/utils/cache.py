@@ -0,0 +1,141 @@
+"""
+In-process cache for analytics results
+Entries are keyed by endpoint and period and remember which months (YYYY-MM) they were computed from.
+CRUD writes record the months they touch on the session; once the session commits,
+only the cached entries covering those months are dropped.
+Entries made only of closed past months never expire; entries touching the current
+or a future month also expire after a short TTL.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Set
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+ANALYTICS_CACHE_MAX_ENTRIES = 256
+OPEN_MONTH_TTL_SECONDS = 300
+
+_PENDING_MONTHS = "analytics_cache_months"
+_PENDING_FROM_MONTH = "analytics_cache_from_month"
+
+
+def month_key(year: int, month: int) -> str:
+    """Format a (year, month) pair the way the cache tracks months"""
+    return f"{year}-{month:02d}"
+
+
+class AnalyticsCache:
+    def __init__(self, max_entries: int = ANALYTICS_CACHE_MAX_ENTRIES, open_month_ttl: float = OPEN_MONTH_TTL_SECONDS):
+        """Initialize an empty LRU cache bounded to max_entries."""
+        self.max_entries = max_entries
+        self.open_month_ttl = open_month_ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped on every invalidation so results computed concurrently with a write are not stored
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get_or_compute(self, key: Hashable, months: Iterable[str], compute: Callable[[], Any]) -> Any:
+        """Return the cached value for key, or compute and store it"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, _, expires_at = entry
+                if expires_at is None or expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            version = self._version
+
+        value = compute()
+
+        months = frozenset(months)
+        current_month = month_key(date.today().year, date.today().month)
+        closed = all(month < current_month for month in months)
+        expires_at = None if closed else time.monotonic() + self.open_month_ttl
+
+        with self._lock:
+            if version == self._version:
+                self._entries[key] = (value, months, expires_at)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def invalidate_months(self, months: Iterable[str]) -> int:
+        """Drop entries computed from any of the given months. Returns the number dropped."""
+        months = set(months)
+        return self._invalidate(lambda entry_months: not entry_months.isdisjoint(months))
+
+    def invalidate_from(self, first_month: str) -> int:
+        """Drop entries computed from first_month or any later month. Returns the number dropped."""
+        return self._invalidate(lambda entry_months: any(month >= first_month for month in entry_months))
+
+    def clear(self) -> None:
+        """Drop every entry"""
+        self._invalidate(lambda entry_months: True)
+
+    def _invalidate(self, matches: Callable[[frozenset], bool]) -> int:
+        with self._lock:
+            self._version += 1
+            stale = [key for key, (_, months, _) in self._entries.items() if matches(months)]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+            return len(stale)
+
+    def stats(self) -> Dict:
+        """Return cache counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+analytics_cache = AnalyticsCache()
+
+
+def mark_months_changed(db: Session, months: Iterable[str]) -> None:
+    """Record months whose cached analytics must be dropped when this session commits"""
+    db.info.setdefault(_PENDING_MONTHS, set()).update(months)
+
+
+def mark_changed_from(db: Session, first_month: Optional[str]) -> None:
+    """Record that first_month and every later month change when this session commits"""
+    if first_month is None:
+        return
+    current = db.info.get(_PENDING_FROM_MONTH)
+    if current is None or first_month < current:
+        db.info[_PENDING_FROM_MONTH] = first_month
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_months(session: Session) -> None:
+    months: Set[str] = session.info.pop(_PENDING_MONTHS, set())
+    first_month = session.info.pop(_PENDING_FROM_MONTH, None)
+    if months:
+        analytics_cache.invalidate_months(months)
+    if first_month is not None:
+        analytics_cache.invalidate_from(first_month)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_months(session: Session) -> None:
+    session.info.pop(_PENDING_MONTHS, None)
+    session.info.pop(_PENDING_FROM_MONTH, None)
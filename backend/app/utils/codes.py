@@ -0,0 +1,227 @@
+"""
+Dictionary-encoded string columns
+Transaction types and payment methods are stored as small-integer codes: the position of the
+value in its enum in models.py (so new values must be appended at the end), kept in range by
+CHECK constraints. Categories live in the categories table and rows reference them by id.
+The column types translate in both directions, so queries, crud and the API keep using names
+while tables and indexes hold integers. Category names are resolved through an in-process
+lookup of the committed categories table, plus the categories the session of the current
+thread or task has added but not committed yet. The API loads the lookup at startup so the
+type's bind and result processors never query the database while serving requests.
+"""
+import threading
+from contextvars import ContextVar
+from typing import Dict, Iterable, Optional
+from sqlalchemy import CheckConstraint, Integer, SmallInteger, event, insert, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+from sqlalchemy.types import TypeDecorator
+from ..database import engine
+
+_PENDING_CATEGORIES = "pending_categories"
+
+# {name: id} of the categories added by the session working in this thread or task, until it commits
+_pending_categories: ContextVar[Optional[Dict[str, int]]] = ContextVar(_PENDING_CATEGORIES, default=None)
+
+_INTEGER_TYPES = ("INTEGER", "SMALLINT")
+
+
+class CodedEnum(TypeDecorator):
+    """A str enum value in Python, its SMALLINT position in the enum in the database"""
+    impl = SmallInteger
+    cache_ok = True
+
+    def __init__(self, enum_class):
+        super().__init__()
+        self.enum_class = enum_class
+        self.values = tuple(member.value for member in enum_class)
+        self._codes = {value: code for code, value in enumerate(self.values)}
+
+    def code(self, value) -> int:
+        """Get the stored code of an enum value or name"""
+        code = self._codes.get(getattr(value, "value", value))
+        if code is None:
+            raise ValueError(f"Invalid {self.enum_class.__name__}: {value!r}; expected one of {', '.join(self.values)}")
+        return code
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else self.code(value)
+
+    def process_literal_param(self, value, dialect):
+        return str(self.code(value))
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else self.values[value]
+
+    def check(self, column_name: str, table_name: str) -> CheckConstraint:
+        """CHECK constraint keeping column_name to the codes of this enum"""
+        return CheckConstraint(
+            f"{column_name} BETWEEN 0 AND {len(self.values) - 1}",
+            name=f"ck_{table_name}_{column_name}"
+        )
+
+    def legacy_expression(self, connection, table_name: str, column_name: str, declared: dict) -> Optional[str]:
+        """SQL converting a column of names to codes (see migrations.py); rejects names outside the enum"""
+        if declared.get(column_name, "INTEGER") in _INTEGER_TYPES:
+            return None
+        allowed = ", ".join(f"'{value}'" for value in self.values)
+        invalid = connection.execute(text(
+            f'SELECT DISTINCT "{column_name}" FROM "{table_name}" WHERE "{column_name}" NOT IN ({allowed})'
+        )).scalars().all()
+        if invalid:
+            raise ValueError(
+                f"{table_name}.{column_name} has values outside {self.enum_class.__name__}: {invalid!r}. "
+                f"Update those rows to one of {allowed} and run the migration again."
+            )
+        cases = " ".join(f"WHEN '{value}' THEN {code}" for code, value in enumerate(self.values))
+        return f'CASE "{column_name}" {cases} END'
+
+
+class CategoryLookup:
+    """
+    In-process {name: id} map of the committed categories table.
+    It is loaded once (at startup by the API, on first use by scripts) and then kept current
+    from ensure_categories and the after_commit hook, so lookups never query the database:
+    a name missing from it is not a category.
+    """
+    def __init__(self, bind: Engine = engine):
+        """Initialize an empty lookup; it loads from the categories table of bind on first use."""
+        self.bind = bind
+        self._lock = threading.Lock()
+        self._ids: Dict[str, int] = {}
+        self._names: Dict[int, str] = {}
+        self._loaded = False
+
+    def use_engine(self, bind: Engine) -> None:
+        """Read categories from another database (e.g. a scratch benchmark database)"""
+        self.bind = bind
+        self.clear()
+
+    def load(self, connection: Optional[Connection] = None) -> int:
+        """(Re)load every committed category, through connection or a new connection of bind; returns the count"""
+        if connection is None:
+            with self.bind.connect() as connection:
+                return self.load(connection)
+        rows = connection.execute(text("SELECT id, name FROM categories")).all()
+        with self._lock:
+            self._ids = {name: category_id for category_id, name in rows}
+            self._names = {category_id: name for category_id, name in rows}
+            self._loaded = True
+        return len(rows)
+
+    def ids_for(self, names: Iterable[str]) -> Dict[str, Optional[int]]:
+        """Get {name: id or None}, including the categories pending in this thread or task"""
+        if not self._loaded:
+            self.load()
+        pending = _pending_categories.get() or {}
+        return {name: self._ids.get(name, pending.get(name)) for name in set(names)}
+
+    def id_for(self, name: str) -> Optional[int]:
+        """Get the id of a category name, or None if there is no such category"""
+        return self.ids_for([name])[name]
+
+    def name_for(self, category_id: int) -> str:
+        """Get the name of a category id"""
+        if not self._loaded:
+            self.load()
+        name = self._names.get(category_id)
+        if name is None:
+            pending = _pending_categories.get() or {}
+            name = next((name for name, pending_id in pending.items() if pending_id == category_id), None)
+        if name is None:
+            # Only a row written by another process can reference a category this process never saw
+            self.load()
+            name = self._names[category_id]
+        return name
+
+    def add(self, names: Dict[str, int]) -> None:
+        """Cache committed {name: id} pairs"""
+        with self._lock:
+            self._ids.update(names)
+            self._names.update((category_id, name) for name, category_id in names.items())
+
+    def clear(self) -> None:
+        """Drop every cached name; the next lookup reloads the table"""
+        with self._lock:
+            self._ids, self._names, self._loaded = {}, {}, False
+
+
+category_lookup = CategoryLookup()
+
+
+class CategoryName(TypeDecorator):
+    """A category name in Python, the categories.id it refers to in the database"""
+    impl = Integer
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, int):
+            return value
+        category_id = category_lookup.id_for(value)
+        if category_id is None:
+            raise LookupError(f"Unknown category {value!r}; add it with ensure_categories() before writing rows")
+        return category_id
+
+    def process_literal_param(self, value, dialect):
+        return str(self.process_bind_param(value, dialect))
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else category_lookup.name_for(value)
+
+    def legacy_expression(self, connection, table_name: str, column_name: str, declared: dict) -> Optional[str]:
+        """SQL replacing a category name column with the id of its categories row (see migrations.py)"""
+        legacy_column = column_name[:-len("_id")]
+        if column_name in declared or legacy_column not in declared:
+            return None
+        connection.execute(text(
+            f'INSERT OR IGNORE INTO categories (name) SELECT DISTINCT "{legacy_column}" FROM "{table_name}"'
+        ))
+        category_lookup.clear()
+        return f'(SELECT categories.id FROM categories WHERE categories.name = "{table_name}"."{legacy_column}")'
+
+
+def ensure_categories(db: Session, names: Iterable[str]) -> Dict[str, int]:
+    """
+    Add any categories missing from the categories table within the caller's DB transaction
+    and return {name: id}. Call before writing rows that reference new category names.
+    The new ids are only visible to this thread or task until the session commits.
+    """
+    from ..models import Category
+
+    ids = category_lookup.ids_for(names)
+    missing = sorted(name for name, category_id in ids.items() if category_id is None)
+    if missing:
+        with db.no_autoflush:
+            # Another process may have added some of them since the lookup was loaded
+            committed = dict(db.execute(select(Category.name, Category.id).where(Category.name.in_(missing))).all())
+            category_lookup.add(committed)
+            ids.update(committed)
+            missing = [name for name in missing if name not in committed]
+            if missing:
+                pending = db.info.setdefault(_PENDING_CATEGORIES, {})
+                _pending_categories.set(pending)
+                for name in missing:
+                    category_id = db.execute(insert(Category).values(name=name).returning(Category.id)).scalar_one()
+                    pending[name] = category_id
+                    ids[name] = category_id
+    return ids
+
+
+def _end_pending(session: Session) -> Dict[str, int]:
+    pending = session.info.pop(_PENDING_CATEGORIES, {})
+    if _pending_categories.get() is pending:
+        _pending_categories.set(None)
+    return pending
+
+
+@event.listens_for(Session, "after_commit")
+def _keep_committed_categories(session: Session) -> None:
+    pending = _end_pending(session)
+    if pending:
+        category_lookup.add(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_categories(session: Session) -> None:
+    # Their ids were never committed and may be reused
+    _end_pending(session).clear()
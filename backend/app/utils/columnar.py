@@ -0,0 +1,316 @@
+"""
+Columnar in-memory store of transactions for analytics
+An optional backend for the monthly summaries behind the monthly, yearly and trend analytics.
+Transactions are held in NumPy columns: date ordinals, month numbers, int64 amounts in minor
+units, the type and payment-method codes and category ids stored in the database (see codes.py),
+and card IDs. Totals for a range of months are a searchsorted slice plus one bincount, instead
+of a grouped SQL query.
+
+The store is loaded once on startup and then fed the same signed changes as the monthly rollups:
+crud records them on the session and they are appended when the session commits. Updates and
+deletes append the old values with a negative sign, so sums stay exact without rewriting rows.
+Amounts are summed as integers, so results match the SQL path exactly.
+
+Enable with "columnar": true in the "analytics" section of config.json (requires numpy).
+Without it, or until the store has loaded, analytics read the monthly rollups as before.
+
+Usage (from the backend directory):
+    python -m app.utils.columnar verify
+"""
+import json
+import sys
+import threading
+import time
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import Integer, String, event, select, type_coerce
+from sqlalchemy.orm import Session
+from .. import models
+from ..database import CONFIG_PATH
+from .codes import category_lookup
+from .money import to_minor
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency; analytics fall back to the monthly rollups
+    np = None
+
+# Defaults for the "analytics" section of config.json
+DEFAULT_ANALYTICS_CONFIG = {
+    "columnar": False,  # keep transactions in NumPy columns for the monthly summaries
+}
+
+TAIL_MERGE_ROWS = 4096  # committed changes buffered before they are merged into the sorted columns
+LOAD_ATTEMPTS = 3
+NO_CARD = -1
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+_PENDING_CHANGES = "columnar_changes"
+_COMMIT_IN_FLIGHT = "columnar_commit_in_flight"
+
+COLUMN_TYPES = {
+    "day": "int32",  # date.toordinal()
+    "month": "int32",  # year * 12 + month - 1; the columns are kept sorted by it
+    "amount": "int64",  # signed minor units
+    "sign": "int8",  # +1 for an added row, -1 for a removed one
+    "type": "int16",
+    "category": "int32",
+    "payment_method": "int16",
+    "card": "int32",  # credit_card_id, or NO_CARD
+}
+
+
+def load_analytics_config() -> dict:
+    """Load analytics settings from defaults and the "analytics" section of config.json"""
+    settings = dict(DEFAULT_ANALYTICS_CONFIG)
+    try:
+        with open(CONFIG_PATH) as f:
+            settings.update(json.load(f).get("analytics", {}))
+    except FileNotFoundError:
+        pass
+    return settings
+
+
+def _month_number(value: date) -> int:
+    return value.year * 12 + value.month - 1
+
+
+def _month_string(month_number: int) -> str:
+    return f"{month_number // 12}-{month_number % 12 + 1:02d}"
+
+
+class ColumnarStore:
+    def __init__(self):
+        """Initialize an empty, unloaded store."""
+        self.enabled = np is not None and bool(load_analytics_config()["columnar"])
+        self.loaded = False
+        self._lock = threading.Lock()
+        self._columns: Optional[Dict[str, "np.ndarray"]] = None
+        self._tail: List[Tuple] = []
+        # Commits carrying transaction changes; a load is only kept if none started while it ran
+        self._commits_started = 0
+        self._commits_finished = 0
+
+    def load(self, db: Session) -> int:
+        """Load every transaction from the database. Returns the number of rows loaded (-1 if writes kept interfering)."""
+        if not self.enabled:
+            return 0
+        t = models.Transaction
+        # Read the stored integers directly rather than the names the column types translate to
+        query = select(
+            type_coerce(t.date, String),
+            type_coerce(t.amount, Integer),
+            type_coerce(t.type, Integer),
+            type_coerce(t.category, Integer),
+            type_coerce(t.payment_method, Integer),
+            t.credit_card_id
+        ).order_by(t.date)
+        for _ in range(LOAD_ATTEMPTS):
+            with self._lock:
+                if self._commits_started != self._commits_finished:
+                    started = None
+                else:
+                    started = self._commits_started
+            if started is None:
+                time.sleep(0.05)
+                continue
+            rows = db.execute(query).all()
+            db.rollback()  # end the read so later loads see new commits
+            with self._lock:
+                if self._commits_started != started:
+                    continue
+                self._columns = self._build_columns(rows)
+                self._tail = []
+                self.loaded = True
+                return len(rows)
+        return -1
+
+    def reset(self) -> None:
+        """Forget the loaded rows, e.g. after the database file was replaced; analytics fall back to SQL"""
+        with self._lock:
+            self.loaded = False
+            self._columns = None
+            self._tail = []
+
+    def _build_columns(self, rows: List[Tuple]) -> Dict[str, "np.ndarray"]:
+        if not rows:
+            return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMN_TYPES.items()}
+        dates, amounts, types, categories, payment_methods, cards = zip(*rows)
+        days = np.array(dates, dtype="datetime64[D]")
+        return {
+            "day": (days.astype("int64") + EPOCH_ORDINAL).astype("int32"),
+            "month": (days.astype("datetime64[M]").astype("int64") + 1970 * 12).astype("int32"),
+            "amount": np.array(amounts, dtype="int64"),
+            "sign": np.ones(len(rows), dtype="int8"),
+            "type": np.array(types, dtype="int16"),
+            "category": np.array(categories, dtype="int32"),
+            "payment_method": np.array(payment_methods, dtype="int16"),
+            "card": np.array([NO_CARD if card is None else card for card in cards], dtype="int32"),
+        }
+
+    def apply_changes(self, changes: List[Tuple[Dict, int]]) -> None:
+        """Append committed signed transaction changes (values as passed to crud.apply_transaction_changes)"""
+        with self._lock:
+            self._commits_finished += 1
+            if not self.loaded:
+                return
+            for values, sign in changes:
+                self._tail.append((
+                    values["date"].toordinal(),
+                    _month_number(values["date"]),
+                    sign * to_minor(values["amount"]),
+                    sign,
+                    models.TRANSACTION_TYPE.code(values["type"]),
+                    category_lookup.id_for(values["category"]),
+                    models.PAYMENT_METHOD.code(values["payment_method"]),
+                    NO_CARD if values["credit_card_id"] is None else values["credit_card_id"],
+                ))
+            if len(self._tail) >= TAIL_MERGE_ROWS:
+                self._merge_tail()
+
+    def _tail_columns(self, tail: List[Tuple]) -> Dict[str, "np.ndarray"]:
+        if not tail:
+            return {name: np.empty(0, dtype=dtype) for name, dtype in COLUMN_TYPES.items()}
+        return {
+            name: np.array(values, dtype=COLUMN_TYPES[name])
+            for name, values in zip(COLUMN_TYPES, zip(*tail))
+        }
+
+    def _merge_tail(self) -> None:
+        """Insert the buffered changes into the month-sorted columns (caller holds the lock)"""
+        tail = self._tail_columns(self._tail)
+        order = np.argsort(tail["month"], kind="stable")
+        positions = np.searchsorted(self._columns["month"], tail["month"][order], side="right")
+        # Replace the dict rather than mutating it so readers holding the old columns are unaffected
+        self._columns = {
+            name: np.insert(column, positions, tail[name][order])
+            for name, column in self._columns.items()
+        }
+        self._tail = []
+
+    def totals_by_month(self, start_date: date, end_date: date) -> List[Tuple[str, str, str, int]]:
+        """
+        Get (YYYY-MM, type, category, total in minor units) rows for the months in [start_date, end_date),
+        in the same form and order as crud.get_totals_by_month.
+        """
+        with self._lock:
+            columns = self._columns
+            tail = list(self._tail)
+
+        first = _month_number(start_date)
+        last = _month_number(end_date)
+        if last <= first:
+            return []
+        lo, hi = np.searchsorted(columns["month"], [first, last])
+        tail_columns = self._tail_columns(tail)
+        in_range = (tail_columns["month"] >= first) & (tail_columns["month"] < last)
+
+        def gather(name: str) -> "np.ndarray":
+            return np.concatenate([columns[name][lo:hi], tail_columns[name][in_range]])
+
+        category_ids = gather("category")
+        n_types = len(models.TRANSACTION_TYPE.values)
+        n_categories = int(category_ids.max()) + 1 if len(category_ids) else 1
+        keys = ((gather("month") - first).astype("int64") * n_types + gather("type")) * n_categories + category_ids
+        size = (last - first) * n_types * n_categories
+        # Per-group sums are integer minor units; float64 bincount sums integers exactly below 2**53
+        totals = np.bincount(keys, weights=gather("amount"), minlength=size)
+        counts = np.bincount(keys, weights=gather("sign"), minlength=size)
+
+        # Keys ascend by (month, type code, category id), the order the rollup query groups in
+        rows = []
+        for key in np.flatnonzero(counts):
+            month_offset, rest = divmod(int(key), n_types * n_categories)
+            type_code, category_id = divmod(rest, n_categories)
+            rows.append((
+                _month_string(first + month_offset),
+                models.TRANSACTION_TYPE.values[type_code],
+                category_lookup.name_for(category_id),
+                int(totals[key])
+            ))
+        return rows
+
+    def stats(self) -> Dict:
+        """Return store counters"""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "loaded": self.loaded,
+                "rows": 0 if self._columns is None else int(len(self._columns["month"])),
+                "buffered_rows": len(self._tail),
+                "bytes": 0 if self._columns is None else int(sum(c.nbytes for c in self._columns.values())),
+            }
+
+
+columnar_store = ColumnarStore()
+
+
+def record_transaction_changes(db: Session, changes: List[Tuple[Dict, int]]) -> None:
+    """Record signed transaction changes to append to the columnar store when this session commits"""
+    if columnar_store.enabled:
+        db.info.setdefault(_PENDING_CHANGES, []).extend(changes)
+
+
+@event.listens_for(Session, "before_commit")
+def _count_commit_started(session: Session) -> None:
+    if session.info.get(_PENDING_CHANGES) and not session.info.get(_COMMIT_IN_FLIGHT):
+        session.info[_COMMIT_IN_FLIGHT] = True
+        with columnar_store._lock:
+            columnar_store._commits_started += 1
+
+
+# Inserted first so the store has the new rows before the analytics cache drops its entries
+@event.listens_for(Session, "after_commit", insert=True)
+def _append_committed_changes(session: Session) -> None:
+    changes = session.info.pop(_PENDING_CHANGES, None)
+    if session.info.pop(_COMMIT_IN_FLIGHT, False):
+        columnar_store.apply_changes(changes or [])
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_changes(session: Session) -> None:
+    session.info.pop(_PENDING_CHANGES, None)
+    if session.info.pop(_COMMIT_IN_FLIGHT, False):
+        with columnar_store._lock:
+            columnar_store._commits_finished += 1
+
+
+if __name__ == "__main__":
+    from ..database import Base, SessionLocal, engine
+    from .. import crud
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "verify"
+    if command != "verify":
+        print(f"✗ Unknown command: {command}. Use 'verify'")
+        sys.exit(2)
+    if np is None:
+        print("✗ numpy is not installed; the columnar analytics store is unavailable")
+        sys.exit(1)
+    Base.metadata.create_all(bind=engine)
+    columnar_store.enabled = True
+    db = SessionLocal()
+    try:
+        began = time.perf_counter()
+        count = columnar_store.load(db)
+        print(f"✓ Loaded {count} transactions in {(time.perf_counter() - began) * 1000:.1f} ms: {columnar_store.stats()}")
+        first_date = db.query(models.Transaction.date).order_by(models.Transaction.date).limit(1).scalar()
+        if first_date is None:
+            print("ℹ No transactions to compare")
+            sys.exit(0)
+        start_date, end_date = date(first_date.year, 1, 1), date(date.today().year + 2, 1, 1)
+        began = time.perf_counter()
+        expected = [(ym, t, c, amount) for ym, t, c, amount in crud.get_totals_by_month(db, start_date, end_date)]
+        sql_ms = (time.perf_counter() - began) * 1000
+        began = time.perf_counter()
+        actual = columnar_store.totals_by_month(start_date, end_date)
+        columnar_ms = (time.perf_counter() - began) * 1000
+        mismatches = sorted(set(expected) ^ set(actual))
+        print(f"  • Monthly totals {start_date}..{end_date}: SQL {sql_ms:.1f} ms, columnar {columnar_ms:.1f} ms")
+        if mismatches:
+            print(f"✗ {len(mismatches)} rows differ between the columnar store and the monthly rollups")
+            for row in mismatches[:20]:
+                print(f"  • {row}")
+            sys.exit(1)
+        print(f"✓ Columnar totals match the monthly rollups ({len(actual)} rows)")
+    finally:
+        db.close()
@@ -0,0 +1,60 @@
+"""
+Due-date arithmetic for salaries and recurring investments
+next_due_date is stored on each row and indexed, so the auto-increment engine only has to
+load the rows whose due date has passed. Every due date is the anchor date (the first of the
+salary's start month, the investment's purchase date) plus a whole number of periods, so a
+month-end anchor stays on the month end instead of drifting to the shortest month's day.
+"""
+from datetime import date
+from typing import List, Optional
+from dateutil.relativedelta import relativedelta
+from .. import models
+
+SALARY_PERIOD = relativedelta(months=1)
+
+RECURRING_PERIODS = {
+    "monthly": relativedelta(months=1),
+    "yearly": relativedelta(years=1),
+}
+
+
+def salary_anchor(salary: models.Salary) -> date:
+    """First day of the month the salary started in"""
+    return date(salary.start_date.year, salary.start_date.month, 1)
+
+
+def next_due_after(anchor: date, after: date, period: relativedelta) -> date:
+    """First anchor + n * period (n >= 0) later than after"""
+    delta = relativedelta(after, anchor)
+    period_months = period.years * 12 + period.months
+    periods = max((delta.years * 12 + delta.months) // period_months, 0)
+    # The estimate can fall short by one period when a month-end anchor is clamped
+    while anchor + period * periods <= after:
+        periods += 1
+    return anchor + period * periods
+
+
+def salary_next_due_date(salary: models.Salary, today: Optional[date] = None) -> date:
+    """First day of the month after the salary was last added, or today if it was never added"""
+    if salary.last_added_date is None:
+        return today or date.today()
+    return date(salary.last_added_date.year, salary.last_added_date.month, 1) + SALARY_PERIOD
+
+
+def investment_next_due_date(investment: models.SavingsInvestment, today: Optional[date] = None) -> Optional[date]:
+    """One period after the recurring amount was last added, today if it never was, or None if not recurring"""
+    period = RECURRING_PERIODS.get(investment.recurring_type)
+    if not investment.is_recurring or period is None or not investment.recurring_amount:
+        return None
+    if investment.last_recurring_date is None:
+        return today or date.today()
+    return next_due_after(investment.purchase_date, investment.last_recurring_date, period)
+
+
+def due_dates_through(anchor: date, next_due: date, today: date, period: relativedelta) -> List[date]:
+    """Every due date from next_due up to and including today; the ones after next_due follow anchor"""
+    due_dates = []
+    while next_due <= today:
+        due_dates.append(next_due)
+        next_due = next_due_after(anchor, next_due, period)
+    return due_dates
@@ -0,0 +1,56 @@
+"""
+Streaming export of transactions
+Rows are read from the database in batches and written to the response as they arrive,
+so memory stays flat regardless of the size of the date range.
+"""
+import csv
+import io
+import json
+from datetime import date
+from typing import AsyncIterator
+from .. import async_crud
+from ..database import AsyncReadSessionLocal
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+EXPORT_COLUMNS = [
+    "id", "date", "amount", "type", "category", "description",
+    "payment_method", "credit_card_id", "is_payment", "created_at",
+]
+
+EXPORT_BATCH_SIZE = 1000
+
+
+def _export_row(row) -> dict:
+    return {
+        **row,
+        "date": row["date"].isoformat(),
+        "is_payment": bool(row["is_payment"]),
+        "created_at": row["created_at"].isoformat() if row["created_at"] else None,
+    }
+
+
+async def stream_transactions(start_date: date, end_date: date, export_format: str) -> AsyncIterator[str]:
+    """
+    Yield an export of the transactions in [start_date, end_date] one batch at a time.
+    Uses its own read-only session so the stream can outlive the request handler
+    and reads one consistent snapshot.
+    """
+    async with AsyncReadSessionLocal() as db:
+        if export_format == "csv":
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+            writer.writeheader()
+            yield buffer.getvalue()
+        
+        async for batch in async_crud.iter_transactions_by_date_range(db, start_date, end_date, EXPORT_BATCH_SIZE):
+            if export_format == "csv":
+                buffer = io.StringIO()
+                writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS)
+                writer.writerows(_export_row(row) for row in batch)
+                yield buffer.getvalue()
+            else:
+                yield "".join(json.dumps(_export_row(row)) + "\n" for row in batch)
@@ -0,0 +1,214 @@
+"""
+Bulk import of bank and card statements
+Parses CSV and OFX statements as a stream, maps each entry onto TransactionCreate
+and inserts valid rows in large executemany batches inside a single DB transaction.
+Invalid rows, including rows naming a credit card that does not exist, are skipped and
+reported with their row number.
+"""
+import csv
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+from .. import crud, models, schemas
+from ..database import SessionLocal
+from .codes import ensure_categories
+
+IMPORT_BATCH_SIZE = 5000
+OFX_READ_SIZE = 64 * 1024
+DEFAULT_CATEGORY = "Uncategorized"
+
+DATE_FORMATS = ["%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y", "%Y/%m/%d", "%Y%m%d"]
+
+# Alternative CSV header names used by common bank exports
+CSV_COLUMN_ALIASES = {
+    "date": ["date", "transaction date", "txn date", "value date", "posted date"],
+    "amount": ["amount", "transaction amount"],
+    "debit": ["debit", "withdrawal", "withdrawal amount", "debit amount"],
+    "credit": ["credit", "deposit", "deposit amount", "credit amount"],
+    "type": ["type", "transaction type"],
+    "category": ["category"],
+    "description": ["description", "narration", "details", "remarks", "memo"],
+    "payment_method": ["payment_method", "payment method", "mode"],
+    "credit_card_id": ["credit_card_id", "card id"],
+}
+
+RawRow = Tuple[int, Dict[str, Optional[str]]]
+
+
+def parse_date(value: str) -> date:
+    """Parse a statement date in any of the supported formats"""
+    value = value.strip()
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised date: {value!r}")
+
+
+def _parse_amount(value: Optional[str]) -> Optional[float]:
+    if value is None or not value.strip():
+        return None
+    return float(value.replace(",", "").strip())
+
+
+def parse_csv(stream: TextIO) -> Iterator[RawRow]:
+    """Yield (row number, normalized fields) for each CSV data row"""
+    reader = csv.DictReader(stream)
+    headers = {(name or "").strip().lower(): name for name in reader.fieldnames or []}
+    columns = {
+        field: next((headers[alias] for alias in aliases if alias in headers), None)
+        for field, aliases in CSV_COLUMN_ALIASES.items()
+    }
+    for row_number, row in enumerate(reader, start=2):
+        yield row_number, {field: row.get(column) if column else None for field, column in columns.items()}
+
+
+def _ofx_tokens(stream: TextIO) -> Iterator[Tuple[str, str]]:
+    """Yield (TAG, text) pairs from an OFX 1.x (SGML) or 2.x (XML) document, reading it in chunks"""
+    pending = ""
+    while True:
+        chunk = stream.read(OFX_READ_SIZE)
+        parts = (pending + chunk).split("<")
+        # The text after the last '<' may be cut mid-tag until the stream is exhausted
+        pending = parts.pop() if chunk else ""
+        for part in parts:
+            if ">" in part:
+                tag, _, text = part.partition(">")
+                yield tag.strip().upper(), text.strip()
+        if not chunk:
+            return
+
+
+def parse_ofx(stream: TextIO) -> Iterator[RawRow]:
+    """Yield (entry number, normalized fields) for each STMTTRN entry of an OFX statement"""
+    entry: Optional[Dict[str, str]] = None
+    entry_number = 0
+    for tag, text in _ofx_tokens(stream):
+        if tag == "STMTTRN":
+            entry = {}
+            entry_number += 1
+        elif tag == "/STMTTRN" and entry is not None:
+            description = " ".join(part for part in (entry.get("NAME"), entry.get("MEMO")) if part)
+            yield entry_number, {
+                # DTPOSTED is YYYYMMDD optionally followed by time and timezone
+                "date": (entry.get("DTPOSTED") or "")[:8] or None,
+                "amount": entry.get("TRNAMT"),
+                "description": description or None,
+            }
+            entry = None
+        elif entry is not None and not tag.startswith("/"):
+            entry[tag] = text
+
+
+def map_row(fields: Dict[str, Optional[str]], defaults: Dict) -> schemas.TransactionCreate:
+    """Map raw statement fields onto a TransactionCreate. Raises ValueError or ValidationError."""
+    if not fields.get("date"):
+        raise ValueError("Missing date")
+
+    amount = _parse_amount(fields.get("amount"))
+    txn_type = (fields.get("type") or "").strip().lower() or None
+    if amount is None:
+        debit = _parse_amount(fields.get("debit"))
+        credit = _parse_amount(fields.get("credit"))
+        if debit:
+            amount, txn_type = abs(debit), "expense"
+        elif credit:
+            amount, txn_type = abs(credit), "income"
+        else:
+            raise ValueError("Missing amount")
+    elif txn_type is None:
+        # Signed statement amounts: money out is negative
+        txn_type = "expense" if amount < 0 else "income"
+
+    if txn_type in ("debit", "dr"):
+        txn_type = "expense"
+    elif txn_type in ("credit", "cr"):
+        txn_type = "income"
+
+    credit_card_id = fields.get("credit_card_id") or defaults.get("credit_card_id")
+    return schemas.TransactionCreate(
+        date=parse_date(fields["date"]),
+        amount=abs(amount),
+        type=txn_type,
+        category=(fields.get("category") or "").strip() or defaults.get("category") or DEFAULT_CATEGORY,
+        description=(fields.get("description") or "").strip() or None,
+        payment_method=(fields.get("payment_method") or "").strip().lower() or defaults["payment_method"],
+        credit_card_id=int(credit_card_id) if credit_card_id else None,
+    )
+
+
+def _insert_batch(db: Session, batch: List[Tuple[int, Dict]], errors: List[Dict]) -> int:
+    """Insert the rows of a batch whose credit card exists and report the others. Returns the number inserted."""
+    card_ids = {values["credit_card_id"] for _, values in batch if values["credit_card_id"] is not None}
+    unknown_cards = card_ids - crud.get_existing_credit_card_ids(db, card_ids)
+    rows = []
+    for row_number, values in batch:
+        if values["credit_card_id"] in unknown_cards:
+            errors.append({"row": row_number, "error": f"Credit card not found: {values['credit_card_id']}"})
+        else:
+            rows.append(values)
+    if rows:
+        ensure_categories(db, {values["category"] for values in rows})
+        db.execute(models.Transaction.__table__.insert(), rows)
+        crud.apply_transaction_changes(db, [(values, 1) for values in rows])
+    return len(rows)
+
+
+def import_transactions(db: Session, rows: Iterator[RawRow], defaults: Dict,
+                        batch_size: int = IMPORT_BATCH_SIZE) -> Dict:
+    """
+    Validate and insert statement rows in executemany batches within one DB transaction.
+
+    Returns:
+        dict: 'imported' and 'failed' counts and per-row 'errors'
+    """
+    imported = 0
+    errors = []
+    batch: List[Tuple[int, Dict]] = []
+
+    try:
+        for row_number, fields in rows:
+            try:
+                transaction = map_row(fields, defaults)
+            except ValidationError as e:
+                message = "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+                errors.append({"row": row_number, "error": message})
+                continue
+            except ValueError as e:
+                errors.append({"row": row_number, "error": str(e)})
+                continue
+
+            batch.append((row_number, transaction.model_dump()))
+            if len(batch) >= batch_size:
+                imported += _insert_batch(db, batch, errors)
+                batch = []
+
+        if batch:
+            imported += _insert_batch(db, batch, errors)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    # Card errors are found when a batch is inserted, after the parse errors of later rows
+    errors.sort(key=lambda error: error["row"])
+    return {
+        "imported": imported,
+        "failed": len(errors),
+        "errors": errors,
+    }
+
+
+def import_transactions_in_new_session(rows: Iterator[RawRow], defaults: Dict) -> Dict:
+    """
+    Run import_transactions on a session of its own.
+    Parsing and validating a large statement is CPU-bound, so the async API calls this
+    from a worker thread instead of running it on the event loop.
+    """
+    db = SessionLocal()
+    try:
+        return import_transactions(db, rows, defaults)
+    finally:
+        db.close()
@@ -0,0 +1,141 @@
+"""
+Materialized investment contribution schedule
+Stores, per investment, the month ranges its contribution counts towards in analytics.
+Regenerated only when an investment is created/updated or recurring processing runs,
+so analytics can look up investment totals by month instead of re-evaluating every investment.
+"""
+from fractions import Fraction
+from typing import Dict, Iterable, List, Tuple
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+from .. import models
+from .cache import analytics_cache, mark_changed_from
+from .money import to_minor
+
+
+def _year_month(value) -> str:
+    return f"{value.year}-{value.month:02d}"
+
+
+def build_contribution_schedule(investment: models.SavingsInvestment) -> List[Dict]:
+    """
+    Work out the month ranges an investment contributes to.
+    - Monthly recurring: the recurring amount every month from the purchase month onwards
+    - Yearly recurring: the recurring amount / 12 for the months of the year it last recurred,
+      starting from the later of the purchase month and the last recurring month
+    - One-off: the initial amount in the purchase month only
+    """
+    purchase = investment.purchase_date
+    purchase_month = _year_month(purchase)
+    schedule = []
+    
+    if investment.is_recurring:
+        if not investment.recurring_amount:
+            return schedule
+        if investment.recurring_type == "monthly":
+            schedule.append({"start_month": purchase_month, "end_month": None,
+                             "amount": investment.recurring_amount, "months_spread": 1})
+        elif investment.recurring_type == "yearly":
+            last = investment.last_recurring_date or purchase
+            start_month = max(purchase_month, _year_month(last))
+            if start_month[:4] == str(last.year):
+                schedule.append({"start_month": start_month, "end_month": f"{last.year}-12",
+                                 "amount": investment.recurring_amount, "months_spread": 12})
+            if last.year < purchase.year:
+                schedule.append({"start_month": purchase_month, "end_month": f"{purchase.year}-12",
+                                 "amount": investment.recurring_amount, "months_spread": 12})
+    else:
+        schedule.append({"start_month": purchase_month, "end_month": purchase_month,
+                         "amount": investment.initial_amount, "months_spread": 1})
+    
+    return schedule
+
+
+def _first_scheduled_month(db: Session, investment_ids: List[int]) -> str:
+    return db.query(func.min(models.InvestmentContribution.start_month)).filter(
+        models.InvestmentContribution.investment_id.in_(investment_ids)
+    ).scalar()
+
+
+def regenerate_investment_schedule(db: Session, investments: Iterable[models.SavingsInvestment]) -> None:
+    """Replace the schedule rows of the given investments (caller commits)"""
+    investments = list(investments)
+    if not investments:
+        return
+    db.flush()
+    investment_ids = [inv.id for inv in investments]
+    first_months = [_first_scheduled_month(db, investment_ids)]
+    db.query(models.InvestmentContribution).filter(
+        models.InvestmentContribution.investment_id.in_(investment_ids)
+    ).delete(synchronize_session=False)
+    
+    schedule = [
+        {"investment_id": inv.id, **entry}
+        for inv in investments
+        for entry in build_contribution_schedule(inv)
+    ]
+    db.bulk_insert_mappings(models.InvestmentContribution, schedule)
+    
+    # Cached analytics from the earliest old or new scheduled month onwards are stale
+    first_months += [entry["start_month"] for entry in schedule]
+    mark_changed_from(db, min((month for month in first_months if month), default=None))
+
+
+def delete_investment_schedule(db: Session, investment_id: int) -> None:
+    """Remove the schedule rows of a deleted investment (caller commits)"""
+    mark_changed_from(db, _first_scheduled_month(db, [investment_id]))
+    db.query(models.InvestmentContribution).filter(
+        models.InvestmentContribution.investment_id == investment_id
+    ).delete(synchronize_session=False)
+
+
+def rebuild_investment_schedule(db: Session) -> int:
+    """Regenerate the schedule for every investment. Returns the number of investments processed."""
+    investments = db.query(models.SavingsInvestment).all()
+    db.query(models.InvestmentContribution).delete(synchronize_session=False)
+    regenerate_investment_schedule(db, investments)
+    db.commit()
+    analytics_cache.clear()
+    return len(investments)
+
+
+def ensure_investment_schedule(db: Session) -> bool:
+    """Build the schedule if it is empty but investments exist. Returns True if a rebuild ran."""
+    has_schedule = db.query(models.InvestmentContribution.id).first() is not None
+    has_investments = db.query(models.SavingsInvestment.id).first() is not None
+    if has_investments and not has_schedule:
+        rebuild_investment_schedule(db)
+        return True
+    return False
+
+
+def get_investment_totals(db: Session, months: List[Tuple[int, int]]) -> Dict[Tuple[int, int], Fraction]:
+    """
+    Look up the investment total for each (year, month) with one range query.
+    Totals are exact minor units; yearly amounts spread over 12 months can leave a fraction of one.
+    """
+    if not months:
+        return {}
+    
+    first_month = "%d-%02d" % min(months)
+    last_month = "%d-%02d" % max(months)
+    contributions = db.query(models.InvestmentContribution).filter(
+        models.InvestmentContribution.start_month <= last_month,
+        or_(
+            models.InvestmentContribution.end_month.is_(None),
+            models.InvestmentContribution.end_month >= first_month
+        )
+    ).order_by(
+        models.InvestmentContribution.investment_id,
+        models.InvestmentContribution.id
+    ).all()
+    
+    totals = {}
+    for year, month in months:
+        year_month = f"{year}-{month:02d}"
+        total = Fraction(0)
+        for entry in contributions:
+            if entry.start_month <= year_month and (entry.end_month is None or year_month <= entry.end_month):
+                total += Fraction(to_minor(entry.amount), entry.months_spread)
+        totals[(year, month)] = total
+    return totals
@@ -0,0 +1,73 @@
+"""
+In-place conversion of column storage for existing SQLite databases
+SQLite cannot change a column's type, so a table whose columns still use an older storage
+format is rebuilt: created again from the model, filled with the old rows converted by SQL
+expressions, and given back its model indexes.
+
+Column types opt in with a legacy_expression(connection, table_name, column_name, declared)
+method. declared maps the old table's column names to their declared SQL types. It returns
+the SQL that computes the new column from a row of the old table, or None if the column is
+already stored the current way. It may also prepare or validate data using the connection.
+"""
+from typing import Dict, List
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateTable
+
+
+def declared_columns(connection: Connection, table_name: str) -> Dict[str, str]:
+    """Get {column name: declared type in upper case} for an existing table"""
+    return {
+        row[1]: (row[2] or "").upper()
+        for row in connection.execute(text(f'PRAGMA table_info("{table_name}")'))
+    }
+
+
+def rebuild_table(connection: Connection, table, values: Dict[str, str]) -> None:
+    """Recreate table from its model definition, filling each column from its SQL expression in values"""
+    staging = f"{table.name}__rebuild"
+    create_sql = str(CreateTable(table).compile(connection)).replace(
+        f"CREATE TABLE {table.name} ", f"CREATE TABLE {staging} ", 1
+    )
+    columns = ", ".join(f'"{name}"' for name in values)
+    connection.execute(text(f'DROP TABLE IF EXISTS "{staging}"'))
+    connection.execute(text(create_sql))
+    connection.execute(text(
+        f'INSERT INTO "{staging}" ({columns}) SELECT {", ".join(values.values())} FROM "{table.name}"'
+    ))
+    connection.execute(text(f'DROP TABLE "{table.name}"'))
+    connection.execute(text(f'ALTER TABLE "{staging}" RENAME TO "{table.name}"'))
+    for index in table.indexes:
+        index.create(connection)
+
+
+def migrate_column_storage(engine: Engine) -> List[str]:
+    """
+    Rebuild every existing table with a column whose type reports a legacy storage format.
+    Runs in one DB transaction and is idempotent. Returns the names of the tables rebuilt.
+    """
+    from ..database import Base
+
+    rebuilt = []
+    existing_tables = set(inspect(engine).get_table_names())
+    with engine.begin() as connection:
+        # The driver would autocommit each CREATE/DROP; an explicit BEGIN makes the whole migration atomic
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            declared = declared_columns(connection, table.name)
+            values = {}
+            converted = False
+            for column in table.columns:
+                legacy_expression = getattr(column.type, "legacy_expression", None)
+                expression = legacy_expression(connection, table.name, column.name, declared) if legacy_expression else None
+                if expression is not None:
+                    values[column.name] = expression
+                    converted = True
+                elif column.name in declared:
+                    values[column.name] = f'"{column.name}"'
+            if converted:
+                rebuild_table(connection, table, values)
+                rebuilt.append(table.name)
+    return rebuilt
@@ -0,0 +1,69 @@
+"""
+Money stored as integer minor units
+Money columns use the Money column type: the application keeps working in currency units
+(floats such as 12.34) while SQLite stores integer minor units (1234). SUM runs on integers
+and is exact, and aggregates typed from a Money column are converted back once per result.
+Analytics that combine several aggregates sum the raw minor units (minor_sum) and convert
+each figure once, when the response is built.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+from fractions import Fraction
+from typing import Optional, Union
+from sqlalchemy import Integer, func, type_coerce
+from sqlalchemy.types import TypeDecorator
+
+MINOR_UNITS = 100  # minor units per currency unit (cents/paise)
+MONEY_DECIMALS = 2
+WHOLE = Decimal(1)
+
+
+def to_minor(value: Optional[float]) -> Optional[int]:
+    """Convert a currency amount to integer minor units, rounding half away from zero"""
+    if value is None:
+        return None
+    # Round the shortest decimal form of the float so amounts like 1.005 round as written
+    return int(Decimal(str(value)).scaleb(MONEY_DECIMALS).quantize(WHOLE, rounding=ROUND_HALF_UP))
+
+
+def from_minor(value: Optional[Union[int, Fraction]]) -> Optional[float]:
+    """Convert minor units to a currency amount; fractional minor units round half away from zero"""
+    if value is None:
+        return None
+    if isinstance(value, Fraction):
+        value = (-1 if value < 0 else 1) * int(abs(value) + Fraction(1, 2))
+    return int(value) / MINOR_UNITS
+
+
+def round_money(value: Optional[float]) -> Optional[float]:
+    """Round a currency amount to the precision it is stored with"""
+    return from_minor(to_minor(value))
+
+
+def minor_sum(column, where=None):
+    """SUM of a Money column (over the rows matching where, if given) as exact integer minor units, left unconverted"""
+    total = func.sum(column)
+    if where is not None:
+        total = total.filter(where)
+    return type_coerce(total, Integer)
+
+
+class Money(TypeDecorator):
+    """Currency amount in Python, INTEGER minor units in the database"""
+    impl = Integer
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return to_minor(value)
+
+    def process_literal_param(self, value, dialect):
+        return str(to_minor(value))
+
+    def process_result_value(self, value, dialect):
+        return from_minor(value)
+
+    def legacy_expression(self, connection, table_name: str, column_name: str, declared: dict) -> Optional[str]:
+        """SQL converting a floating-point amount column to minor units (see migrations.py)"""
+        if declared.get(column_name, "INTEGER") == "INTEGER":
+            return None
+        # Inner ROUND drops binary noise (1.005 * 100 = 100.4999...) before rounding to whole units
+        return f'CAST(ROUND(ROUND("{column_name}" * {MINOR_UNITS}, 6)) AS INTEGER)'
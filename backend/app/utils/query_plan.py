@@ -0,0 +1,106 @@
+"""
+Query plan checks for the hot analytics queries.
+Runs EXPLAIN QUERY PLAN against SQLite to prove each query reads through the index meant for it.
+"""
+import re
+from datetime import date
+from typing import Dict, List, Tuple
+from sqlalchemy import func, text, tuple_
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql import Select, select
+from .. import models
+from ..database import Base
+
+_INDEX_PATTERN = re.compile(r"USING (?:COVERING )?INDEX (\w+)")
+
+
+def _hot_queries() -> Dict[str, Tuple[Select, str]]:
+    """Representative versions of the queries issued by crud and analytics, with the index each should use"""
+    from .analytics import card_cycle_spend_query
+
+    t = models.Transaction
+    start, end = date(2025, 1, 1), date(2025, 2, 1)
+    return {
+        "transactions_by_month": (
+            select(t).where(t.date >= start, t.date < end).order_by(t.date, t.id),
+            "ix_transactions_date_id"
+        ),
+        "transactions_by_date_range": (
+            select(t).where(t.date >= start, t.date <= end).order_by(t.date, t.id),
+            "ix_transactions_date_id"
+        ),
+        "card_cycle_spend": (
+            card_cycle_spend_query({1: (start, end)}),
+            "ix_transactions_card_date"
+        ),
+        "all_cards_cycle_spend": (
+            card_cycle_spend_query({1: (start, end), 2: (start, end)}),
+            "ix_transactions_card_date"
+        ),
+        "category_rollup": (
+            select(t.category, func.sum(t.amount)).where(
+                t.type == "expense",
+                t.date >= start,
+                t.date < end
+            ).group_by(t.category),
+            "ix_transactions_type_date_category_amount"
+        ),
+        "transactions_keyset_page": (
+            select(t).where(
+                tuple_(t.date, t.id) < (start, 1000)
+            ).order_by(t.date.desc(), t.id.desc()).limit(100),
+            "ix_transactions_date_id"
+        ),
+        "card_transactions_keyset_page": (
+            select(t).where(
+                t.credit_card_id == 1,
+                tuple_(t.date, t.id) < (start, 1000)
+            ).order_by(t.date.desc(), t.id.desc()).limit(100),
+            "ix_transactions_card_date"
+        ),
+    }
+
+
+def explain_hot_queries(engine: Engine) -> Dict[str, Dict]:
+    """
+    Run EXPLAIN QUERY PLAN for each hot query.
+
+    Returns:
+        dict: query name -> {'plan': [detail lines], 'expected_index': name, 'indexes': [names used],
+        'uses_index': True if every table access goes through the expected index}
+    """
+    results = {}
+    with engine.connect() as connection:
+        for name, (query, expected_index) in _hot_queries().items():
+            sql = str(query.compile(engine, compile_kwargs={"literal_binds": True}))
+            rows = connection.execute(text(f"EXPLAIN QUERY PLAN {sql}")).fetchall()
+            plan: List[str] = [row[-1] for row in rows]
+            accesses = [line for line in plan if line.startswith(("SCAN transactions", "SEARCH transactions"))]
+            indexes = [match.group(1) for match in map(_INDEX_PATTERN.search, accesses) if match]
+            results[name] = {
+                "plan": plan,
+                "expected_index": expected_index,
+                "indexes": indexes,
+                "uses_index": bool(accesses) and indexes == [expected_index] * len(accesses),
+            }
+    return results
+
+
+def ensure_indexes(engine: Engine) -> List[str]:
+    """Create any model-declared indexes missing from an existing database"""
+    created = []
+    with engine.begin() as connection:
+        objects = connection.execute(text("SELECT type, name FROM sqlite_master")).fetchall()
+        existing_tables = {name for kind, name in objects if kind == "table"}
+        existing_indexes = {name for kind, name in objects if kind == "index"}
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(bind=connection)
+                    created.append(index.name)
+        if created:
+            # Refresh planner statistics so the new indexes are picked up
+            connection.execute(text("ANALYZE"))
+    return created
@@ -0,0 +1,190 @@
+"""
+Monthly rollups of transaction amounts
+Keeps monthly_rollups in step with the transactions table as signed deltas in integer
+minor units (see money.py), and provides a rebuild and an exact consistency check for
+existing databases.
+
+Usage (from the backend directory):
+    python -m app.utils.rollups rebuild
+    python -m app.utils.rollups verify
+"""
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from .. import models
+from .cache import analytics_cache
+from .money import from_minor, minor_sum, to_minor
+
+RollupKey = Tuple[str, str, str, str, Optional[int]]
+
+
+def transaction_values(transaction: models.Transaction) -> Dict:
+    """Snapshot the transaction fields that feed the rollups"""
+    return {
+        "date": transaction.date,
+        "amount": transaction.amount,
+        "type": transaction.type,
+        "category": transaction.category,
+        "payment_method": transaction.payment_method,
+        "credit_card_id": transaction.credit_card_id,
+    }
+
+
+def _rollup_key(values: Dict) -> RollupKey:
+    return (
+        values["date"].strftime("%Y-%m"),
+        values["type"],
+        values["category"],
+        values["payment_method"],
+        values["credit_card_id"],
+    )
+
+
+def _get_rollup(db: Session, key: RollupKey) -> Optional[models.MonthlyRollup]:
+    year_month, txn_type, category, payment_method, credit_card_id = key
+    return db.query(models.MonthlyRollup).filter(
+        models.MonthlyRollup.year_month == year_month,
+        models.MonthlyRollup.type == txn_type,
+        models.MonthlyRollup.category == category,
+        models.MonthlyRollup.payment_method == payment_method,
+        models.MonthlyRollup.credit_card_id.is_(None) if credit_card_id is None
+        else models.MonthlyRollup.credit_card_id == credit_card_id
+    ).first()
+
+
+def apply_transaction_deltas(db: Session, changes: Iterable[Tuple[Dict, int]]) -> None:
+    """
+    Apply signed transaction changes to the rollups.
+    Each change is (transaction values, +1 for an added row or -1 for a removed row).
+    The caller owns the DB transaction and commits.
+    """
+    deltas: Dict[RollupKey, List] = {}
+    for values, sign in changes:
+        delta = deltas.setdefault(_rollup_key(values), [0, 0])
+        delta[0] += sign * to_minor(values["amount"])
+        delta[1] += sign
+    
+    for key, (amount_delta, count_delta) in deltas.items():
+        if count_delta == 0 and amount_delta == 0:
+            continue
+        rollup = _get_rollup(db, key)
+        if rollup is None:
+            if count_delta <= 0:
+                # Nothing recorded for this key; the rollups need a rebuild
+                continue
+            year_month, txn_type, category, payment_method, credit_card_id = key
+            rollup = models.MonthlyRollup(
+                year_month=year_month,
+                type=txn_type,
+                category=category,
+                payment_method=payment_method,
+                credit_card_id=credit_card_id,
+                total_amount=0,
+                transaction_count=0
+            )
+            db.add(rollup)
+        rollup.total_amount = from_minor(to_minor(rollup.total_amount) + amount_delta)
+        rollup.transaction_count += count_delta
+        if rollup.transaction_count <= 0:
+            db.delete(rollup)
+        # Flush so later lookups in the same session see this row
+        db.flush()
+
+
+def _aggregate_transactions(db: Session) -> List[Tuple]:
+    """Compute the rollup rows, totals in minor units, directly from the transactions table"""
+    year_month = func.strftime('%Y-%m', models.Transaction.date)
+    return db.query(
+        year_month,
+        models.Transaction.type,
+        models.Transaction.category,
+        models.Transaction.payment_method,
+        models.Transaction.credit_card_id,
+        minor_sum(models.Transaction.amount),
+        func.count(models.Transaction.id)
+    ).group_by(
+        year_month,
+        models.Transaction.type,
+        models.Transaction.category,
+        models.Transaction.payment_method,
+        models.Transaction.credit_card_id
+    ).all()
+
+
+def rebuild_monthly_rollups(db: Session) -> int:
+    """Recreate all rollup rows from the transactions table. Returns the number of rollup rows."""
+    db.query(models.MonthlyRollup).delete(synchronize_session=False)
+    rows = _aggregate_transactions(db)
+    db.bulk_insert_mappings(models.MonthlyRollup, [
+        {
+            "year_month": year_month,
+            "type": txn_type,
+            "category": category,
+            "payment_method": payment_method,
+            "credit_card_id": credit_card_id,
+            "total_amount": from_minor(total_amount),
+            "transaction_count": transaction_count,
+        }
+        for year_month, txn_type, category, payment_method, credit_card_id, total_amount, transaction_count in rows
+    ])
+    db.commit()
+    analytics_cache.clear()
+    return len(rows)
+
+
+def verify_monthly_rollups(db: Session) -> List[Dict]:
+    """Compare the rollups with the transactions table. Returns a list of mismatched keys."""
+    expected = {tuple(row[:5]): (row[5], row[6]) for row in _aggregate_transactions(db)}
+    actual = {
+        (r.year_month, r.type, r.category, r.payment_method, r.credit_card_id): (to_minor(r.total_amount), r.transaction_count)
+        for r in db.query(models.MonthlyRollup).all()
+    }
+    
+    mismatches = []
+    for key in set(expected) | set(actual):
+        expected_total, expected_count = expected.get(key, (0, 0))
+        actual_total, actual_count = actual.get(key, (0, 0))
+        if (expected_total, expected_count) != (actual_total, actual_count):
+            mismatches.append({
+                "key": key,
+                "expected": {"total_amount": expected_total, "transaction_count": expected_count},
+                "actual": {"total_amount": actual_total, "transaction_count": actual_count},
+            })
+    return mismatches
+
+
+def ensure_monthly_rollups(db: Session) -> bool:
+    """Build the rollups if the table is empty but transactions exist. Returns True if a rebuild ran."""
+    has_rollups = db.query(models.MonthlyRollup.id).first() is not None
+    has_transactions = db.query(models.Transaction.id).first() is not None
+    if has_transactions and not has_rollups:
+        rebuild_monthly_rollups(db)
+        return True
+    return False
+
+
+if __name__ == "__main__":
+    from ..database import Base, SessionLocal, engine
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "verify"
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if command == "rebuild":
+            count = rebuild_monthly_rollups(db)
+            print(f"✓ Rebuilt monthly rollups: {count} rows")
+        elif command == "verify":
+            mismatches = verify_monthly_rollups(db)
+            if mismatches:
+                print(f"✗ {len(mismatches)} rollup rows out of sync")
+                for mismatch in mismatches[:20]:
+                    print(f"  • {mismatch['key']}: expected {mismatch['expected']}, found {mismatch['actual']}")
+                print("  Run 'python -m app.utils.rollups rebuild' to fix")
+                sys.exit(1)
+            print("✓ Monthly rollups are consistent with transactions")
+        else:
+            print(f"✗ Unknown command: {command}. Use 'rebuild' or 'verify'")
+            sys.exit(2)
+    finally:
+        db.close()
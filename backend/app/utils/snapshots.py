@@ -0,0 +1,190 @@
+"""
+Consistent local snapshots of the SQLite database
+Copies the live database with the SQLite online backup API a few pages at a time, so
+writers are only blocked for one short step and the copy is never torn mid-write.
+Each snapshot is checked, gzip-compressed as a stream and kept in a local directory
+with daily/weekly/monthly retention. Uploads (see backup_db.py) work from these frozen
+artifacts instead of the live file.
+
+Usage (from the backend directory):
+    python -m app.utils.snapshots create
+    python -m app.utils.snapshots list
+    python -m app.utils.snapshots prune
+"""
+import gzip
+import json
+import os
+import shutil
+import sqlite3
+import sys
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from ..database import CONFIG_PATH, engine
+
+SNAPSHOT_PREFIX = "finance_manager_backup_"
+SNAPSHOT_SUFFIX = ".db.gz"
+TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+
+# Defaults for the "snapshots" section of config.json
+DEFAULT_SNAPSHOT_CONFIG = {
+    "directory": "./snapshots",
+    "pages_per_step": 1024,  # pages copied per backup step; writers can commit between steps
+    "step_sleep": 0.005,  # seconds to yield between steps
+    "keep_daily": 7,  # newest snapshot of each of the last 7 days that have one
+    "keep_weekly": 4,  # ... of each of the last 4 ISO weeks
+    "keep_monthly": 12,  # ... of each of the last 12 months
+}
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+def load_snapshot_config() -> dict:
+    """Load snapshot settings from defaults and the "snapshots" section of config.json"""
+    settings = dict(DEFAULT_SNAPSHOT_CONFIG)
+    try:
+        with open(CONFIG_PATH) as f:
+            settings.update(json.load(f).get("snapshots", {}))
+    except FileNotFoundError:
+        pass
+    return settings
+
+
+def _snapshot_time(filename: str) -> Optional[datetime]:
+    if not (filename.startswith(SNAPSHOT_PREFIX) and filename.endswith(SNAPSHOT_SUFFIX)):
+        return None
+    try:
+        return datetime.strptime(filename[len(SNAPSHOT_PREFIX):-len(SNAPSHOT_SUFFIX)], TIMESTAMP_FORMAT)
+    except ValueError:
+        return None
+
+
+def list_snapshots(snapshot_dir: str) -> List[Tuple[datetime, str]]:
+    """Get (taken_at, path) for every snapshot in snapshot_dir, newest first"""
+    if not os.path.isdir(snapshot_dir):
+        return []
+    snapshots = []
+    for filename in os.listdir(snapshot_dir):
+        taken_at = _snapshot_time(filename)
+        if taken_at is not None:
+            snapshots.append((taken_at, os.path.join(snapshot_dir, filename)))
+    return sorted(snapshots, reverse=True)
+
+
+def create_snapshot(db_path: Optional[str] = None, snapshot_dir: Optional[str] = None,
+                    pages_per_step: Optional[int] = None, step_sleep: Optional[float] = None) -> str:
+    """
+    Take a consistent, compressed snapshot of the database. Returns the snapshot path.
+
+    The backup API copies pages_per_step pages at a time and restarts from the changed
+    pages if another connection writes in between, so the result is always one committed
+    state of the database. The copy is switched to a rollback journal so it is a single
+    self-contained file, checked with quick_check, then gzipped into place atomically.
+    """
+    settings = load_snapshot_config()
+    db_path = db_path or engine.url.database
+    snapshot_dir = snapshot_dir or settings["directory"]
+    pages_per_step = int(pages_per_step or settings["pages_per_step"])
+    step_sleep = float(settings["step_sleep"] if step_sleep is None else step_sleep)
+
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"Database file not found: {db_path}")
+    os.makedirs(snapshot_dir, exist_ok=True)
+
+    filename = f"{SNAPSHOT_PREFIX}{datetime.now().strftime(TIMESTAMP_FORMAT)}{SNAPSHOT_SUFFIX}"
+    snapshot_path = os.path.join(snapshot_dir, filename)
+    copy_path = snapshot_path[:-len(".gz")] + ".part"
+    compressed_path = snapshot_path + ".part"
+
+    try:
+        source = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        copy = sqlite3.connect(copy_path)
+        try:
+            source.backup(copy, pages=pages_per_step, sleep=step_sleep)
+            copy.execute("PRAGMA journal_mode = DELETE")
+            result = copy.execute("PRAGMA quick_check").fetchone()[0]
+            if result != "ok":
+                raise sqlite3.DatabaseError(f"Snapshot failed quick_check: {result}")
+        finally:
+            copy.close()
+            source.close()
+
+        with open(copy_path, "rb") as src, gzip.open(compressed_path, "wb") as dst:
+            shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+        os.replace(compressed_path, snapshot_path)
+    finally:
+        for path in (copy_path, compressed_path):
+            if os.path.exists(path):
+                os.remove(path)
+    return snapshot_path
+
+
+def snapshots_to_keep(snapshots: List[Tuple[datetime, str]], keep_daily: int, keep_weekly: int,
+                      keep_monthly: int) -> set:
+    """Pick the newest snapshot of each of the most recent days, ISO weeks and months to retain"""
+    keep = set()
+    buckets = [
+        (keep_daily, lambda taken_at: taken_at.date()),
+        (keep_weekly, lambda taken_at: taken_at.isocalendar()[:2]),
+        (keep_monthly, lambda taken_at: (taken_at.year, taken_at.month)),
+    ]
+    for count, bucket_of in buckets:
+        seen = set()
+        for taken_at, path in snapshots:
+            bucket = bucket_of(taken_at)
+            if bucket in seen:
+                continue
+            if len(seen) >= count:
+                break
+            seen.add(bucket)
+            keep.add(path)
+    return keep
+
+
+def prune_snapshots(snapshot_dir: Optional[str] = None) -> List[str]:
+    """Delete snapshots outside the daily/weekly/monthly retention. Returns the deleted paths."""
+    settings = load_snapshot_config()
+    snapshots = list_snapshots(snapshot_dir or settings["directory"])
+    keep = snapshots_to_keep(
+        snapshots,
+        int(settings["keep_daily"]),
+        int(settings["keep_weekly"]),
+        int(settings["keep_monthly"])
+    )
+    deleted = []
+    for _, path in snapshots:
+        if path not in keep:
+            os.remove(path)
+            deleted.append(path)
+    return deleted
+
+
+def ensure_daily_snapshot(db_path: Optional[str] = None) -> Dict:
+    """Take a snapshot unless one was already taken today, then apply the retention. Used on startup."""
+    settings = load_snapshot_config()
+    snapshots = list_snapshots(settings["directory"])
+    created = None
+    if not snapshots or snapshots[0][0].date() != datetime.now().date():
+        created = create_snapshot(db_path)
+    return {"created": created, "deleted": prune_snapshots(), "latest": created or snapshots[0][1]}
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "list"
+    settings = load_snapshot_config()
+    if command == "create":
+        path = create_snapshot()
+        print(f"✓ Snapshot created: {path} ({os.path.getsize(path) / 1024:.1f} KiB)")
+        for path in prune_snapshots():
+            print(f"  • Pruned: {path}")
+    elif command == "list":
+        snapshots = list_snapshots(settings["directory"])
+        if not snapshots:
+            print(f"ℹ No snapshots in {settings['directory']}")
+        for taken_at, path in snapshots:
+            print(f"  • {taken_at:%Y-%m-%d %H:%M:%S}  {os.path.getsize(path) / 1024:>10.1f} KiB  {path}")
+    elif command == "prune":
+        deleted = prune_snapshots()
+        print(f"✓ Pruned {len(deleted)} snapshots")
+    else:
+        print(f"✗ Unknown command: {command}. Use 'create', 'list' or 'prune'")
+        sys.exit(2)
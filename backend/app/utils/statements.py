@@ -0,0 +1,290 @@
+"""
+Billing-cycle statements for credit cards
+Keeps one card_statements row per card per billing cycle in step with card expenses and
+payments as signed deltas, with a running outstanding balance, and provides a rebuild
+and a consistency check for existing databases. Deltas and the per-category totals kept in
+the category_totals JSON are integer minor units (see money.py), so they add up exactly.
+
+Cycles start on the card's billing_cycle_start day (clamped to short months) and end the
+day before the next one starts, so every date belongs to exactly one statement.
+
+Usage (from the backend directory):
+    python -m app.utils.statements rebuild
+    python -m app.utils.statements verify
+"""
+import sys
+from calendar import monthrange
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import Integer, func, text, type_coerce, update
+from sqlalchemy.orm import Session
+from .. import models
+from .money import from_minor, minor_sum, to_minor
+
+StatementKey = Tuple[int, date]
+
+
+def _cycle_start_on(year: int, month: int, start_day: int) -> date:
+    return date(year, month, min(start_day, monthrange(year, month)[1]))
+
+
+def statement_cycle(start_day: int, on: date) -> Tuple[date, date]:
+    """Get the (cycle_start, cycle_end) of the billing cycle that contains the date on"""
+    cycle_start = _cycle_start_on(on.year, on.month, start_day)
+    if on < cycle_start:
+        year, month = (on.year - 1, 12) if on.month == 1 else (on.year, on.month - 1)
+        cycle_start = _cycle_start_on(year, month, start_day)
+    year, month = (cycle_start.year + 1, 1) if cycle_start.month == 12 else (cycle_start.year, cycle_start.month + 1)
+    return cycle_start, _cycle_start_on(year, month, start_day) - timedelta(days=1)
+
+
+def payment_values(payment: models.CreditCardPayment) -> Dict:
+    """Snapshot the payment fields that feed the statements"""
+    return {
+        "credit_card_id": payment.credit_card_id,
+        "payment_date": payment.payment_date,
+        "amount": payment.amount,
+    }
+
+
+def _cycle_start_days(db: Session, card_ids: Iterable[int]) -> Dict[int, int]:
+    card_ids = set(card_ids)
+    if not card_ids:
+        return {}
+    return dict(
+        db.query(models.CreditCard.id, models.CreditCard.billing_cycle_start)
+        .filter(models.CreditCard.id.in_(card_ids)).all()
+    )
+
+
+def _new_delta() -> Dict:
+    return {"total_charges": 0, "charge_count": 0, "total_payments": 0, "payment_count": 0, "categories": {}}
+
+
+def apply_statement_deltas(db: Session, transaction_changes: Iterable[Tuple[Dict, int]] = (),
+                           payment_changes: Iterable[Tuple[Dict, int]] = ()) -> None:
+    """
+    Apply signed transaction and payment changes to the card statements.
+    Each change is (values, +1 for an added row or -1 for a removed row); transactions use the
+    rollups.transaction_values fields and payments use payment_values. Only card expenses count
+    as charges. The caller owns the DB transaction and commits.
+    """
+    charges = [(values, sign) for values, sign in transaction_changes
+               if values["credit_card_id"] is not None and values["type"] == "expense"]
+    payments = [(values, sign) for values, sign in payment_changes if values["credit_card_id"] is not None]
+    if not charges and not payments:
+        return
+
+    start_days = _cycle_start_days(db, [values["credit_card_id"] for values, _ in charges + payments])
+    deltas: Dict[StatementKey, Dict] = {}
+    for values, sign in charges:
+        card_id = values["credit_card_id"]
+        if card_id not in start_days:
+            continue
+        delta = deltas.setdefault((card_id, statement_cycle(start_days[card_id], values["date"])[0]), _new_delta())
+        amount = sign * to_minor(values["amount"])
+        delta["total_charges"] += amount
+        delta["charge_count"] += sign
+        delta["categories"][values["category"]] = delta["categories"].get(values["category"], 0) + amount
+    for values, sign in payments:
+        card_id = values["credit_card_id"]
+        if card_id not in start_days:
+            continue
+        delta = deltas.setdefault((card_id, statement_cycle(start_days[card_id], values["payment_date"])[0]), _new_delta())
+        delta["total_payments"] += sign * to_minor(values["amount"])
+        delta["payment_count"] += sign
+
+    for (card_id, cycle_start), delta in sorted(deltas.items()):
+        statement = db.query(models.CardStatement).filter(
+            models.CardStatement.credit_card_id == card_id,
+            models.CardStatement.cycle_start == cycle_start
+        ).first()
+        if statement is None:
+            if delta["charge_count"] <= 0 and delta["payment_count"] <= 0:
+                # Nothing recorded for this cycle; the statements need a rebuild
+                continue
+            statement = models.CardStatement(
+                credit_card_id=card_id,
+                cycle_start=cycle_start,
+                cycle_end=statement_cycle(start_days[card_id], cycle_start)[1],
+                total_charges=0,
+                charge_count=0,
+                total_payments=0,
+                payment_count=0,
+                balance=_balance_before(db, card_id, cycle_start),
+                category_totals={}
+            )
+            db.add(statement)
+        statement.total_charges = from_minor(to_minor(statement.total_charges) + delta["total_charges"])
+        statement.charge_count += delta["charge_count"]
+        statement.total_payments = from_minor(to_minor(statement.total_payments) + delta["total_payments"])
+        statement.payment_count += delta["payment_count"]
+        categories = dict(statement.category_totals or {})
+        for category, amount in delta["categories"].items():
+            categories[category] = categories.get(category, 0) + amount
+            if categories[category] == 0:
+                del categories[category]
+        statement.category_totals = categories
+        db.flush()
+
+        # The balance of this and every later statement of the card moves by the net change
+        net = delta["total_charges"] - delta["total_payments"]
+        if net:
+            db.execute(
+                update(models.CardStatement)
+                .where(models.CardStatement.credit_card_id == card_id, models.CardStatement.cycle_start >= cycle_start)
+                .values(balance=type_coerce(models.CardStatement.balance, Integer) + net)
+            )
+        if statement.charge_count <= 0 and statement.payment_count <= 0:
+            db.delete(statement)
+        db.flush()
+
+
+def _balance_before(db: Session, card_id: int, cycle_start: date) -> float:
+    previous = db.query(models.CardStatement.balance).filter(
+        models.CardStatement.credit_card_id == card_id,
+        models.CardStatement.cycle_start < cycle_start
+    ).order_by(models.CardStatement.cycle_start.desc()).first()
+    return previous[0] if previous else 0.0
+
+
+def _compute_statements(db: Session, card_ids: Optional[List[int]] = None) -> Dict[StatementKey, Dict]:
+    """Compute the statement rows, amounts in minor units, directly from the transactions and payments tables"""
+    cards = db.query(models.CreditCard.id, models.CreditCard.billing_cycle_start)
+    if card_ids is not None:
+        cards = cards.filter(models.CreditCard.id.in_(card_ids))
+    start_days = dict(cards.all())
+
+    t = models.Transaction
+    charges = db.query(t.credit_card_id, t.date, t.category, minor_sum(t.amount), func.count(t.id)).filter(
+        t.type == "expense",
+        t.credit_card_id.in_(start_days)
+    ).group_by(t.credit_card_id, t.date, t.category)
+    p = models.CreditCardPayment
+    payments = db.query(p.credit_card_id, p.payment_date, minor_sum(p.amount), func.count(p.id)).filter(
+        p.credit_card_id.in_(start_days)
+    ).group_by(p.credit_card_id, p.payment_date)
+
+    statements: Dict[StatementKey, Dict] = {}
+
+    def statement_for(card_id: int, on: date) -> Dict:
+        cycle_start, cycle_end = statement_cycle(start_days[card_id], on)
+        statement = statements.get((card_id, cycle_start))
+        if statement is None:
+            statement = statements[(card_id, cycle_start)] = {**_new_delta(), "cycle_end": cycle_end}
+        return statement
+
+    for card_id, on, category, amount, count in charges:
+        statement = statement_for(card_id, on)
+        statement["total_charges"] += amount
+        statement["charge_count"] += count
+        statement["categories"][category] = statement["categories"].get(category, 0) + amount
+    for card_id, on, amount, count in payments:
+        statement = statement_for(card_id, on)
+        statement["total_payments"] += amount
+        statement["payment_count"] += count
+
+    balances: Dict[int, int] = {}
+    for (card_id, _), statement in sorted(statements.items()):
+        balances[card_id] = balances.get(card_id, 0) + statement["total_charges"] - statement["total_payments"]
+        statement["balance"] = balances[card_id]
+    return statements
+
+
+def rebuild_card_statements(db: Session, card_ids: Optional[List[int]] = None, commit: bool = True) -> int:
+    """Recreate the statements of all cards, or only card_ids, from scratch. Returns the number of statements."""
+    existing = db.query(models.CardStatement)
+    if card_ids is not None:
+        existing = existing.filter(models.CardStatement.credit_card_id.in_(card_ids))
+    existing.delete(synchronize_session=False)
+
+    statements = _compute_statements(db, card_ids)
+    db.bulk_insert_mappings(models.CardStatement, [
+        {
+            "credit_card_id": card_id,
+            "cycle_start": cycle_start,
+            "cycle_end": statement["cycle_end"],
+            "total_charges": from_minor(statement["total_charges"]),
+            "charge_count": statement["charge_count"],
+            "total_payments": from_minor(statement["total_payments"]),
+            "payment_count": statement["payment_count"],
+            "balance": from_minor(statement["balance"]),
+            "category_totals": statement["categories"],
+        }
+        for (card_id, cycle_start), statement in statements.items()
+    ])
+    if commit:
+        db.commit()
+    return len(statements)
+
+
+def verify_card_statements(db: Session) -> List[Dict]:
+    """Compare the statements with the transactions and payments tables. Returns a list of mismatched statements."""
+    money_fields = ["total_charges", "total_payments", "balance"]
+    fields = money_fields + ["charge_count", "payment_count"]
+    expected = {
+        key: {**{field: statement[field] for field in fields}, "category_totals": statement["categories"]}
+        for key, statement in _compute_statements(db).items()
+    }
+    actual = {
+        (s.credit_card_id, s.cycle_start): {
+            **{field: to_minor(getattr(s, field)) for field in money_fields},
+            "charge_count": s.charge_count,
+            "payment_count": s.payment_count,
+            "category_totals": s.category_totals,
+        }
+        for s in db.query(models.CardStatement).all()
+    }
+
+    empty = {**{field: 0 for field in fields}, "category_totals": {}}
+    mismatches = []
+    for key in set(expected) | set(actual):
+        want, have = expected.get(key, empty), actual.get(key, empty)
+        if want != have:
+            mismatches.append({"key": key, "expected": want, "actual": have})
+    return mismatches
+
+
+def ensure_card_statements(db: Session) -> bool:
+    """
+    Build the statements if the table is empty but card activity exists, or rebuild them if their
+    category totals are still in currency units rather than minor units. Returns True if a rebuild ran.
+    """
+    has_statements = db.query(models.CardStatement.id).first() is not None
+    has_activity = (
+        db.query(models.Transaction.id).filter(models.Transaction.credit_card_id.isnot(None)).first() is not None
+        or db.query(models.CreditCardPayment.id).first() is not None
+    )
+    has_unit_totals = has_statements and db.execute(text(
+        "SELECT 1 FROM card_statements, json_each(card_statements.category_totals) WHERE json_each.type = 'real' LIMIT 1"
+    )).first() is not None
+    if (has_activity and not has_statements) or has_unit_totals:
+        rebuild_card_statements(db)
+        return True
+    return False
+
+
+if __name__ == "__main__":
+    from ..database import Base, SessionLocal, engine
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "verify"
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if command == "rebuild":
+            count = rebuild_card_statements(db)
+            print(f"✓ Rebuilt card statements: {count} statements")
+        elif command == "verify":
+            mismatches = verify_card_statements(db)
+            if mismatches:
+                print(f"✗ {len(mismatches)} card statements out of sync")
+                for mismatch in mismatches[:20]:
+                    print(f"  • {mismatch['key']}: expected {mismatch['expected']}, found {mismatch['actual']}")
+                print("  Run 'python -m app.utils.statements rebuild' to fix")
+                sys.exit(1)
+            print("✓ Card statements are consistent with transactions and payments")
+        else:
+            print(f"✗ Unknown command: {command}. Use 'rebuild' or 'verify'")
+            sys.exit(2)
+    finally:
+        db.close()
@@ -22,14 +22,19 @@ SETUP INSTRUCTIONS:
    - Future runs will use token.json for authentication
 """
 
+import gzip
+import hashlib
 import json
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.api_core.exceptions import GoogleAPIError
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseDownload, MediaFileUpload
 import os
+import re
+import sys
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from app.database import engine
+from app.utils.codes import category_lookup
+from app.utils.columnar import columnar_store
+from app.utils.snapshots import create_snapshot
 import io
 from datetime import datetime, timedelta
 import warnings
@@ -37,17 +42,379 @@ warnings.filterwarnings("ignore")
 
 SCOPES = ['https://www.googleapis.com/auth/drive']
 
+# Snapshots are split into fixed-size chunks of the uncompressed database. SQLite pages sit
+# at fixed offsets, so a chunk whose pages did not change hashes the same as last time and
+# is not uploaded again. Chunks are stored zlib-compressed under their SHA-256 name.
+CHUNK_SIZE = 256 * 1024
+CHUNK_FOLDER = 'chunks'
+MANIFEST_SUFFIX = '.manifest.json'
+FOLDER_MIME_TYPE = 'application/vnd.google-apps.folder'
+
+BACKUP_INTERVAL_DAYS = {'weekly': 7, 'monthly': 30}
+
+# Downloads run in a bounded thread pool, in large ranged requests that are retried
+# with backoff, so a dropped connection resumes from the last completed chunk
+DOWNLOAD_WORKERS = 4
+DOWNLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+DOWNLOAD_RETRIES = 5
+GOOGLE_APPS_MIME_PREFIX = 'application/vnd.google-apps.'
+
+
+def _google_api_error():
+    """Import the Google API error class on first use (the Google client libraries are slow to import)"""
+    from google.api_core.exceptions import GoogleAPIError
+    return GoogleAPIError
+
+
+class LocalDriveStore:
+    """Local-filesystem stand-in for the Drive calls used by chunked backups (folders are directories)"""
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def folder(self, name, parent_id=None):
+        """Get or create a folder. Returns its id."""
+        path = os.path.join(parent_id or self.root, name)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def list_files(self, folder_id):
+        """Map the name of every file in a folder to its id"""
+        return {name: os.path.join(folder_id, name) for name in os.listdir(folder_id)
+                if os.path.isfile(os.path.join(folder_id, name))}
+
+    def upload(self, folder_id, name, data, mimetype='application/octet-stream'):
+        """Store bytes as a file in a folder. Returns the file id."""
+        path = os.path.join(folder_id, name)
+        with open(path + '.part', 'wb') as f:
+            f.write(data)
+        os.replace(path + '.part', path)
+        return path
+
+    def download(self, file_id):
+        """Get the bytes of a file"""
+        with open(file_id, 'rb') as f:
+            return f.read()
+
+    def iter_all_files(self):
+        """Every file in the store with its id, name, mimeType and md5Checksum"""
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(directory, name)
+                yield {'id': path, 'name': name, 'mimeType': 'application/octet-stream', 'md5Checksum': file_md5(path)}
+
+    def download_to_file(self, file_id, path):
+        """Stream a file into path"""
+        with open(file_id, 'rb') as src, open(path, 'wb') as dst:
+            for data in iter(lambda: src.read(DOWNLOAD_CHUNK_SIZE), b''):
+                dst.write(data)
+
+
+class GDriveStore:
+    """The folder and file operations used by chunked backups, on a Google Drive service"""
+    def __init__(self, service, folder_ids=None, service_factory=None):
+        self.service = service
+        # "<parent id>/<name>" -> folder id, filled from and saved to the local backup state
+        self.folder_ids = folder_ids if folder_ids is not None else {}
+        # The Drive client's HTTP transport is not thread-safe; with a factory every thread gets its own
+        self.service_factory = service_factory
+        self._local = threading.local()
+
+    def _service(self):
+        if self.service_factory is None:
+            return self.service
+        if not hasattr(self._local, 'service'):
+            self._local.service = self.service_factory()
+        return self._local.service
+
+    def folder(self, name, parent_id=None):
+        """Get or create a folder. Returns its id."""
+        key = f"{parent_id or ''}/{name}"
+        if key not in self.folder_ids:
+            self.folder_ids[key] = self._find_or_create_folder(name, parent_id)
+        return self.folder_ids[key]
+
+    def _find_or_create_folder(self, name, parent_id):
+        query = f"name='{name}' and mimeType='{FOLDER_MIME_TYPE}' and trashed=False"
+        if parent_id:
+            query += f" and '{parent_id}' in parents"
+        folders = self._service().files().list(q=query, spaces='drive', fields='files(id)', pageSize=1).execute().get('files', [])
+        if folders:
+            return folders[0]['id']
+        metadata = {'name': name, 'mimeType': FOLDER_MIME_TYPE}
+        if parent_id:
+            metadata['parents'] = [parent_id]
+        return self._service().files().create(body=metadata, fields='id').execute()['id']
+
+    def list_files(self, folder_id):
+        """Map the name of every file in a folder to its id"""
+        files = {}
+        page_token = None
+        while True:
+            results = self._service().files().list(
+                q=f"'{folder_id}' in parents and mimeType!='{FOLDER_MIME_TYPE}' and trashed=False",
+                spaces='drive',
+                fields='nextPageToken, files(id, name)',
+                pageSize=1000,
+                pageToken=page_token
+            ).execute()
+            files.update({f['name']: f['id'] for f in results.get('files', [])})
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                return files
+
+    def upload(self, folder_id, name, data, mimetype='application/octet-stream'):
+        """Store bytes as a file in a folder. Returns the file id."""
+        from googleapiclient.http import MediaIoBaseUpload
+
+        media = MediaIoBaseUpload(io.BytesIO(data), mimetype=mimetype)
+        return self._service().files().create(
+            body={'name': name, 'parents': [folder_id]},
+            media_body=media,
+            fields='id'
+        ).execute()['id']
+
+    def download(self, file_id):
+        """Get the bytes of a file"""
+        from googleapiclient.http import MediaIoBaseDownload
+
+        buffer = io.BytesIO()
+        downloader = MediaIoBaseDownload(buffer, self._service().files().get_media(fileId=file_id),
+                                         chunksize=DOWNLOAD_CHUNK_SIZE)
+        done = False
+        while not done:
+            _, done = downloader.next_chunk(num_retries=DOWNLOAD_RETRIES)
+        return buffer.getvalue()
+
+    def iter_all_files(self):
+        """Every file in the Drive with its id, name, mimeType and md5Checksum, page by page"""
+        page_token = None
+        while True:
+            results = self._service().files().list(
+                q=f"mimeType!='{FOLDER_MIME_TYPE}' and trashed=False",
+                spaces='drive',
+                fields='nextPageToken, files(id, name, mimeType, md5Checksum)',
+                pageSize=1000,
+                pageToken=page_token
+            ).execute()
+            yield from results.get('files', [])
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                return
+
+    def download_to_file(self, file_id, path):
+        """Stream a file into path in DOWNLOAD_CHUNK_SIZE ranges, retrying each range on failure"""
+        from googleapiclient.http import MediaIoBaseDownload
+
+        with open(path, 'wb') as f:
+            downloader = MediaIoBaseDownload(f, self._service().files().get_media(fileId=file_id),
+                                             chunksize=DOWNLOAD_CHUNK_SIZE)
+            done = False
+            while not done:
+                _, done = downloader.next_chunk(num_retries=DOWNLOAD_RETRIES)
+
+
+def file_md5(path):
+    """MD5 of a file, as reported by Drive in md5Checksum"""
+    digest = hashlib.md5()
+    with open(path, 'rb') as f:
+        for data in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b''):
+            digest.update(data)
+    return digest.hexdigest()
+
+
+def local_names(files):
+    """
+    Map each file id to the name to save it under. Drive allows several files with the same name;
+    those are saved as <stem>.<file id><extension> (finance.<id>.db) so no two downloads share a path.
+    """
+    counts = {}
+    for file in files:
+        counts[file['name']] = counts.get(file['name'], 0) + 1
+    names = {}
+    for file in files:
+        name = file['name']
+        if counts[name] > 1:
+            root, extension = os.path.splitext(name)
+            file_id = re.sub(r'[^\w-]', '_', str(file['id']))
+            name = f"{root}.{file_id}{extension}"
+        names[file['id']] = name
+    return names
+
+
+def download_all_files(store, backup_dir, workers=DOWNLOAD_WORKERS):
+    """
+    Download every file in the store into backup_dir with a bounded thread pool, verifying
+    each against its md5Checksum. Google Docs editor files have no binary content and are skipped.
+    Returns (number downloaded, names that failed).
+    """
+    os.makedirs(backup_dir, exist_ok=True)
+    files = [f for f in store.iter_all_files() if not f.get('mimeType', '').startswith(GOOGLE_APPS_MIME_PREFIX)]
+    names = local_names(files)
+
+    def fetch(file):
+        path = os.path.join(backup_dir, names[file['id']])
+        part_path = path + '.part'
+        try:
+            store.download_to_file(file['id'], part_path)
+            if file.get('md5Checksum') and file_md5(part_path) != file['md5Checksum']:
+                raise ValueError("checksum mismatch")
+            os.replace(part_path, path)
+        finally:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+
+    downloaded, failed = 0, []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(fetch, file): names[file['id']] for file in files}
+        for future in as_completed(futures):
+            try:
+                future.result()
+                downloaded += 1
+                print(f"✓ Downloaded: {futures[future]}")
+            except Exception as e:
+                failed.append(futures[future])
+                print(f"✗ Failed to download {futures[future]}: {e}")
+    return downloaded, failed
+
+
+def snapshot_sha256(snapshot_path):
+    """SHA-256 of the uncompressed database in a gzip snapshot (the same hash a manifest records)"""
+    digest = hashlib.sha256()
+    with gzip.open(snapshot_path, 'rb') as f:
+        for data in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(data)
+    return digest.hexdigest()
+
+
+def manifest_name_for(snapshot_path):
+    """finance_manager_backup_<timestamp>.db.gz -> finance_manager_backup_<timestamp>.manifest.json"""
+    name = os.path.basename(snapshot_path)
+    for suffix in ('.gz', '.db'):
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+    return name + MANIFEST_SUFFIX
+
+
+def upload_snapshot_chunks(store, snapshot_path, folder_name='Finance_Manager_Backups', chunk_size=CHUNK_SIZE):
+    """
+    Upload a gzip snapshot as content-addressed chunks plus a manifest, skipping chunks
+    the store already has. Returns a summary dict.
+    """
+    folder_id = store.folder(folder_name)
+    chunk_folder_id = store.folder(CHUNK_FOLDER, folder_id)
+    existing = store.list_files(chunk_folder_id)
+
+    chunks = []
+    total_hash = hashlib.sha256()
+    size = uploaded = uploaded_bytes = 0
+    with gzip.open(snapshot_path, 'rb') as f:
+        while True:
+            data = f.read(chunk_size)
+            if not data:
+                break
+            digest = hashlib.sha256(data).hexdigest()
+            total_hash.update(data)
+            size += len(data)
+            chunks.append(digest)
+            if digest not in existing:
+                compressed = zlib.compress(data)
+                existing[digest] = store.upload(chunk_folder_id, digest, compressed)
+                uploaded += 1
+                uploaded_bytes += len(compressed)
+
+    manifest = {
+        'version': 1,
+        'snapshot': os.path.basename(snapshot_path),
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'size': size,
+        'sha256': total_hash.hexdigest(),
+        'chunk_size': chunk_size,
+        'chunks': chunks,
+    }
+    name = manifest_name_for(snapshot_path)
+    store.upload(folder_id, name, json.dumps(manifest).encode('utf-8'), mimetype='application/json')
+    return {
+        'manifest': name,
+        'chunks': len(chunks),
+        'uploaded_chunks': uploaded,
+        'uploaded_bytes': uploaded_bytes,
+        'size': size,
+    }
+
+
+def list_backup_manifests(store, folder_name='Finance_Manager_Backups'):
+    """Names of all backup manifests in the backup folder, newest first"""
+    folder_id = store.folder(folder_name)
+    return sorted((name for name in store.list_files(folder_id) if name.endswith(MANIFEST_SUFFIX)), reverse=True)
+
+
+def restore_snapshot_chunks(store, manifest_name, dest_path, folder_name='Finance_Manager_Backups',
+                            workers=DOWNLOAD_WORKERS):
+    """
+    Reassemble the database described by a manifest into dest_path, downloading chunks in
+    parallel and verifying every chunk and the whole file. Stale -wal/-shm files of a
+    database at dest_path are removed, as they belong to the file being replaced. Restoring
+    over the app's own database also drops the columnar store and the category lookup.
+    """
+    folder_id = store.folder(folder_name)
+    files = store.list_files(folder_id)
+    if manifest_name not in files:
+        raise FileNotFoundError(f"Backup manifest not found: {manifest_name}")
+    manifest = json.loads(store.download(files[manifest_name]))
+    chunk_files = store.list_files(store.folder(CHUNK_FOLDER, folder_id))
+
+    def fetch_chunk(digest):
+        if digest not in chunk_files:
+            raise FileNotFoundError(f"Backup chunk missing: {digest}")
+        data = zlib.decompress(store.download(chunk_files[digest]))
+        if hashlib.sha256(data).hexdigest() != digest:
+            raise ValueError(f"Backup chunk corrupted: {digest}")
+        return data
+
+    total_hash = hashlib.sha256()
+    part_path = dest_path + '.part'
+    try:
+        # map() yields in manifest order while the pool downloads ahead
+        with ThreadPoolExecutor(max_workers=workers) as executor, open(part_path, 'wb') as out:
+            for data in executor.map(fetch_chunk, manifest['chunks']):
+                total_hash.update(data)
+                out.write(data)
+        if os.path.getsize(part_path) != manifest['size'] or total_hash.hexdigest() != manifest['sha256']:
+            raise ValueError(f"Restored database does not match manifest {manifest_name}")
+        for suffix in ('-wal', '-shm'):
+            if os.path.exists(dest_path + suffix):
+                os.remove(dest_path + suffix)
+        os.replace(part_path, dest_path)
+    finally:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+    if engine.url.database and os.path.abspath(dest_path) == os.path.abspath(engine.url.database):
+        # In-memory copies of the replaced database would keep serving its data
+        columnar_store.reset()
+        category_lookup.clear()
+    return manifest
+
+
 class GDriveBackup:
     def __init__(self, google_drive_config=None):
         """Initialize GDriveBackup with optional config."""
         self.credentials_path = google_drive_config.get("credentials_file", None)
         self.token_path = google_drive_config.get("token_file", None)
         self.frequency = google_drive_config.get("backup_frequencies", "weekly")
+        # Local record of the last backup, so the frequency check needs no network
+        self.state_path = google_drive_config.get("state_file", "./backup_state.json")
+        self.download_workers = int(google_drive_config.get("download_workers", DOWNLOAD_WORKERS))
+        self.creds = None
         self.service = None
         assert self.credentials_path is not None, "Credentials file path must be provided in config."
         
     def authenticate(self):
         """Authenticate with Google Drive API"""
+        from google.auth.transport.requests import Request
+        from google.oauth2.credentials import Credentials
+        from google_auth_oauthlib.flow import InstalledAppFlow
+
         creds = None
         
         if os.path.exists(self.token_path):
@@ -64,48 +431,33 @@ class GDriveBackup:
             with open(self.token_path, 'w') as token:
                 token.write(creds.to_json())
         
-        self.service = build('drive', 'v3', credentials=creds)
+        self.creds = creds
+        self.service = self._build_service()
+    
+    def _build_service(self):
+        """Build a Drive client from the discovery document bundled with the library (no network fetch)"""
+        from googleapiclient.discovery import build
+        
+        return build('drive', 'v3', credentials=self.creds, static_discovery=True, cache_discovery=False)
+    
+    def _store(self, folder_name=None):
+        """A GDriveStore with a client per worker thread and the cached folder ids of folder_name"""
+        state = self._load_state()
+        folder_ids = state.get('folder_ids', {}) if folder_name and state.get('folder_name') == folder_name else {}
+        return GDriveStore(self.service, folder_ids, service_factory=self._build_service)
     
     def backup_files(self, backup_dir='./gdrive_backup'):
-        """Download all files from Google Drive"""
+        """Download all files from Google Drive in parallel, verifying checksums"""
         if not self.service:
             self.authenticate()
         
-        if not os.path.exists(backup_dir):
-            os.makedirs(backup_dir)
-        
         try:
-            results = self.service.files().list(
-                pageSize=100,
-                fields='files(id, name, mimeType)',
-                trashed=False
-            ).execute()
-            
-            files = results.get('files', [])
-            
-            for file in files:
-                self._download_file(file['id'], file['name'], backup_dir)
-                
-            print(f"✓ Backup completed at {backup_dir}")
-            
-        except GoogleAPIError as e:
+            downloaded, failed = download_all_files(self._store(), backup_dir, self.download_workers)
+            print(f"✓ Backup completed at {backup_dir}: {downloaded} files downloaded, {len(failed)} failed")
+            return not failed
+        except _google_api_error() as e:
             print(f"✗ Error: {e}")
-    
-    def _download_file(self, file_id, file_name, backup_dir):
-        """Download a single file"""
-        try:
-            request = self.service.files().get_media(fileId=file_id)
-            file_path = os.path.join(backup_dir, file_name)
-            
-            with open(file_path, 'wb') as f:
-                downloader = MediaIoBaseDownload(f, request)
-                done = False
-                while not done:
-                    done = downloader.next_chunk()
-            
-            print(f"✓ Downloaded: {file_name}")
-        except Exception as e:
-            print(f"✗ Failed to download {file_name}: {e}")
+            return False
     
     def _should_backup(self, folder_name):
         """Check if backup should be performed based on frequency and last backup date.
@@ -117,7 +469,7 @@ class GDriveBackup:
         Returns:
             tuple: (should_backup: bool, last_backup_info: dict or None)
         """
-        if self.frequency not in ['weekly', 'monthly']:
+        if self.frequency not in BACKUP_INTERVAL_DAYS:
             print(f"✗ Invalid self.frequency: {self.frequency}. Use 'weekly' or 'monthly'")
             return False, None
         
@@ -157,10 +509,7 @@ class GDriveBackup:
             current_time = datetime.now()
             
             # Determine interval based on self.frequency
-            if self.frequency == 'weekly':
-                interval_days = 7
-            else:  # monthly
-                interval_days = 30
+            interval_days = BACKUP_INTERVAL_DAYS[self.frequency]
             
             time_diff = current_time - last_backup_time
             
@@ -180,93 +529,136 @@ class GDriveBackup:
                     'days_since': time_diff.days
                 }
             
-        except GoogleAPIError as e:
+        except _google_api_error() as e:
             print(f"✗ Error checking backup status: {e}")
             return True, None  # Proceed with backup if error checking
     
-    def backup_local_db(self, db_path='./finance.db', folder_name='Finance_Manager_Backups'):
-        """Upload local database file to Google Drive.
+    def _load_state(self):
+        """Read the local backup state (empty if there is none yet)"""
+        try:
+            with open(self.state_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+    
+    def _save_state(self, state):
+        """Write the local backup state atomically"""
+        with open(self.state_path + '.part', 'w') as f:
+            json.dump(state, f, indent=2)
+        os.replace(self.state_path + '.part', self.state_path)
+    
+    def _due_from_state(self, state, folder_name):
+        """True/False if the local state shows whether a backup is due, None if it cannot tell"""
+        if self.frequency not in BACKUP_INTERVAL_DAYS or state.get('folder_name') != folder_name:
+            return None
+        try:
+            last_backup = datetime.fromisoformat(state['last_backup'])
+        except (KeyError, TypeError, ValueError):
+            return None
+        days_since = (datetime.now() - last_backup).days
+        interval_days = BACKUP_INTERVAL_DAYS[self.frequency]
+        if days_since < interval_days:
+            print(f"ℹ  Last backup was {days_since} days ago. Next {self.frequency} backup in {interval_days - days_since} day(s).")
+            return False
+        return True
+    
+    def backup_local_db(self, db_path='./finance.db', folder_name='Finance_Manager_Backups', snapshot_path=None):
+        """Upload a compressed snapshot of the local database to Google Drive.
+        
+        The local backup state answers the frequency check offline; Drive is only
+        contacted when a backup is due and the database changed since the last one.
         
         Args:
             db_path: Path to the database file
             folder_name: Name of the backup folder in Google Drive
-            frequency: 'weekly', 'monthly', or None to always backup (default: None)
+            snapshot_path: Existing snapshot to upload; a new one is taken from db_path if None
         """
-        if not self.service:
-            self.authenticate()
+        state = self._load_state()
         
         # Check frequency if specified
+        due = None
         if self.frequency is not None:
-            should_backup, _ = self._should_backup(folder_name)
-            if not should_backup:
+            due = self._due_from_state(state, folder_name)
+            if due is False:
                 return False
         
         if not os.path.exists(db_path):
             print(f"✗ Database file not found: {db_path}")
             return False
         
+        # Upload a frozen, compressed copy rather than the live database file
+        if snapshot_path is None:
+            snapshot_path = create_snapshot(db_path)
+        checksum = snapshot_sha256(snapshot_path)
+        if state.get('folder_name') == folder_name and state.get('sha256') == checksum:
+            print("ℹ  Database unchanged since the last backup. Nothing to upload.")
+            return False
+        
+        if not self.service:
+            self.authenticate()
+        
+        if self.frequency is not None and due is None:
+            # No usable local state: ask Drive once, and remember the answer
+            should_backup, last_backup_info = self._should_backup(folder_name)
+            if not should_backup:
+                if last_backup_info:
+                    self._save_state({**state, 'folder_name': folder_name,
+                                      'last_backup': last_backup_info['created'].isoformat(timespec='seconds')})
+                return False
+        
         try:
-            # Create or find the backup folder
-            folder_id = self._get_or_create_folder(folder_name)
-            
-            # Create backup filename with timestamp
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_filename = f'finance_manager_backup_{timestamp}.db'
+            # Upload only the chunks Drive does not have yet, then the manifest
+            folder_ids = state.get('folder_ids', {}) if state.get('folder_name') == folder_name else {}
+            try:
+                result = upload_snapshot_chunks(GDriveStore(self.service, folder_ids), snapshot_path, folder_name)
+            except Exception:
+                # Cached folder ids may be stale; look them up again next time
+                state.pop('folder_ids', None)
+                self._save_state(state)
+                raise
             
-            # Upload file
-            file_metadata = {
-                'name': backup_filename,
-                'parents': [folder_id]
-            }
-            media = MediaFileUpload(db_path, mimetype='application/octet-stream')
-            
-            file = self.service.files().create(
-                body=file_metadata,
-                media_body=media,
-                fields='id, name, createdTime'
-            ).execute()
+            self._save_state({
+                'folder_name': folder_name,
+                'folder_ids': folder_ids,
+                'last_backup': datetime.now().isoformat(timespec='seconds'),
+                'manifest': result['manifest'],
+                'sha256': checksum,
+                'size': result['size'],
+            })
             
             print("✓  Database backed up successfully!")
-            print(f"  File: {file.get('name')}")
+            print(f"  Manifest: {result['manifest']}")
             print(f"  Folder: {folder_name}")
-            print(f"  Google Drive ID: {file.get('id')}")
+            print(f"  Chunks uploaded: {result['uploaded_chunks']} of {result['chunks']} "
+                  f"({result['uploaded_bytes'] / 1024 / 1024:.1f} MiB sent for a {result['size'] / 1024 / 1024:.1f} MiB database)")
             return True
             
-        except GoogleAPIError as e:
+        except _google_api_error() as e:
             print(f"✗ Backup failed: {e}")
             return False
     
-    def _get_or_create_folder(self, folder_name):
-        """Get existing folder or create a new one in Google Drive"""
-        try:
-            # Search for existing folder
-            results = self.service.files().list(
-                q=f"name='{folder_name}' and mimeType='application/vnd.google-apps.folder' and trashed=False",
-                spaces='drive',
-                fields='files(id, name)',
-                pageSize=1
-            ).execute()
-            
-            folders = results.get('files', [])
-            if folders:
-                return folders[0]['id']
-            
-            # Create new folder if not found
-            file_metadata = {
-                'name': folder_name,
-                'mimeType': 'application/vnd.google-apps.folder'
-            }
-            folder = self.service.files().create(
-                body=file_metadata,
-                fields='id'
-            ).execute()
-            
-            print(f"✓ Created backup folder: {folder_name}")
-            return folder.get('id')
-            
-        except GoogleAPIError as e:
-            print(f"✗ Error managing folder: {e}")
-            return None
+    def restore_db(self, dest_path, manifest_name=None, folder_name='Finance_Manager_Backups'):
+        """Restore a backup from Google Drive into dest_path (the newest one if manifest_name is None).
+        
+        dest_path may be the live finance.db (stop the app first): the current database is
+        saved as a local snapshot before it is replaced.
+        """
+        if not self.service:
+            self.authenticate()
+        
+        store = self._store(folder_name)
+        if manifest_name is None:
+            manifests = list_backup_manifests(store, folder_name)
+            if not manifests:
+                print(f"✗ No backups found in {folder_name}")
+                return False
+            manifest_name = manifests[0]
+        if os.path.exists(dest_path):
+            print(f"✓ Saved the current database as {create_snapshot(dest_path)}")
+        manifest = restore_snapshot_chunks(store, manifest_name, dest_path, folder_name, self.download_workers)
+        print(f"✓ Restored {manifest_name} to {dest_path} ({manifest['size'] / 1024 / 1024:.1f} MiB)")
+        return True
+
 
 if __name__ == '__main__':
     with open('config.json') as f:
@@ -275,11 +667,22 @@ if __name__ == '__main__':
     google_drive_config = config.get("google_drive", {})
     backup = GDriveBackup(google_drive_config)
     
+    command = sys.argv[1] if len(sys.argv) > 1 else 'backup'
+    if command == 'restore':
+        # python backup_db.py restore [dest_path|--live] [manifest_name]
+        # --live restores into the configured database file; stop the app first
+        dest = sys.argv[2] if len(sys.argv) > 2 else './finance_restored.db'
+        if dest == '--live':
+            dest = google_drive_config.get("backup_file", './finance.db')
+        backup.restore_db(dest, sys.argv[3] if len(sys.argv) > 3 else None)
+        sys.exit(0)
+    if command == 'download':
+        # python backup_db.py download [backup_dir]
+        ok = backup.backup_files(sys.argv[2] if len(sys.argv) > 2 else './gdrive_backup')
+        sys.exit(0 if ok else 1)
+    
     # Backup only if 7+ days since last backup
     backup.backup_local_db(google_drive_config.get("backup_file", './finance.db'))
     
     # Backup only if 30+ days since last backup
     # backup.backup_local_db('./finance.db', frequency='monthly')
-    
-    # Optional: Download all files from Google Drive
-    # backup.backup_files()
\ No newline at end of file
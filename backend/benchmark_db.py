@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+SQLite read/write concurrency benchmark
+
+Runs the same mixed workload against a scratch copy of the schema twice:
+once with SQLite's default pragmas (rollback journal, synchronous=FULL, no mmap)
+and once with the settings from config.json / FINANCE_DB_* environment variables.
+Reader threads run the monthly analytics aggregate while one writer inserts
+transactions with a commit per row, like the API does.
+
+Usage (from the backend directory):
+    python benchmark_db.py [--seconds 10] [--readers 4] [--rows 50000]
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+from sqlalchemy import create_engine, event, func, insert, select
+from app.database import DATABASE_CONFIG, Base, apply_sqlite_pragmas
+from app import models
+from app.utils.codes import category_lookup
+
+DEFAULT_PRAGMAS = {
+    "journal_mode": "DELETE",
+    "synchronous": "FULL",
+    "mmap_size": 0,
+    "cache_size": -2000,
+    "temp_store": "DEFAULT",
+    "busy_timeout": 5000,
+}
+
+CATEGORIES = ["Food", "Rent", "Travel", "Bills", "Fun", "Bench"]
+
+
+def _make_engine(path, settings):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+
+    @event.listens_for(engine, "connect")
+    def _configure(dbapi_connection, connection_record):
+        apply_sqlite_pragmas(dbapi_connection, settings)
+
+    return engine
+
+
+def _seed(engine, rows):
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as connection:
+        connection.execute(insert(models.Category), [{"name": name} for name in CATEGORIES])
+    category_lookup.use_engine(engine)
+    start = date(2020, 1, 1)
+    batch = [
+        {
+            "date": start + timedelta(days=random.randint(0, 2000)),
+            "amount": round(random.uniform(1, 5000), 2),
+            "type": random.choice(["income", "expense", "expense"]),
+            "category": random.choice(CATEGORIES[:-1]),
+            "payment_method": random.choice(["cash", "upi", "card", "bank"]),
+            "is_payment": 0,
+        }
+        for _ in range(rows)
+    ]
+    with engine.begin() as connection:
+        connection.execute(insert(models.Transaction.__table__), batch)
+
+
+def _run(engine, seconds, readers):
+    stop = threading.Event()
+    read_latencies, write_latencies = [], []
+    errors = []
+    t = models.Transaction
+    month_query = select(t.type, t.category, func.sum(t.amount)).where(
+        t.date >= date(2022, 3, 1), t.date < date(2022, 4, 1)
+    ).group_by(t.type, t.category)
+
+    def reader():
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                with engine.connect() as connection:
+                    connection.execute(month_query).fetchall()
+                read_latencies.append(time.perf_counter() - started)
+            except Exception as e:
+                errors.append(e)
+
+    def writer():
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                with engine.begin() as connection:
+                    connection.execute(insert(t.__table__), {
+                        "date": date(2022, 3, random.randint(1, 28)),
+                        "amount": 10.0, "type": "expense", "category": "Bench",
+                        "payment_method": "cash", "is_payment": 0,
+                    })
+                write_latencies.append(time.perf_counter() - started)
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)] + [threading.Thread(target=writer)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    def p95(values):
+        return statistics.quantiles(values, n=20)[-1] * 1000 if len(values) >= 20 else float("nan")
+
+    return {
+        "reads/s": len(read_latencies) / seconds,
+        "writes/s": len(write_latencies) / seconds,
+        "read p95 ms": p95(read_latencies),
+        "write p95 ms": p95(write_latencies),
+        "errors": len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--rows", type=int, default=50000)
+    args = parser.parse_args()
+
+    configured = {key: value for key, value in DATABASE_CONFIG.items() if key != "url"}
+    results = {}
+    with tempfile.TemporaryDirectory() as scratch:
+        for label, settings in (("default pragmas", DEFAULT_PRAGMAS), ("configured", configured)):
+            random.seed(42)
+            engine = _make_engine(os.path.join(scratch, f"{label.replace(' ', '_')}.db"), settings)
+            _seed(engine, args.rows)
+            results[label] = _run(engine, args.seconds, args.readers)
+            engine.dispose()
+
+    print("\n" + "=" * 60)
+    print(f"SQLITE CONCURRENCY BENCHMARK ({args.readers} readers + 1 writer, {args.seconds:g}s, {args.rows} rows)")
+    print("=" * 60)
+    print(f"  configured: {configured}")
+    for label, result in results.items():
+        print(f"\n  {label}:")
+        for metric, value in result.items():
+            print(f"    • {metric}: {value:.1f}" if isinstance(value, float) else f"    • {metric}: {value}")
+    print("=" * 60 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,13 +7,14 @@ import sys
 from sqlalchemy import inspect, Column, String, Float, Date, Integer, text
 from datetime import date
 
-db_file = "./finance.db"
 DUPLICATE_COLUMN_ERROR = "duplicate column"
 
 # Import database components
 from app.database import Base, engine, SessionLocal
 from app import models
 
+db_file = engine.url.database
+
 # Check if database exists
 db_exists = os.path.exists(db_file)
 
@@ -28,7 +29,7 @@ if db_exists:
     if 'savings_investments' in existing_tables:
         # Check if new columns exist
         existing_columns = [col['name'] for col in inspector.get_columns('savings_investments')]
-        new_columns_needed = ['is_recurring', 'recurring_type', 'recurring_amount', 'last_recurring_date']
+        new_columns_needed = ['is_recurring', 'recurring_type', 'recurring_amount', 'last_recurring_date', 'next_due_date']
         
         columns_to_add = [col for col in new_columns_needed if col not in existing_columns]
         
@@ -51,6 +52,9 @@ if db_exists:
                         elif col_name == 'last_recurring_date':
                             connection.execute(text(f'ALTER TABLE savings_investments ADD COLUMN {col_name} DATE'))
                             print(f"    ✓ Added column: {col_name}")
+                        elif col_name == 'next_due_date':
+                            connection.execute(text(f'ALTER TABLE savings_investments ADD COLUMN {col_name} DATE'))
+                            print(f"    ✓ Added column: {col_name}")
                 
                 print("✓ savings_investments table updated successfully")
             except Exception as e:
@@ -88,6 +92,22 @@ if db_exists:
                 session.close()
         else:
             print("  ✓ start_date column already exists in salaries")
+        
+        if 'next_due_date' not in existing_columns:
+            print("  • Found missing column in salaries: next_due_date")
+            try:
+                with engine.begin() as connection:
+                    connection.execute(text('ALTER TABLE salaries ADD COLUMN next_due_date DATE'))
+                    print("    ✓ Added column: next_due_date")
+                print("✓ salaries table updated successfully")
+            except Exception as e:
+                print(f"✗ Error adding column: {e}")
+                if DUPLICATE_COLUMN_ERROR in str(e).lower():
+                    print("  (Column already exists - continuing)")
+                else:
+                    sys.exit(1)
+        else:
+            print("  ✓ next_due_date column already exists in salaries")
     else:
         print("  • salaries table not found, creating new schema...")
         Base.metadata.create_all(bind=engine)
@@ -125,7 +145,7 @@ if db_exists:
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
                         credit_card_id INTEGER NOT NULL,
                         payment_date DATE NOT NULL,
-                        amount FLOAT NOT NULL,
+                        amount INTEGER NOT NULL,
                         payment_method VARCHAR NOT NULL,
                         transaction_id INTEGER,
                         description VARCHAR,
@@ -149,18 +169,92 @@ else:
     # Create all tables with fresh schema
     Base.metadata.create_all(bind=engine)
 
+# Create any tables added since the database was first created (existing tables are untouched)
+Base.metadata.create_all(bind=engine)
+
+# Convert columns of older databases to the current storage: money as integer minor units,
+# categories as ids into the categories table, types and payment methods as small-integer codes
+from app.utils.migrations import migrate_column_storage
+
+try:
+    rebuilt_tables = migrate_column_storage(engine)
+    for table_name in rebuilt_tables:
+        print(f"    ✓ Converted to the current column storage: {table_name}")
+    if not rebuilt_tables:
+        print("  ✓ All tables already use the current column storage")
+except Exception as e:
+    print(f"✗ Error converting column storage: {e}")
+    sys.exit(1)
+
+# Create query indexes missing from older databases and verify the planner uses them
+from app.utils.query_plan import ensure_indexes, explain_hot_queries
+
+try:
+    created_indexes = ensure_indexes(engine)
+    for index_name in created_indexes:
+        print(f"    ✓ Created index: {index_name}")
+    if not created_indexes:
+        print("  ✓ All query indexes already exist")
+except Exception as e:
+    print(f"✗ Error creating indexes: {e}")
+    sys.exit(1)
+
+print("\n→ Checking query plans for hot queries...")
+for query_name, result in explain_hot_queries(engine).items():
+    if result["uses_index"]:
+        print(f"  ✓ {query_name}: {result['expected_index']}")
+    else:
+        print(f"  ✗ {query_name}: expected {result['expected_index']}, plan: {' | '.join(result['plan'])}")
+
+# Build monthly rollups for databases created before the rollup table existed
+from app.utils.rollups import ensure_monthly_rollups, verify_monthly_rollups
+from app.utils.investment_schedule import rebuild_investment_schedule
+from app.utils.statements import ensure_card_statements, verify_card_statements
+from app.utils.auto_increment import ensure_due_dates
+
+session = SessionLocal()
+try:
+    if ensure_monthly_rollups(session):
+        print("\n✓ Built monthly rollups from existing transactions")
+    mismatches = verify_monthly_rollups(session)
+    if mismatches:
+        print(f"\n✗ {len(mismatches)} monthly rollup rows out of sync. Run: python -m app.utils.rollups rebuild")
+    else:
+        print("\n✓ Monthly rollups are consistent with transactions")
+    if ensure_card_statements(session):
+        print("✓ Built card statements from existing card transactions and payments")
+    mismatches = verify_card_statements(session)
+    if mismatches:
+        print(f"✗ {len(mismatches)} card statements out of sync. Run: python -m app.utils.statements rebuild")
+    else:
+        print("✓ Card statements are consistent with transactions and payments")
+    investment_count = rebuild_investment_schedule(session)
+    print(f"✓ Rebuilt investment contribution schedule for {investment_count} investments")
+    due_count = ensure_due_dates(session)
+    if due_count:
+        print(f"✓ Scheduled next due dates for {due_count} salaries and recurring investments")
+finally:
+    session.close()
+
 print("\n✓ Database initialization complete!")
 print("\nSchema includes:")
 print("  Tables:")
 print("  - transactions (with credit card payment tracking)")
+print("  - categories (category names referenced by transactions and monthly rollups)")
 print("  - credit_cards")
 print("  - credit_card_payments (bill payment records)")
 print("  - savings_investments (with recurring investment support)")
 print("  - salaries (with auto-entry tracking and start date)")
+print("  - monthly_rollups (per-month sums and counts by type, category, payment method and card)")
+print("  - investment_contributions (month ranges each investment counts towards in analytics)")
+print("  - card_statements (per-card billing-cycle charges, payments, balance and category totals)")
 print("\nTransaction Fields:")
 print("  • Basic: id, date, amount, type, category, payment_method")
+print("  • Amounts: stored as integer minor units (cents), exposed as currency amounts")
+print("  • Codes: category_id references categories; type and payment_method are CHECK-constrained small integers")
 print("  • Credit Card: credit_card_id, is_payment (for bill payments)")
 print("  • Metadata: description, created_at")
+print("  • Indexes: (date, type), (credit_card_id, date), covering (type, date, category, amount)")
 print("\nCredit Card Payment Fields:")
 print("  • Tracking: id, credit_card_id, payment_date, amount, payment_method")
 print("  • Linking: transaction_id (optional reference to transaction)")
@@ -169,10 +263,11 @@ print("\nSavings Investment Fields:")
 print("  • Basic: id, name, investment_type, purchase_date")
 print("  • Values: initial_amount, current_value")
 print("  • Recurring: is_recurring, recurring_type, recurring_amount, last_recurring_date")
+print("  • Scheduling: next_due_date (indexed, for catching up missed periods)")
 print("  • Metadata: description, created_at, updated_at")
 print("\nSalary Fields:")
 print("  • Basic: id, name, amount, start_date")
 print("  • Status: is_active")
-print("  • Tracking: last_added_date (for monthly auto-entry)")
+print("  • Tracking: last_added_date (for monthly auto-entry), next_due_date (indexed)")
 print("  • Metadata: description, created_at, updated_at")
 
@@ -0,0 +1,43 @@
+"""
+Shared fixtures for the backend tests
+The app reads its database URL when it is imported, so it is pointed at a scratch SQLite
+file first; each test that asks for db gets freshly created tables.
+"""
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRATCH_DIR = tempfile.mkdtemp(prefix="finance-tests-")
+atexit.register(shutil.rmtree, SCRATCH_DIR, ignore_errors=True)
+os.environ["FINANCE_DB_URL"] = f"sqlite:///{os.path.join(SCRATCH_DIR, 'finance.db')}"
+sys.path.insert(0, BACKEND_DIR)
+
+import pytest  # noqa: E402
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.utils.codes import category_lookup  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    category_lookup.clear()
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client(db):
+    """API client on the test database (without the lifespan's startup checks, snapshot and backup)"""
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.utils.cache import analytics_cache
+
+    analytics_cache.clear()
+    return TestClient(app)
@@ -0,0 +1,51 @@
+from datetime import date
+from app import crud, models, schemas
+from app.utils.analytics import (
+    calculate_monthly_summary,
+    get_yearly_category_distribution,
+    get_yearly_summary,
+)
+from app.utils.investment_schedule import regenerate_investment_schedule
+
+
+def _add_transactions(db, amounts, txn_type="expense", category="Food"):
+    for day, amount in enumerate(amounts, start=1):
+        crud.create_transaction(db, schemas.TransactionCreate(
+            date=date(2024, 3, day), amount=amount, type=txn_type, category=category, payment_method="cash"
+        ))
+
+
+def _add_yearly_investment(db, amount):
+    investment = models.SavingsInvestment(
+        name="PPF", investment_type="other", purchase_date=date(2024, 1, 5),
+        initial_amount=amount, current_value=amount, is_recurring=1,
+        recurring_type="yearly", recurring_amount=amount, last_recurring_date=date(2024, 1, 5)
+    )
+    db.add(investment)
+    regenerate_investment_schedule(db, [investment])
+    db.commit()
+
+
+def test_totals_are_exact_sums_of_stored_amounts(db):
+    _add_transactions(db, [0.1] * 10 + [0.2] * 5)
+    _add_transactions(db, [1000.01, 0.02], txn_type="income", category="Salary")
+
+    summary = calculate_monthly_summary(db, 2024, 3)
+
+    assert summary["total_expense"] == 2.0
+    assert summary["total_income"] == 1000.03
+    assert summary["savings"] == 998.03
+    assert summary["top_categories"] == [{"name": "Food", "amount": 2.0}]
+
+
+def test_yearly_investments_spread_over_months_add_up_exactly(db):
+    _add_yearly_investment(db, 1000)
+
+    # Each month shows its rounded share; the year adds the exact shares
+    assert calculate_monthly_summary(db, 2024, 5)["investments"] == 83.33
+    yearly = get_yearly_summary(db, 2024)
+    assert [month["investments"] for month in yearly["monthly_breakdown"]] == [83.33] * 12
+    assert yearly["savings"] == -1000.0
+    distribution = get_yearly_category_distribution(db, 2024, include_investments=True)
+    assert distribution["total_investments"] == 1000.0
+    assert distribution["top_categories"] == [{"name": "Investments", "amount": 1000.0}]
@@ -0,0 +1,44 @@
+from app.utils.cache import analytics_cache
+
+MONTHLY = "/api/analytics/monthly/2024/3"
+
+
+def _expense(day, amount):
+    return {"date": f"2024-03-{day:02d}", "amount": amount, "type": "expense", "category": "Food",
+            "payment_method": "cash"}
+
+
+def _read_counting(client):
+    before = analytics_cache.stats()
+    summary = client.get(MONTHLY).json()
+    after = analytics_cache.stats()
+    return summary, after["hits"] - before["hits"], after["misses"] - before["misses"]
+
+
+def test_committed_writes_drop_the_cached_summary_of_their_month(client):
+    assert client.post("/api/transactions/", json=_expense(1, 10.5)).status_code == 200
+    assert _read_counting(client)[1:] == (0, 1)
+    summary, hits, misses = _read_counting(client)
+    assert (summary["total_expense"], hits, misses) == (10.5, 1, 0)
+
+    invalidations = analytics_cache.stats()["invalidations"]
+    assert client.post("/api/transactions/", json=_expense(2, 4.25)).status_code == 200
+    assert analytics_cache.stats()["invalidations"] == invalidations + 1
+    summary, hits, misses = _read_counting(client)
+    assert (summary["total_expense"], hits, misses) == (14.75, 0, 1)
+
+    batch = {"operations": [{"op": "create", "data": _expense(3, 1.25)}, {"op": "create", "data": _expense(4, 2)}]}
+    assert client.post("/api/transactions/batch", json=batch).status_code == 200
+    assert analytics_cache.stats()["invalidations"] == invalidations + 2
+    summary, hits, misses = _read_counting(client)
+    assert (summary["total_expense"], hits, misses) == (18.0, 0, 1)
+
+
+def test_writes_to_other_months_keep_the_cached_summary(client):
+    client.get(MONTHLY)
+    invalidations = analytics_cache.stats()["invalidations"]
+
+    assert client.post("/api/transactions/", json={**_expense(1, 3), "date": "2024-05-01"}).status_code == 200
+
+    assert analytics_cache.stats()["invalidations"] == invalidations
+    assert _read_counting(client)[1:] == (1, 0)
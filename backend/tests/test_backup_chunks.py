@@ -0,0 +1,57 @@
+import gzip
+import os
+import random
+from backup_db import (
+    CHUNK_FOLDER,
+    LocalDriveStore,
+    list_backup_manifests,
+    restore_snapshot_chunks,
+    upload_snapshot_chunks,
+)
+
+CHUNK = 4096
+FOLDER = "Finance_Manager_Backups"
+
+
+def _snapshot(directory, name, data):
+    path = os.path.join(directory, f"finance_manager_backup_{name}.db.gz")
+    with gzip.open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def test_chunked_backups_share_chunks_and_restore_exactly(tmp_path):
+    store = LocalDriveStore(str(tmp_path / "drive"))
+    first = random.Random(20).randbytes(CHUNK * 16 + 123)
+    # The second backup changes one chunk, like a few updated pages of the database
+    second = bytearray(first)
+    second[CHUNK * 5:CHUNK * 5 + 10] = b"x" * 10
+
+    first_result = upload_snapshot_chunks(store, _snapshot(tmp_path, "20240101_000000", first), FOLDER, CHUNK)
+    second_result = upload_snapshot_chunks(store, _snapshot(tmp_path, "20240108_000000", bytes(second)), FOLDER, CHUNK)
+
+    assert first_result["chunks"] == first_result["uploaded_chunks"] == 17
+    assert second_result["chunks"] == 17
+    assert second_result["uploaded_chunks"] == 1
+    chunk_folder = store.folder(CHUNK_FOLDER, store.folder(FOLDER))
+    assert len(store.list_files(chunk_folder)) == 18
+
+    manifests = list_backup_manifests(store, FOLDER)
+    assert manifests == [second_result["manifest"], first_result["manifest"]]
+    for manifest_name, data in zip(manifests, (bytes(second), first)):
+        dest = str(tmp_path / "restored.db")
+        restore_snapshot_chunks(store, manifest_name, dest, FOLDER, workers=3)
+        with open(dest, "rb") as f:
+            assert f.read() == data
+        assert not os.path.exists(dest + ".part")
+
+
+def test_unchanged_backup_uploads_no_chunks(tmp_path):
+    store = LocalDriveStore(str(tmp_path / "drive"))
+    data = random.Random(7).randbytes(CHUNK * 3)
+    upload_snapshot_chunks(store, _snapshot(tmp_path, "20240101_000000", data), FOLDER, CHUNK)
+
+    result = upload_snapshot_chunks(store, _snapshot(tmp_path, "20240102_000000", data), FOLDER, CHUNK)
+
+    assert result["uploaded_chunks"] == 0
+    assert result["uploaded_bytes"] == 0
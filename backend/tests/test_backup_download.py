@@ -0,0 +1,118 @@
+import hashlib
+import os
+import threading
+import time
+from backup_db import GDriveStore, LocalDriveStore, download_all_files
+
+
+class FakeFilesResource:
+    """files() of a Drive service whose list() returns the files page_size at a time"""
+    def __init__(self, files, page_size):
+        self.files = files
+        self.page_size = page_size
+        self.page_tokens = []
+
+    def list(self, pageToken=None, **kwargs):
+        self.page_tokens.append(pageToken)
+        start = int(pageToken or 0)
+        page = {'files': self.files[start:start + self.page_size]}
+        if start + self.page_size < len(self.files):
+            page['nextPageToken'] = str(start + self.page_size)
+        return FakeRequest(page)
+
+
+class FakeRequest:
+    def __init__(self, result):
+        self.result = result
+
+    def execute(self):
+        return self.result
+
+
+class FakeDriveService:
+    def __init__(self, files, page_size):
+        self.files_resource = FakeFilesResource(files, page_size)
+
+    def files(self):
+        return self.files_resource
+
+
+class FakeDriveStore(GDriveStore):
+    """GDriveStore listing a fake service, serving contents from memory and recording download concurrency"""
+    def __init__(self, service, contents, delay=0.01):
+        super().__init__(service)
+        self.contents = contents
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.active = self.peak = 0
+
+    def download_to_file(self, file_id, path):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delay)
+            with open(path, 'wb') as f:
+                f.write(self.contents[file_id])
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+def _drive_file(file_id, name, data, mime_type='application/octet-stream'):
+    return {'id': file_id, 'name': name, 'mimeType': mime_type, 'md5Checksum': hashlib.md5(data).hexdigest()}
+
+
+def test_downloads_every_page_with_bounded_concurrency(tmp_path):
+    contents = {f"id{number}": f"file {number}".encode() * 100 for number in range(25)}
+    files = [_drive_file(file_id, f"{file_id}.db.gz", data) for file_id, data in contents.items()]
+    files.append(_drive_file('doc', 'Notes', b'', 'application/vnd.google-apps.document'))
+    service = FakeDriveService(files, page_size=10)
+    store = FakeDriveStore(service, contents)
+
+    downloaded, failed = download_all_files(store, str(tmp_path), workers=3)
+
+    assert (downloaded, failed) == (25, [])
+    assert service.files_resource.page_tokens == [None, '10', '20']
+    assert 1 < store.peak <= 3
+    assert sorted(os.listdir(tmp_path)) == sorted(f"{file_id}.db.gz" for file_id in contents)
+    for file_id, data in contents.items():
+        assert (tmp_path / f"{file_id}.db.gz").read_bytes() == data
+
+
+def test_files_with_the_same_name_are_kept_apart(tmp_path):
+    contents = {f"id{number}": bytes([number]) * 50_000 for number in range(4)}
+    files = [_drive_file(file_id, 'finance.db', data) for file_id, data in contents.items()]
+    files.append(_drive_file('other', 'other.json', b'{}'))
+    contents['other'] = b'{}'
+    store = FakeDriveStore(FakeDriveService(files, page_size=2), contents)
+
+    downloaded, failed = download_all_files(store, str(tmp_path), workers=4)
+
+    assert (downloaded, failed) == (5, [])
+    assert (tmp_path / 'other.json').read_bytes() == b'{}'
+    for number in range(4):
+        assert (tmp_path / f"finance.id{number}.db").read_bytes() == contents[f"id{number}"]
+    assert not list(tmp_path.glob('*.part'))
+
+
+def test_checksum_mismatch_is_reported_and_not_kept(tmp_path):
+    contents = {'good': b'good', 'bad': b'corrupted'}
+    files = [_drive_file('good', 'good.bin', b'good'), _drive_file('bad', 'bad.bin', b'original')]
+    store = FakeDriveStore(FakeDriveService(files, page_size=1), contents, delay=0)
+
+    downloaded, failed = download_all_files(store, str(tmp_path), workers=2)
+
+    assert (downloaded, failed) == (1, ['bad.bin'])
+    assert os.listdir(tmp_path) == ['good.bin']
+
+
+def test_local_store_downloads_files_of_every_folder(tmp_path):
+    store = LocalDriveStore(str(tmp_path / 'drive'))
+    for folder in ('a', 'b'):
+        store.upload(store.folder(folder), 'manifest.json', folder.encode())
+
+    downloaded, failed = download_all_files(store, str(tmp_path / 'out'), workers=2)
+
+    assert (downloaded, failed) == (2, [])
+    assert sorted(path.read_bytes() for path in (tmp_path / 'out').iterdir()) == [b'a', b'b']
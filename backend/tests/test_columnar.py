@@ -0,0 +1,44 @@
+from datetime import date
+import pytest
+from app import crud, schemas
+from app.utils import columnar
+from app.utils.columnar import columnar_store
+
+pytest.importorskip("numpy")
+
+START, END = date(2024, 1, 1), date(2025, 1, 1)
+
+
+@pytest.fixture
+def store(db, monkeypatch):
+    monkeypatch.setattr(columnar_store, "enabled", True)
+    # Merge the buffered changes every few commits so the test covers the merged columns too
+    monkeypatch.setattr(columnar, "TAIL_MERGE_ROWS", 5)
+    yield columnar_store
+    columnar_store.reset()
+
+
+def _transaction(month, amount, category="Food", txn_type="expense"):
+    return schemas.TransactionCreate(date=date(2024, month, 10), amount=amount, type=txn_type,
+                                     category=category, payment_method="cash")
+
+
+def test_totals_match_sql_through_creates_updates_deletes_and_merges(db, store):
+    for month, amount in [(1, 10.10), (2, 20.20), (3, 30.30)]:
+        crud.create_transaction(db, _transaction(month, amount))
+    assert store.load(db) == 3
+
+    created = [crud.create_transaction(db, _transaction(month, 0.1 * month, "Travel")) for month in range(1, 7)]
+    crud.create_transaction(db, _transaction(4, 5000.55, "Salary", "income"))
+    crud.update_transaction(db, created[0].id, _transaction(5, 99.99, "Rent"))
+    crud.delete_transaction(db, created[1].id)
+    crud.apply_transaction_batch(db, [
+        schemas.TransactionBatchOperation(op="create", data=_transaction(2, 1.01, "Gifts")),
+        schemas.TransactionBatchOperation(op="update", id=created[2].id, data=_transaction(3, 3.03, "Travel")),
+        schemas.TransactionBatchOperation(op="delete", id=created[3].id),
+    ])
+
+    assert store.stats()["rows"] > 3  # the tail was merged at least once
+    assert store.totals_by_month(START, END) == crud.get_totals_by_month(db, START, END)
+    assert store.totals_by_month(date(2024, 3, 1), date(2024, 5, 1)) == \
+        crud.get_totals_by_month(db, date(2024, 3, 1), date(2024, 5, 1))
@@ -0,0 +1,39 @@
+from datetime import date
+from dateutil.relativedelta import relativedelta
+from app import models
+from app.utils.auto_increment import process_auto_recurring_investments
+from app.utils.due_dates import due_dates_through, next_due_after
+
+MONTH = relativedelta(months=1)
+
+
+def test_month_end_anchor_does_not_drift():
+    anchor = date(2025, 1, 31)
+
+    assert due_dates_through(anchor, date(2025, 2, 28), date(2025, 6, 30), MONTH) == [
+        date(2025, 2, 28), date(2025, 3, 31), date(2025, 4, 30), date(2025, 5, 31), date(2025, 6, 30)
+    ]
+    assert next_due_after(anchor, date(2025, 2, 28), MONTH) == date(2025, 3, 31)
+    assert next_due_after(date(2024, 2, 29), date(2025, 2, 28), relativedelta(years=1)) == date(2026, 2, 28)
+
+
+def test_month_end_investment_caught_up_over_three_months(db):
+    investment = models.SavingsInvestment(
+        name="Index fund", investment_type="mutual_fund", purchase_date=date(2025, 1, 31),
+        initial_amount=100, current_value=100, is_recurring=1, recurring_type="monthly",
+        recurring_amount=10, last_recurring_date=date(2025, 1, 31), next_due_date=date(2025, 2, 28)
+    )
+    db.add(investment)
+    db.commit()
+
+    result = process_auto_recurring_investments(db, today=date(2025, 5, 15))
+
+    assert result["periods_added"] == 3
+    db.refresh(investment)
+    assert investment.current_value == 130
+    assert investment.last_recurring_date == date(2025, 4, 30)
+    assert investment.next_due_date == date(2025, 5, 31)
+
+    process_auto_recurring_investments(db, today=date(2025, 6, 1))
+    db.refresh(investment)
+    assert (investment.last_recurring_date, investment.next_due_date) == (date(2025, 5, 31), date(2025, 6, 30))
@@ -0,0 +1,116 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from sqlalchemy import event, func, insert, select
+from app import models
+from app.database import engine
+from app.utils.codes import category_lookup, ensure_categories
+from app.utils.importer import import_transactions, parse_csv
+
+DEFAULTS = {"payment_method": "bank"}
+
+
+def _csv(rows):
+    lines = ["date,amount,category"] + [f"2024-01-{day:02d},-{day}.50,{category}" for day, category in rows]
+    return io.StringIO("\n".join(lines) + "\n")
+
+
+def _fail_after(rows, count):
+    for number, row in enumerate(rows, start=1):
+        yield row
+        if number == count:
+            raise RuntimeError("statement read failed")
+
+
+def test_categories_added_by_earlier_batches_are_reused(db):
+    # The second batch mixes a category added (uncommitted) by the first batch with a new one
+    result = import_transactions(db, parse_csv(_csv([(1, "Alpha"), (2, "Alpha"), (3, "Beta"), (4, "Alpha")])),
+                                 DEFAULTS, batch_size=2)
+
+    assert result == {"imported": 4, "failed": 0, "errors": []}
+    assert db.execute(select(models.Category.name).order_by(models.Category.name)).scalars().all() == ["Alpha", "Beta"]
+    counts = dict(db.execute(
+        select(models.Transaction.category, func.count()).group_by(models.Transaction.category)
+    ).all())
+    assert counts == {"Alpha": 3, "Beta": 1}
+
+
+def test_categories_of_a_failed_import_are_not_cached(db):
+    rows = parse_csv(_csv([(1, "Gamma"), (2, "Gamma"), (3, "Delta")]))
+    with pytest.raises(RuntimeError):
+        import_transactions(db, _fail_after(rows, 3), DEFAULTS, batch_size=2)
+
+    assert db.execute(select(func.count()).select_from(models.Category)).scalar_one() == 0
+    result = import_transactions(db, parse_csv(_csv([(1, "Delta"), (2, "Gamma")])), DEFAULTS, batch_size=1)
+    assert result["imported"] == 2
+    assert sorted(db.execute(select(models.Transaction.category)).scalars()) == ["Delta", "Gamma"]
+
+
+def test_uncommitted_categories_are_private_to_their_session(db):
+    category_id = ensure_categories(db, {"Epsilon"})["Epsilon"]
+    with ThreadPoolExecutor(1) as pool:
+        assert pool.submit(category_lookup.id_for, "Epsilon").result() is None
+    assert category_lookup.id_for("Epsilon") == category_id
+
+    db.commit()
+    with ThreadPoolExecutor(1) as pool:
+        assert pool.submit(category_lookup.id_for, "Epsilon").result() == category_id
+
+
+def test_category_lookups_do_not_query_the_database_once_loaded(db):
+    ensure_categories(db, {"Zeta"})
+    db.commit()
+    category_lookup.load()
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        assert category_lookup.id_for("Nope") is None
+        assert category_lookup.ids_for(["Nope", "Zeta"])["Nope"] is None
+        assert category_lookup.name_for(category_lookup.id_for("Zeta")) == "Zeta"
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert statements == []
+
+
+def test_categories_added_by_another_process_are_found_by_ensure_categories(db):
+    category_lookup.load()
+    with engine.begin() as connection:
+        connection.execute(insert(models.Category).values(name="Eta"))
+
+    category_id = ensure_categories(db, {"Eta"})["Eta"]
+    db.commit()
+
+    assert db.execute(select(func.count()).select_from(models.Category)).scalar_one() == 1
+    assert category_lookup.id_for("Eta") == category_id
+
+
+def test_rows_with_unknown_cards_are_reported_and_skipped(db):
+    db.execute(insert(models.CreditCard).values(name="Card", bank_name="Bank", billing_cycle_start=1,
+                                                billing_cycle_end=28, due_date=5, credit_limit=1000))
+    db.commit()
+    lines = ["date,amount,category,credit_card_id", "2024-01-01,-1.00,Food,1", "2024-01-02,-2.00,Food,7",
+             "2024-01-03,-3.00,Food,", "2024-01-04,-4.00,Food,x", "2024-01-05,-5.00,Food,7"]
+    rows = parse_csv(io.StringIO("\n".join(lines) + "\n"))
+
+    result = import_transactions(db, rows, DEFAULTS, batch_size=2)
+
+    assert result == {"imported": 2, "failed": 3, "errors": [
+        {"row": 3, "error": "Credit card not found: 7"},
+        {"row": 5, "error": "invalid literal for int() with base 10: 'x'"},
+        {"row": 6, "error": "Credit card not found: 7"},
+    ]}
+    assert sorted(db.execute(select(models.Transaction.credit_card_id)).scalars(), key=str) == [1, None]
+
+
+def test_unknown_transaction_types_are_reported_as_validation_errors(db):
+    rows = parse_csv(io.StringIO("date,amount,type,category\n2024-01-01,5.00,transfer,Food\n"))
+
+    result = import_transactions(db, rows, DEFAULTS)
+
+    assert result["imported"] == 0
+    assert result["errors"][0]["row"] == 2
+    assert result["errors"][0]["error"].startswith("type: ")
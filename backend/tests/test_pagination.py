@@ -0,0 +1,58 @@
+import base64
+from datetime import date
+import pytest
+from sqlalchemy import insert
+from app import models
+from app.utils.codes import ensure_categories
+
+
+def _seed(db):
+    ensure_categories(db, {"Food"})
+    # Several rows per date, inserted out of date order so ids and dates interleave
+    dates = [date(2024, 3, day) for day in (2, 1, 3, 2, 2, 1, 3, 3, 2, 1, 2, 2, 1)]
+    db.execute(insert(models.Transaction.__table__), [
+        {"date": day, "amount": 100, "type": "expense", "category": "Food", "payment_method": "cash", "is_payment": 0}
+        for day in dates
+    ])
+    db.commit()
+    return sorted(((day, row_id) for row_id, day in enumerate(dates, start=1)), reverse=True)
+
+
+@pytest.mark.parametrize("limit", [1, 2, 4, 5, 13, 20])
+def test_pages_over_rows_sharing_a_date_have_no_duplicates_or_gaps(db, client, limit):
+    expected = [row_id for _, row_id in _seed(db)]
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        page = client.get("/api/transactions/", params=params).json()
+        assert len(page["items"]) <= limit
+        seen += [item["id"] for item in page["items"]]
+        pages += 1
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == expected
+    assert pages == max(1, -(-len(expected) // limit))
+
+
+def _encoded(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor",
+    "!!!",
+    _encoded(b"{}"),
+    _encoded(b'["2024-03-01"]'),
+    _encoded(b'["yesterday", 3]'),
+    _encoded(b'[20240301, 3]'),
+    _encoded(b'["2024-03-01", "three"]'),
+])
+@pytest.mark.parametrize("path", ["/api/transactions/", "/api/payments/"])
+def test_malformed_cursors_are_rejected(db, client, path, cursor):
+    response = client.get(path, params={"cursor": cursor})
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor"}
@@ -0,0 +1,26 @@
+from sqlalchemy import event, insert
+from app import crud, models
+from app.database import engine
+
+
+def test_existing_card_ids_are_checked_in_one_query(db):
+    db.execute(insert(models.CreditCard), [
+        {"name": f"Card {number}", "bank_name": "Bank", "billing_cycle_start": 1, "billing_cycle_end": 28,
+         "due_date": 5, "credit_limit": 1000}
+        for number in range(1, 4)
+    ])
+    db.commit()
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        existing = crud.get_existing_credit_card_ids(db, {1, 2, 3, 7, 9})
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert existing == {1, 2, 3}
+    assert len([statement for statement in statements if "credit_cards" in statement]) == 1
+    assert crud.get_existing_credit_card_ids(db, set()) == set()
@@ -0,0 +1,49 @@
+import random
+from datetime import date, timedelta
+import pytest
+from sqlalchemy import insert, text
+from app import models
+from app.database import engine
+from app.utils.codes import ensure_categories
+from app.utils.query_plan import explain_hot_queries
+
+CATEGORIES = ["Food", "Rent", "Travel"]
+
+
+def _seed(db, rows, card_share):
+    ensure_categories(db, CATEGORIES)
+    db.execute(insert(models.CreditCard), [
+        {"name": f"Card {number}", "bank_name": "Bank", "billing_cycle_start": 1, "billing_cycle_end": 28,
+         "due_date": 5, "credit_limit": 1000}
+        for number in range(1, 6)
+    ])
+    generator = random.Random(rows)
+    db.execute(insert(models.Transaction.__table__), [
+        {
+            "date": date(2023, 1, 1) + timedelta(days=generator.randint(0, 1000)),
+            "amount": generator.randint(1, 50000) / 100,
+            "type": generator.choice(["income", "expense", "expense"]),
+            "category": generator.choice(CATEGORIES),
+            "payment_method": "card",
+            "credit_card_id": generator.randint(1, 5) if generator.random() < card_share else None,
+            "is_payment": 0,
+        }
+        for _ in range(rows)
+    ])
+    db.commit()
+    with engine.begin() as connection:
+        connection.execute(text("ANALYZE"))
+
+
+@pytest.mark.parametrize("rows, card_share", [(0, 0), (5000, 0.1), (5000, 0.9)])
+def test_hot_queries_use_their_index(db, rows, card_share):
+    if rows:
+        _seed(db, rows, card_share)
+
+    results = explain_hot_queries(engine)
+
+    failures = {
+        name: f"expected {result['expected_index']}, plan: {result['plan']}"
+        for name, result in results.items() if not result["uses_index"]
+    }
+    assert not failures
@@ -0,0 +1,23 @@
+from datetime import date
+from sqlalchemy import text
+from app import crud, models, schemas
+from app.utils.rollups import verify_monthly_rollups
+
+
+def test_rollups_stay_exact_and_a_one_cent_drift_is_reported(db):
+    created = [
+        crud.create_transaction(db, schemas.TransactionCreate(
+            date=date(2024, 3, day), amount=0.1, type="expense", category="Food", payment_method="cash"
+        ))
+        for day in range(1, 11)
+    ]
+    crud.delete_transaction(db, created[0].id)
+
+    assert db.query(models.MonthlyRollup.total_amount).scalar() == 0.9
+    assert verify_monthly_rollups(db) == []
+
+    db.execute(text("UPDATE monthly_rollups SET total_amount = total_amount + 1"))
+    db.commit()
+    [mismatch] = verify_monthly_rollups(db)
+    assert mismatch["expected"]["total_amount"] == 90
+    assert mismatch["actual"]["total_amount"] == 91
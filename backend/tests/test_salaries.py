@@ -0,0 +1,22 @@
+import asyncio
+from datetime import date
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import func, select
+from app import async_crud, models
+from app.database import AsyncSessionLocal
+
+
+def test_processing_reports_every_entry_added_for_missed_months(db):
+    # Last added three months ago: this month and the two before it are due
+    last_added = date.today().replace(day=1) - relativedelta(months=3)
+    db.add(models.Salary(name="Primary", amount=5000.55, start_date=last_added, is_active=1,
+                         last_added_date=last_added, next_due_date=last_added + relativedelta(months=1)))
+    db.commit()
+
+    async def process():
+        async with AsyncSessionLocal() as session:
+            return await async_crud.process_monthly_salaries(session)
+
+    assert asyncio.run(process()) == 3
+    assert db.execute(select(func.count()).select_from(models.Transaction)).scalar_one() == 3
+    assert asyncio.run(process()) == 0
@@ -0,0 +1,58 @@
+from datetime import date
+from sqlalchemy import text
+from app import crud, models, schemas
+from app.utils.statements import ensure_card_statements, verify_card_statements
+
+
+def _card(db):
+    return crud.create_credit_card(db, schemas.CreditCardCreate(
+        name="Card", bank_name="Bank", billing_cycle_start=1, billing_cycle_end=28, due_date=5, credit_limit=1000
+    ))
+
+
+def _charge(card, day, amount, category="Food"):
+    return schemas.TransactionCreate(date=date(2024, 3, day), amount=amount, type="expense", category=category,
+                                     payment_method="card", credit_card_id=card.id)
+
+
+def test_category_totals_are_exact_minor_units(db):
+    card = _card(db)
+    charges = [crud.create_transaction(db, _charge(card, day, 0.1)) for day in range(1, 4)]
+    crud.create_transaction(db, _charge(card, 4, 0.2, "Fuel"))
+    crud.update_transaction(db, charges[0].id, _charge(card, 1, 0.2))
+    crud.delete_transaction(db, charges[1].id)
+
+    statement = db.query(models.CardStatement).one()
+    assert statement.category_totals == {"Food": 30, "Fuel": 20}
+    assert statement.total_charges == statement.balance == 0.5
+    assert crud.get_card_statements(db, card.id)[0]["category_totals"] == {"Food": 0.3, "Fuel": 0.2}
+    assert verify_card_statements(db) == []
+
+    crud.delete_transaction(db, charges[0].id)
+    crud.delete_transaction(db, charges[2].id)
+    assert db.query(models.CardStatement).one().category_totals == {"Fuel": 20}
+
+
+def test_statements_with_totals_in_currency_units_are_rebuilt(db):
+    card = _card(db)
+    crud.create_transaction(db, _charge(card, 1, 12.34))
+    db.execute(text("""UPDATE card_statements SET category_totals = '{"Food": 12.34}'"""))
+    db.commit()
+
+    assert ensure_card_statements(db)
+    assert db.query(models.CardStatement).one().category_totals == {"Food": 1234}
+    assert not ensure_card_statements(db)
+
+
+def test_card_counters_are_exact_sums(db):
+    card = _card(db)
+    for day in range(1, 4):
+        crud.create_transaction(db, _charge(card, day, 0.1))
+    for day in (10, 11):
+        crud.create_credit_card_payment(db, schemas.CreditCardPaymentCreate(
+            credit_card_id=card.id, payment_date=date(2024, 3, day), amount=0.15, payment_method="bank"
+        ))
+
+    assert crud.get_credit_card_counters(db)[card.id] == {
+        "transaction_count": 3, "total_spent": 0.3, "payment_count": 2, "total_paid": 0.3
+    }
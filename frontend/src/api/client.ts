@@ -10,6 +10,8 @@ import {
   Insight,
   Analytics,
   CardUtilization,
+  CardStatement,
+  Page,
 } from '../types';
 
 // Get API URL from environment or use local IP for WiFi network access
@@ -27,8 +29,8 @@ export const transactionApi = {
   create: (transaction: Omit<Transaction, 'id' | 'created_at'>) =>
     axiosInstance.post<Transaction>('/transactions/', transaction),
   
-  getAll: (skip: number = 0, limit: number = 100) =>
-    axiosInstance.get<Transaction[]>('/transactions/', { params: { skip, limit } }),
+  getAll: (cursor?: string, limit: number = 100) =>
+    axiosInstance.get<Page<Transaction>>('/transactions/', { params: { limit, ...(cursor && { cursor }) } }),
   
   getByMonth: (year: number, month: number) =>
     axiosInstance.get<Transaction[]>(`/transactions/monthly/${year}/${month}`),
@@ -53,11 +55,14 @@ export const creditCardApi = {
   create: (card: Omit<CreditCard, 'id' | 'created_at' | 'transactions'>) =>
     axiosInstance.post<CreditCard>('/cards/', card),
   
-  getAll: () =>
-    axiosInstance.get<CreditCard[]>('/cards/'),
+  getAll: (expand: boolean = false) =>
+    axiosInstance.get<CreditCard[]>('/cards/', { params: { expand } }),
   
-  getById: (id: number) =>
-    axiosInstance.get<CreditCard>(`/cards/${id}`),
+  getById: (id: number, expand: boolean = false) =>
+    axiosInstance.get<CreditCard>(`/cards/${id}`, { params: { expand } }),
+  
+  getTransactions: (id: number, cursor?: string, limit: number = 100) =>
+    axiosInstance.get<Page<Transaction>>(`/cards/${id}/transactions`, { params: { limit, ...(cursor && { cursor }) } }),
   
   update: (id: number, card: Omit<CreditCard, 'id' | 'created_at' | 'transactions'>) =>
     axiosInstance.put<CreditCard>(`/cards/${id}`, card),
@@ -67,6 +72,18 @@ export const creditCardApi = {
   
   getUtilization: (id: number) =>
     axiosInstance.get<CardUtilization>(`/cards/${id}/utilization`),
+  
+  getAllUtilization: () =>
+    axiosInstance.get<CardUtilization[]>('/cards/utilization'),
+  
+  getStatements: (id: number, limit: number = 12) =>
+    axiosInstance.get<CardStatement[]>(`/cards/${id}/statements`, { params: { limit } }),
+  
+  getCurrentStatement: (id: number) =>
+    axiosInstance.get<CardStatement>(`/cards/${id}/statements/current`),
+  
+  getAllCurrentStatements: () =>
+    axiosInstance.get<CardStatement[]>('/cards/statements/current'),
 };
 
 // Savings Investment APIs
@@ -140,8 +157,8 @@ export const paymentApi = {
   create: (payment: Omit<CreditCardPayment, 'id' | 'created_at'>) =>
     axiosInstance.post<CreditCardPayment>('/payments/', payment),
   
-  getAll: (skip: number = 0, limit: number = 100) =>
-    axiosInstance.get<CreditCardPayment[]>('/payments/', { params: { skip, limit } }),
+  getAll: (cursor?: string, limit: number = 100) =>
+    axiosInstance.get<Page<CreditCardPayment>>('/payments/', { params: { limit, ...(cursor && { cursor }) } }),
   
   getByCard: (cardId: number, skip: number = 0, limit: number = 100) =>
     axiosInstance.get<CreditCardPayment[]>(`/payments/card/${cardId}`, { params: { skip, limit } }),
@@ -12,7 +12,7 @@ export const usePayments = () => {
     setError(null);
     try {
       const response = await paymentApi.getAll();
-      setPayments(response.data);
+      setPayments(response.data.items);
     } catch (err) {
       setError(err instanceof Error ? err.message : 'Failed to fetch payments');
     } finally {
@@ -9,6 +9,7 @@ export interface Salary {
   is_active: boolean;
   description?: string;
   last_added_date?: string;
+  next_due_date?: string | null;
   created_at: string;
   updated_at: string;
 }
@@ -1,6 +1,8 @@
 import { useState, useEffect } from 'react';
 import { useCreditCards, usePayments } from '../hooks';
 import { CreditCardSummary, AddPaymentForm } from '../components';
+import { creditCardApi } from '../api/client';
+import { CardUtilization } from '../types';
 
 interface CreditCardForm {
   name: string;
@@ -18,6 +20,7 @@ export const CreditCardsPage = () => {
   const [showPaymentForm, setShowPaymentForm] = useState(false);
   const [filterMonth, setFilterMonth] = useState(new Date().getMonth() + 1);
   const [filterYear, setFilterYear] = useState(new Date().getFullYear());
+  const [utilization, setUtilization] = useState<Record<number, CardUtilization>>({});
   const [formData, setFormData] = useState<CreditCardForm>({
     name: '',
     bank_name: '',
@@ -32,6 +35,15 @@ export const CreditCardsPage = () => {
     fetchPayments();
   }, [fetchPayments]);
 
+  // Fetch utilization for all cards in one request
+  useEffect(() => {
+    creditCardApi.getAllUtilization()
+      .then(response => {
+        setUtilization(Object.fromEntries(response.data.map(util => [util.card_id, util])));
+      })
+      .catch(err => console.error(err));
+  }, [cards]);
+
   const handleChange = (e: React.ChangeEvent<HTMLInputElement | HTMLSelectElement>) => {
     const { name, value } = e.target;
     setFormData(prev => ({
@@ -210,7 +222,7 @@ export const CreditCardsPage = () => {
         </form>
       )}
 
-      <CreditCardSummary cards={cards} />
+      <CreditCardSummary cards={cards} utilization={utilization} />
 
       <div className="flex justify-between items-center">
         <h2 className="text-2xl font-bold text-black">Bill Payments</h2>
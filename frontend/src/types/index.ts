@@ -22,6 +22,11 @@ export interface CreditCardPayment {
   created_at: string;
 }
 
+export interface Page<T> {
+  items: T[];
+  next_cursor: string | null;
+}
+
 export interface CreditCard {
   id: number;
   name: string;
@@ -31,6 +36,11 @@ export interface CreditCard {
   due_date: number;
   credit_limit: number;
   created_at: string;
+  transaction_count?: number;
+  total_spent?: number;
+  payment_count?: number;
+  total_paid?: number;
+  // Only present when requested with expand
   transactions?: Transaction[];
   payments?: CreditCardPayment[];
 }
@@ -47,6 +57,7 @@ export interface SavingsInvestment {
   recurring_type?: 'monthly' | 'yearly' | null;
   recurring_amount?: number | null;
   last_recurring_date?: string | null;
+  next_due_date?: string | null;
   created_at: string;
   updated_at: string;
 }
@@ -91,6 +102,20 @@ export interface Analytics {
   insights: Insight[];
 }
 
+export interface CardStatement {
+  id: number | null;
+  credit_card_id: number;
+  cycle_start: string;
+  cycle_end: string;
+  total_charges: number;
+  charge_count: number;
+  total_payments: number;
+  payment_count: number;
+  balance: number;
+  category_totals: Record<string, number>;
+  utilization_percent: number;
+}
+
 export interface CardUtilization {
   card_id: number;
   card_name: string;